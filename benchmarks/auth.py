@@ -0,0 +1,71 @@
+"""
+    Бенчмарк зависимости аутентификации get_current_player с кешем
+    проверенных токенов и без него.
+
+    Игрок заранее лежит в кеше игроков, поэтому база данных не нужна
+    и замеряется только разбор и проверка токена. Клиенты опрашивают
+    сервер с одним и тем же токеном: --tokens задаёт число разных
+    токенов, по которым циклически идут запросы.
+
+    Запуск: python -m benchmarks.auth [--requests N] [--tokens N]
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+import uuid
+
+from fastapi.security import HTTPAuthorizationCredentials
+
+from src.api.dependencies.security import get_current_player
+from src.services.auth import create_access_token
+from src.services.principal_cache import PlayerPrincipal, principal_cache
+from src.services.token_cache import token_cache
+
+
+async def _bench(name: str, credentials, requests: int, cache_size: int):
+    token_cache.max_size = cache_size
+    token_cache.clear()
+
+    started = time.perf_counter()
+
+    for i in range(requests):
+        await get_current_player(credentials[i % len(credentials)])
+
+    elapsed = time.perf_counter() - started
+
+    print(f"{name:<14} {elapsed / requests * 1e6:>8.2f} {requests / elapsed:>12,.0f}")
+
+
+async def run(requests: int, tokens: int):
+    credentials = []
+
+    for i in range(tokens):
+        principal = PlayerPrincipal(uuid.uuid4(), f"player_{i}", False)
+        principal_cache.put(principal)
+
+        credentials.append(
+            HTTPAuthorizationCredentials(scheme="Bearer", credentials=create_access_token({"sub": principal.id}))
+        )
+
+    print(f"{'token cache':<14} {'us/req':>8} {'req/s':>12}")
+
+    await _bench("off", credentials, requests, 0)
+    await _bench("on", credentials, requests, max(tokens, 1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100_000, help="Количество запросов")
+    parser.add_argument("--tokens", type=int, default=100, help="Количество разных токенов")
+
+    args = parser.parse_args()
+
+    logging.getLogger("battleship").setLevel(logging.WARNING)
+
+    asyncio.run(run(args.requests, args.tokens))
+
+
+if __name__ == "__main__":
+    main()
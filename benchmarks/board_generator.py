@@ -0,0 +1,142 @@
+"""
+    Бенчмарк генерации игровых досок: досок в секунду.
+
+    Сравнивается битбордовый генератор из src.services.board_generator
+    с прежней реализацией на списках списков с случайными попытками,
+    а также пакетная генерация generate_random_boards (с приведением к спискам).
+    Отдельно замеряются большие доски с флотом, пропорциональным площади.
+
+    Запуск: python -m benchmarks.board_generator [--boards N] [--sizes 10 20 50]
+"""
+
+import argparse
+import logging
+import random
+import time
+
+from src.services.board_generator import (
+    BOARD_SIZE,
+    SHIPS,
+    check_fleet_fits,
+    get_placement_table,
+    generate_random_board,
+    generate_random_boards
+)
+
+
+def _legacy_can_place_ship(board, x, y, size, direction) -> bool:
+    for i in range(size):
+        if direction == 0:
+            check_x, check_y = x + i, y
+        else:
+            check_x, check_y = x, y + i
+
+        for dx in [-1, 0, 1]:
+            for dy in [-1, 0, 1]:
+                nx, ny = check_x + dx, check_y + dy
+
+                if 0 <= nx < BOARD_SIZE and 0 <= ny < BOARD_SIZE:
+                    if board[ny][nx] != 0:
+                        return False
+
+    return True
+
+
+def legacy_generate_random_board():
+    """ Прежняя реализация generate_random_board (для сравнения) """
+
+    board = [[0 for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
+
+    for ship_id, ship_size in enumerate(SHIPS, start=1):
+        placed = False
+        attempts = 0
+
+        while not placed and attempts < 1000:
+            attempts += 1
+            direction = random.randint(0, 1)
+
+            if direction == 0:
+                x = random.randint(0, BOARD_SIZE - ship_size)
+                y = random.randint(0, BOARD_SIZE - 1)
+            else:
+                x = random.randint(0, BOARD_SIZE - 1)
+                y = random.randint(0, BOARD_SIZE - ship_size)
+
+            if _legacy_can_place_ship(board, x, y, ship_size, direction):
+                for i in range(ship_size):
+                    if direction == 0:
+                        board[y][x + i] = ship_id
+                    else:
+                        board[y + i][x] = ship_id
+
+                placed = True
+
+        if not placed:
+            return legacy_generate_random_board()
+
+    return board
+
+
+def _boards_per_second(generate, boards: int) -> float:
+    started = time.perf_counter()
+
+    for _ in range(boards):
+        generate()
+
+    return boards / (time.perf_counter() - started)
+
+
+def _bench_sizes(sizes, seconds: float = 1.0):
+    print(f"\n{'size':<8} {'ships':>6} {'table, ms':>10} {'boards/s':>12} {'batch/s':>12}")
+
+    for board_size in sizes:
+        # Флот классической игры, повторённый пропорционально площади доски
+        fleet = sorted(SHIPS * max(1, (board_size * board_size) // (BOARD_SIZE * BOARD_SIZE)), reverse=True)
+        assert check_fleet_fits(board_size, fleet) is None
+
+        started = time.perf_counter()
+        get_placement_table(board_size, tuple(sorted(set(fleet))))
+        table_ms = (time.perf_counter() - started) * 1000
+
+        boards = 0
+        started = time.perf_counter()
+
+        while time.perf_counter() - started < seconds:
+            generate_random_board(board_size=board_size, fleet=fleet)
+            boards += 1
+
+        sequential = boards / (time.perf_counter() - started)
+
+        started = time.perf_counter()
+        generate_random_boards(max(boards, 1), board_size=board_size, fleet=fleet).tolist()
+        batch = max(boards, 1) / (time.perf_counter() - started)
+
+        size = f"{board_size}x{board_size}"
+        print(f"{size:<8} {len(fleet):>6} {table_ms:>10.1f} {sequential:>12,.0f} {batch:>12,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--boards", type=int, default=20000, help="Количество досок на замер")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[10, 20, 50], help="Размеры досок")
+    args = parser.parse_args()
+
+    # Логирование каждой доски не должно влиять на замер
+    logging.getLogger("battleship").setLevel(logging.WARNING)
+
+    legacy = _boards_per_second(legacy_generate_random_board, args.boards)
+    bitboard = _boards_per_second(generate_random_board, args.boards)
+
+    started = time.perf_counter()
+    generate_random_boards(args.boards).tolist()
+    batch = args.boards / (time.perf_counter() - started)
+
+    print(f"{'legacy':<10} {legacy:>12,.0f} boards/s")
+    print(f"{'bitboard':<10} {bitboard:>12,.0f} boards/s  (x{bitboard / legacy:.1f})")
+    print(f"{'batch':<10} {batch:>12,.0f} boards/s  (x{batch / legacy:.1f})")
+
+    _bench_sizes(args.sizes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+    Бенчмарк генерации изображений игрового поля: изображений в секунду.
+
+    Сравнивается прежняя реализация (полная перерисовка подписей и всех клеток
+    на каждый запрос) с наложением спрайтов на заранее отрисованный фон:
+    отдельно отрисовка (render) и отрисовка вместе с кодированием в PNG (png).
+    Доски берутся в середине игры: обстреляна примерно половина клеток.
+
+    Запуск: python -m benchmarks.board_image [--images N] [--sizes 10 20]
+"""
+
+import argparse
+import logging
+import random
+import time
+
+from PIL import Image, ImageDraw, ImageFont
+
+from src.services.board_generator import BOARD_SIZE, SHIPS, generate_random_board
+from src.services.board_visualizer import (
+    CELL_SIZE,
+    MIN_CELL_SIZE,
+    BOARD_PIXELS,
+    MARGIN,
+    LABEL_MIN_SPACING,
+    _column_label,
+    encode_png,
+    render_board,
+    generate_board_image
+)
+
+
+def legacy_render_board(board, shots) -> Image.Image:
+    """ Прежняя реализация generate_board_image без кодирования (для сравнения) """
+
+    board_size = len(board)
+    cell_size = max(MIN_CELL_SIZE, min(CELL_SIZE, BOARD_PIXELS // board_size))
+    label_step = -(-LABEL_MIN_SPACING // cell_size)
+
+    img_width = board_size * cell_size + 2 * MARGIN
+    img_height = board_size * cell_size + 2 * MARGIN
+
+    img = Image.new('RGB', (img_width, img_height), color='white')
+    draw = ImageDraw.Draw(img)
+
+    font = ImageFont.load_default()
+
+    for i in range(0, board_size, label_step):
+        draw.text((MARGIN + i * cell_size + cell_size // 2 - 5, 5), _column_label(i), fill='black', font=font)
+        draw.text((5, MARGIN + i * cell_size + cell_size // 2 - 10), str(i + 1), fill='black', font=font)
+
+    for y in range(board_size):
+        for x in range(board_size):
+            x_pos = MARGIN + x * cell_size
+            y_pos = MARGIN + y * cell_size
+
+            cell_value = board[y][x]
+            is_shot = shots[y][x]
+
+            if is_shot:
+                color = 'red' if cell_value > 0 else 'gray'
+            else:
+                color = 'blue' if cell_value > 0 else 'lightblue'
+
+            draw.rectangle([x_pos, y_pos, x_pos + cell_size, y_pos + cell_size], fill=color, outline='black', width=1)
+
+            mark = max(1, cell_size // 8)
+
+            if is_shot:
+                if cell_value > 0:
+                    draw.line([x_pos + mark, y_pos + mark, x_pos + cell_size - mark, y_pos + cell_size - mark],
+                              fill='white', width=3)
+                    draw.line([x_pos + cell_size - mark, y_pos + mark, x_pos + mark, y_pos + cell_size - mark],
+                              fill='white', width=3)
+                else:
+                    draw.ellipse([x_pos + cell_size // 2 - mark, y_pos + cell_size // 2 - mark,
+                                  x_pos + cell_size // 2 + mark, y_pos + cell_size // 2 + mark], fill='white')
+
+    return img
+
+
+def legacy_generate_board_image(board, shots) -> bytes:
+    return encode_png(legacy_render_board(board, shots))
+
+
+def _states(size: int, count: int):
+    rng = random.Random(size)
+    fleet = sorted(SHIPS * max(1, (size * size) // (BOARD_SIZE * BOARD_SIZE)), reverse=True)
+
+    return [
+        (generate_random_board(rng, size, fleet), [[rng.random() < 0.5 for _ in range(size)] for _ in range(size)])
+        for _ in range(count)
+    ]
+
+
+def _images_per_second(render, states, images: int) -> float:
+    started = time.perf_counter()
+
+    for i in range(images):
+        render(*states[i % len(states)])
+
+    return images / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=int, default=500, help="Количество изображений на замер")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[10, 20], help="Размеры досок")
+
+    args = parser.parse_args()
+
+    logging.getLogger("battleship").setLevel(logging.WARNING)
+
+    print(f"{'size':<6} {'stage':<7} {'legacy/s':>10} {'layers/s':>10} {'speedup':>8}")
+
+    for size in args.sizes:
+        states = _states(size, 50)
+
+        # Слои рисуются один раз, как при запуске приложения
+        generate_board_image(*states[0])
+
+        for stage, legacy_render, render in (
+            ("render", legacy_render_board, render_board),
+            ("png", legacy_generate_board_image, generate_board_image)
+        ):
+            legacy = _images_per_second(legacy_render, states, args.images)
+            layered = _images_per_second(render, states, args.images)
+
+            print(f"{size:<6} {stage:<7} {legacy:>10,.0f} {layered:>10,.0f} {layered / legacy:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+    Бенчмарк бота с картой плотности вероятности: решений в секунду.
+
+    Бот доигрывает игры против случайной расстановки, время замеряется на каждом решении:
+        - choose_target: выбор клетки по готовым маскам (как в симуляции);
+        - choose_shot:   полный серверный путь от доски и записи выстрелов (списки списков)
+                         до координат выстрела.
+
+    Запуск: python -m benchmarks.bot [--games N] [--sizes 10 20]
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+import numpy as np
+
+from src.services.board_generator import BOARD_SIZE, SHIPS, generate_random_board
+from src.services.bot import choose_shot
+from src.services.game_logic import apply_shot
+from src.services.ship_index import ShipIndex, ShipHits
+from src.services.simulation import DensityShooter
+
+
+def _fleet_for(size: int):
+    """ Флот, пропорциональный площади классической доски """
+
+    return sorted(SHIPS * max(1, (size * size) // (BOARD_SIZE * BOARD_SIZE)), reverse=True)
+
+
+def _bench(size: int, games: int):
+    fleet = _fleet_for(size)
+    rng = random.Random(size)
+    np_rng = np.random.default_rng(size)
+
+    target_times = []
+    shot_times = []
+
+    for _ in range(games):
+        board = generate_random_board(rng, size, fleet)
+        index = ShipIndex(board)
+        shots = [[False] * size for _ in range(size)]
+        ship_hits = ShipHits(index, shots)
+
+        shooter = DensityShooter(size, rng, fleet)
+        ships_remaining = len(fleet)
+
+        while ships_remaining:
+            started = time.perf_counter()
+            choose_shot(board, shots, ship_hits, np_rng)
+            shot_times.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            x, y = shooter.next_shot()
+            target_times.append(time.perf_counter() - started)
+
+            hit, sunk = apply_shot(board, shots, ship_hits, x, y)
+            shooter.record(x, y, hit, index.ship_cells(board[y][x]) if sunk else ())
+
+            if sunk:
+                ships_remaining -= 1
+
+    for name, times in (("choose_target", target_times), ("choose_shot", shot_times)):
+        times.sort()
+        p99 = times[int(len(times) * 0.99) - 1]
+
+        print(
+            f"{size:<6} {name:<14} {len(times) / sum(times):>12,.0f} "
+            f"{statistics.fmean(times) * 1e6:>10.0f} {p99 * 1e6:>10.0f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=200, help="Количество игр на размер доски")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[10, 20], help="Размеры досок")
+
+    args = parser.parse_args()
+
+    print(f"{'size':<6} {'path':<14} {'decisions/s':>12} {'avg, us':>10} {'p99, us':>10}")
+
+    for size in args.sizes:
+        _bench(size, args.games)
+
+
+if __name__ == "__main__":
+    main()
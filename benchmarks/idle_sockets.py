@@ -0,0 +1,151 @@
+"""
+    Проверка подключений к базе данных при простаивающих WebSocket-соединениях.
+
+    Приложение запускается в этом же процессе, регистрирует --sockets игроков,
+    создаёт каждому игру с ботом и открывает по WebSocket на игру. Пока
+    соединения простаивают, приложение не должно держать ни одного подключения
+    к базе данных: сессия открывается только на время обработки сообщения.
+    Проверяются метрика database приложения и число сессий в pg_stat_activity
+    относительно замера до открытия соединений.
+
+    Нужна база данных из настроек приложения (.env). Код выхода 1, если
+    простаивающие соединения держат подключения к базе данных.
+
+    Запуск: python -m benchmarks.idle_sockets [--sockets 1000] [--idle 5] [--port 8765]
+"""
+
+import argparse
+import asyncio
+import logging
+import resource
+import sys
+import time
+import uuid
+
+import httpx
+import uvicorn
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from websockets.asyncio.client import connect
+
+from src import config
+
+
+# Регистрация игроков - не то, что замеряется: хеширование по минимуму
+config.PASSWORD_BCRYPT_ROUNDS = 4
+
+from main import app                                  # noqa: E402
+from src.core import database_client                  # noqa: E402
+
+
+SESSIONS = text(
+    "SELECT count(*) FROM pg_stat_activity WHERE datname = current_database() AND pid <> pg_backend_pid()"
+)
+
+
+def _raise_open_files_limit(sockets: int):
+    """ На каждое соединение нужно два дескриптора: клиента и сервера """
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    needed = min(sockets * 2 + 256, hard)
+
+    if soft < needed:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (needed, hard))
+
+
+async def _sessions(engine) -> int:
+    async with engine.connect() as connection:
+        return (await connection.execute(SESSIONS)).scalar_one()
+
+
+async def _open_game(client: httpx.AsyncClient, base_url: str, semaphore: asyncio.Semaphore):
+    async with semaphore:
+        response = await client.post(
+            "/api/v1/players/register",
+            json={"username": f"idle_{uuid.uuid4().hex[:12]}", "password": "password"}
+        )
+        response.raise_for_status()
+
+        token = response.json()["access_token"]
+        player_id = response.json()["player"]["id"]
+
+        response = await client.post(
+            "/api/v1/games/create",
+            json={"player1_id": player_id, "bot": True},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        response.raise_for_status()
+
+        game_id = response.json()["id"]
+
+        websocket = await connect(f"{base_url}/api/v1/games/{game_id}/play?game_id={game_id}&token={token}")
+
+        # Подтверждение подключения и полное состояние игры
+        await websocket.recv()
+        await websocket.recv()
+
+        return websocket
+
+
+async def run(sockets: int, idle: float, port: int) -> bool:
+    server = uvicorn.Server(uvicorn.Config(app, port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    engine = create_async_engine(config.database_url)
+    websockets = []
+
+    try:
+        baseline = await _sessions(engine)
+        semaphore = asyncio.Semaphore(50)
+
+        started = time.perf_counter()
+
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60) as client:
+            websockets = await asyncio.gather(
+                *(_open_game(client, f"ws://127.0.0.1:{port}", semaphore) for _ in range(sockets))
+            )
+
+        print(f"открыто соединений: {len(websockets)} за {time.perf_counter() - started:.1f} с")
+
+        await asyncio.sleep(idle)
+
+        metrics = database_client.metrics
+        sessions = await _sessions(engine) - baseline
+
+        print(f"занятых подключений приложения:     {metrics['connections_in_use']}")
+        print(f"новых сессий в pg_stat_activity:    {sessions}")
+        print(f"выдано подключений за всё время:    {metrics['checkouts']}")
+
+        return metrics["connections_in_use"] == 0 and sessions <= 0
+
+    finally:
+        await asyncio.gather(*(websocket.close() for websocket in websockets), return_exceptions=True)
+        await engine.dispose()
+
+        server.should_exit = True
+        await serving
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sockets", type=int, default=1000, help="Количество WebSocket-соединений")
+    parser.add_argument("--idle", type=float, default=5.0, help="Время простоя соединений, с")
+    parser.add_argument("--port", type=int, default=8765, help="Порт приложения")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    _raise_open_files_limit(args.sockets)
+
+    if asyncio.run(run(args.sockets, args.idle, args.port)):
+        print("OK: простаивающие соединения не держат подключений к базе данных")
+    else:
+        print("FAIL: простаивающие соединения держат подключения к базе данных")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+    Бенчмарк форматов изображения игрового поля: размер ответа и время генерации.
+
+    Форматы:
+        - legacy: прежний RGB PNG (полная перерисовка, сглаженные подписи);
+        - png:    RGB PNG из слоёв в палитре;
+        - png8:   PNG с палитрой (4 бита на пиксель);
+        - svg:    SVG из готовых строк, без Pillow.
+
+    Составное изображение (view=composite) сравнивается с двумя отдельными
+    изображениями досок (2x) в тех же форматах.
+
+    Размер приводится как есть и после gzip (ответы сжимает GZipMiddleware).
+    Доски берутся в середине игры: обстреляна примерно половина клеток.
+
+    Запуск: python -m benchmarks.image_formats [--images N] [--sizes 10 20 50]
+"""
+
+import argparse
+import gzip
+import logging
+import statistics
+import time
+
+from benchmarks.board_image import _states, legacy_generate_board_image
+from src.services.board_visualizer import (
+    encode_palette_png,
+    encode_png,
+    fog_of_war,
+    generate_board_svg,
+    generate_composite_svg,
+    render_board,
+    render_composite
+)
+
+
+FORMATS = {
+    "legacy": legacy_generate_board_image,
+    "png":    lambda board, shots: encode_png(render_board(board, shots)),
+    "png8":   lambda board, shots: encode_palette_png(render_board(board, shots)),
+    "svg":    generate_board_svg
+}
+
+
+def _pair(generate):
+    """ Два отдельных изображения: своя доска и вид на противника """
+
+    def generate_pair(board, shots, opponent_board, opponent_shots):
+        return generate(board, shots), generate(fog_of_war(opponent_board, opponent_shots), opponent_shots)
+
+    return generate_pair
+
+
+COMPOSITE_FORMATS = {
+    "2x png":  _pair(FORMATS["png"]),
+    "png":     lambda *panels: encode_png(render_composite(*panels)),
+    "2x png8": _pair(FORMATS["png8"]),
+    "png8":    lambda *panels: encode_palette_png(render_composite(*panels)),
+    "2x svg":  _pair(FORMATS["svg"]),
+    "svg":     generate_composite_svg
+}
+
+
+def _parts(image):
+    """ Изображение или пара отдельных изображений """
+
+    return image if isinstance(image, tuple) else (image,)
+
+
+def _bench(size: int, view: str, name: str, generate, states, images: int):
+    # Слои и шаблоны готовятся один раз, как при запуске приложения
+    generate(*states[0])
+
+    sizes = []
+    compressed = []
+
+    started = time.perf_counter()
+
+    for i in range(images):
+        sizes.append(sum(map(len, _parts(generate(*states[i % len(states)])))))
+
+    elapsed = time.perf_counter() - started
+
+    for state in states:
+        compressed.append(sum(len(gzip.compress(part)) for part in _parts(generate(*state))))
+
+    print(
+        f"{size:<6} {view:<10} {name:<8} {statistics.fmean(sizes):>8,.0f} {statistics.fmean(compressed):>8,.0f} "
+        f"{elapsed / images * 1000:>8.2f} {images / elapsed:>10,.0f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=int, default=200, help="Количество изображений на замер")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[10, 20, 50], help="Размеры досок")
+
+    args = parser.parse_args()
+
+    logging.getLogger("battleship").setLevel(logging.WARNING)
+
+    print(f"{'size':<6} {'view':<10} {'format':<8} {'bytes':>8} {'gzip':>8} {'ms':>8} {'images/s':>10}")
+
+    for size in args.sizes:
+        states = _states(size, 50)
+
+        for name, generate in FORMATS.items():
+            _bench(size, "board", name, generate, states, args.images)
+
+        # Пары досок: своя и противника
+        pairs = [own + opponent for own, opponent in zip(states, states[1:] + states[:1])]
+
+        for name, generate in COMPOSITE_FORMATS.items():
+            _bench(size, "composite", name, generate, pairs, args.images)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+    Бенчмарк записи ходов в PostgreSQL: байты WAL и задержка одного хода.
+
+    Сравниваются две схемы хранения выстрелов:
+        - jsonb: прежняя схема, каждый ход перезаписывает JSONB-документ shots_record
+          строки доски, по shots_record и board_state построены GIN-индексы;
+        - moves: журнал ходов, каждый ход - одна вставка строки в таблицу moves.
+
+    Каждый ход выполняется в отдельной транзакции, как в приложении.
+    Таблицы бенчмарка создаются во временной схеме и удаляются после замера.
+    Нужна база данных из настроек приложения (.env).
+
+    Запуск: python -m benchmarks.move_log [--games N] [--size 10]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src import config
+from src.services.board_generator import generate_random_board
+
+
+SCHEMA = "bench_move_log"
+
+
+SETUP = [
+    f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE",
+    f"CREATE SCHEMA {SCHEMA}",
+    f"""
+    CREATE TABLE {SCHEMA}.game_boards (
+        id           integer PRIMARY KEY,
+        board_state  jsonb NOT NULL,
+        shots_record jsonb NOT NULL
+    )
+    """,
+    f"CREATE INDEX ON {SCHEMA}.game_boards USING gin (board_state)",
+    f"CREATE INDEX ON {SCHEMA}.game_boards USING gin (shots_record)",
+    f"""
+    CREATE TABLE {SCHEMA}.moves (
+        game_id integer NOT NULL,
+        seq     integer NOT NULL,
+        shooter integer NOT NULL,
+        x       smallint NOT NULL,
+        y       smallint NOT NULL,
+        result  smallint NOT NULL,
+        ts      timestamptz NOT NULL DEFAULT now(),
+        PRIMARY KEY (game_id, seq)
+    )
+    """,
+    f"CREATE UNIQUE INDEX ON {SCHEMA}.moves (game_id, shooter, x, y)"
+]
+
+
+JSONB_MOVE = text(
+    f"UPDATE {SCHEMA}.game_boards "
+    f"SET shots_record = jsonb_set(shots_record, ARRAY[CAST(:y AS text), CAST(:x AS text)], 'true'::jsonb) "
+    f"WHERE id = :game_id"
+)
+
+LOG_MOVE = text(
+    f"INSERT INTO {SCHEMA}.moves (game_id, seq, shooter, x, y, result) "
+    f"VALUES (:game_id, :seq, 1, :x, :y, :result)"
+)
+
+WAL_DIFF = text(
+    "SELECT pg_wal_lsn_diff(CAST(CAST(:end AS text) AS pg_lsn), CAST(CAST(:start AS text) AS pg_lsn))"
+)
+
+
+def _shots(size: int):
+    """ Все клетки доски в случайном порядке (полная игра по одной доске) """
+
+    cells = [(x, y) for y in range(size) for x in range(size)]
+    random.shuffle(cells)
+
+    return cells
+
+
+async def _wal_lsn(conn) -> str:
+    return (await conn.execute(text("SELECT CAST(pg_current_wal_insert_lsn() AS text)"))).scalar()
+
+
+async def _run(engine, games: int, size: int, statement, params):
+    """
+        Прогон ходов: (байт WAL на ход, задержки ходов в мс)
+    """
+
+    latencies = []
+
+    async with engine.connect() as conn:
+        start_lsn = await _wal_lsn(conn)
+
+        for game_id in range(games):
+            for seq, (x, y) in enumerate(_shots(size), start=1):
+                started = time.perf_counter()
+
+                await conn.execute(statement, params(game_id, seq, x, y))
+                await conn.commit()
+
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        end_lsn = await _wal_lsn(conn)
+
+        wal_bytes = (await conn.execute(WAL_DIFF, {"end": end_lsn, "start": start_lsn})).scalar()
+
+    return float(wal_bytes) / len(latencies), latencies
+
+
+async def main_async(games: int, size: int):
+    engine = create_async_engine(config.database_url)
+
+    try:
+        async with engine.begin() as conn:
+            for statement in SETUP:
+                await conn.execute(text(statement))
+
+            for game_id in range(games):
+                await conn.execute(
+                    text(f"INSERT INTO {SCHEMA}.game_boards VALUES (:id, CAST(:board AS jsonb), CAST(:shots AS jsonb))"),
+                    {
+                        "id":    game_id,
+                        "board": json.dumps(generate_random_board(board_size=size)),
+                        "shots": json.dumps([[False] * size for _ in range(size)])
+                    }
+                )
+
+        results = {
+            "jsonb": await _run(
+                engine, games, size, JSONB_MOVE,
+                lambda game_id, seq, x, y: {"game_id": game_id, "x": str(x), "y": str(y)}
+            ),
+            "moves": await _run(
+                engine, games, size, LOG_MOVE,
+                lambda game_id, seq, x, y: {"game_id": game_id, "seq": seq, "x": x, "y": y, "result": 0}
+            )
+        }
+
+        print(f"{'schema':<8} {'WAL/move, B':>12} {'avg, ms':>9} {'p50, ms':>9} {'p99, ms':>9}")
+
+        for name, (wal_per_move, latencies) in results.items():
+            latencies.sort()
+            p99 = latencies[int(len(latencies) * 0.99) - 1]
+
+            print(
+                f"{name:<8} {wal_per_move:>12,.0f} {statistics.fmean(latencies):>9.3f} "
+                f"{statistics.median(latencies):>9.3f} {p99:>9.3f}"
+            )
+
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=50, help="Количество игр (по одной доске на игру)")
+    parser.add_argument("--size", type=int, default=10, help="Размер доски")
+
+    args = parser.parse_args()
+
+    asyncio.run(main_async(args.games, args.size))
+
+
+if __name__ == "__main__":
+    main()
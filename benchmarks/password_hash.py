@@ -0,0 +1,119 @@
+"""
+    Бенчмарк пропускной способности входа в зависимости от стоимости bcrypt.
+
+    --clients клиентов непрерывно входят в систему: проверка пароля идёт
+    через PasswordHasher, как в обработчике /players/login. Одновременно
+    в том же цикле событий тикер каждые 10 мс замеряет, на сколько позже
+    запланированного он просыпается (задержка для WebSocket-игр воркера).
+
+    Для каждой пары (стоимость, число воркеров пула) выводятся входы в секунду,
+    задержка входа p50/p99 и задержка цикла событий p99. Стоимость выбирается
+    так, чтобы пропускная способность покрывала пиковую нагрузку на вход.
+
+    Запуск: python -m benchmarks.password_hash [--seconds 3] [--clients 32] [--rounds 10 11 12 13] [--workers 1 2 4]
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+
+from src import config
+from src.services.auth import get_password_hash
+from src.services.password_hasher import PasswordHasherBusy, password_hasher
+
+
+PASSWORD = "correct horse battery staple"
+
+TICK_INTERVAL = 0.01
+
+
+def _percentile(values, q: float) -> float:
+    return statistics.quantiles(values, n=100)[q - 1] if len(values) > 1 else (values[0] if values else 0.0)
+
+
+async def _ticker(stop: asyncio.Event):
+    """ Задержки пробуждения цикла событий в мс """
+
+    lags = []
+
+    while not stop.is_set():
+        planned = time.perf_counter() + TICK_INTERVAL
+        await asyncio.sleep(TICK_INTERVAL)
+        lags.append((time.perf_counter() - planned) * 1000)
+
+    return lags
+
+
+async def _client(stop: asyncio.Event, hashed_password: str, latencies):
+    while not stop.is_set():
+        started = time.perf_counter()
+
+        try:
+            if not await password_hasher.verify(PASSWORD, hashed_password):
+                raise RuntimeError("Пароль не прошёл проверку")
+        except PasswordHasherBusy as e:
+            await asyncio.sleep(e.retry_after)
+            continue
+
+        finished = time.perf_counter()
+
+        # Входы, завершившиеся после окончания замера, не учитываются
+        if not stop.is_set():
+            latencies.append((finished - started) * 1000)
+
+
+async def _bench(rounds: int, workers: int, clients: int, seconds: float):
+    config.PASSWORD_BCRYPT_ROUNDS = rounds
+    hashed_password = get_password_hash(PASSWORD)
+
+    password_hasher.stop()
+    password_hasher.workers = workers
+    password_hasher.max_pending = max(clients, workers)
+    password_hasher.start()
+
+    stop = asyncio.Event()
+    latencies = []
+
+    ticker = asyncio.create_task(_ticker(stop))
+    tasks = [asyncio.create_task(_client(stop, hashed_password, latencies)) for _ in range(clients)]
+
+    await asyncio.sleep(seconds)
+    stop.set()
+
+    lags = await ticker
+    await asyncio.gather(*tasks)
+
+    print(
+        f"{rounds:<7} {workers:<8} {len(latencies) / seconds:>9,.1f} {_percentile(latencies, 50):>9.1f} "
+        f"{_percentile(latencies, 99):>9.1f} {_percentile(lags, 99):>9.2f}"
+    )
+
+
+async def run(args):
+    print(f"{'rounds':<7} {'workers':<8} {'logins/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'loop p99':>9}")
+
+    for rounds in args.rounds:
+        for workers in args.workers:
+            await _bench(rounds, workers, args.clients, args.seconds)
+
+    password_hasher.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=3.0, help="Длительность замера")
+    parser.add_argument("--clients", type=int, default=32, help="Количество одновременно входящих клиентов")
+    parser.add_argument("--rounds", type=int, nargs="*", default=[10, 11, 12, 13], help="Стоимости bcrypt")
+    parser.add_argument("--workers", type=int, nargs="*", default=[1, 2, 4], help="Размеры пула хеширования")
+
+    args = parser.parse_args()
+
+    logging.getLogger("battleship").setLevel(logging.WARNING)
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+    Бенчмарк задержки сообщений игры во время отрисовки изображений досок.
+
+    В одном цикле событий работают:
+        - игрок: каждые --interval мс обрабатывает ход (выстрел и сериализация
+          состояния, как обработчик WebSocket-сообщения) и замеряет, на сколько
+          позже запланированного ход был обработан;
+        - --clients клиентов, непрерывно запрашивающих изображения досок.
+
+    Сравниваются режимы:
+        - idle:    без отрисовки (опорная задержка);
+        - inline:  отрисовка прямо в цикле событий (прежний обработчик);
+        - thread:  ImageRenderer с пулом потоков;
+        - process: ImageRenderer с пулом процессов.
+
+    В режимах с пулом запросы сверх очереди отклоняются (503 в приложении),
+    клиент в этом случае ждёт Retry-After и повторяет запрос.
+
+    Запуск: python -m benchmarks.render_latency [--seconds 3] [--clients 8] [--size 20]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import statistics
+import time
+
+from src.services.board_generator import BOARD_SIZE, SHIPS, generate_random_board
+from src.services.board_visualizer import generate_board_image, warm_up
+from src.services.game_logic import apply_shot
+from src.services.image_renderer import ImageRendererBusy, image_renderer
+from src.services.ship_index import ShipIndex, ShipHits
+
+
+def _state(size: int, rng: random.Random):
+    fleet = sorted(SHIPS * max(1, (size * size) // (BOARD_SIZE * BOARD_SIZE)), reverse=True)
+    board = generate_random_board(rng, size, fleet)
+    shots = [[rng.random() < 0.5 for _ in range(size)] for _ in range(size)]
+
+    return board, shots
+
+
+async def _player(stop: asyncio.Event, interval: float, size: int):
+    """ Ходы игрока по расписанию: задержки обработки в мс """
+
+    rng = random.Random(0)
+    board = generate_random_board(rng, size)
+    index = ShipIndex(board)
+
+    latencies = []
+    shots, ship_hits = None, None
+    planned = time.perf_counter()
+
+    while not stop.is_set():
+        if not shots or all(all(row) for row in shots):
+            shots = [[False] * size for _ in range(size)]
+            ship_hits = ShipHits(index, shots)
+
+        planned += interval
+        await asyncio.sleep(max(0.0, planned - time.perf_counter()))
+
+        x, y = rng.randrange(size), rng.randrange(size)
+        result = apply_shot(board, shots, ship_hits, x, y)
+        json.dumps({"x": x, "y": y, "result": result, "shots": shots})
+
+        finished = time.perf_counter()
+        latencies.append((finished - planned) * 1000)
+
+        # После остановки цикла событий расписание начинается заново, а не догоняет пропущенное
+        planned = max(planned, finished - interval)
+
+    return latencies
+
+
+async def _client(stop: asyncio.Event, mode: str, states, counters):
+    rng = random.Random(id(counters))
+
+    while not stop.is_set():
+        board, shots = rng.choice(states)
+
+        if mode == "inline":
+            generate_board_image(board, shots)
+            await asyncio.sleep(0)
+
+        else:
+            try:
+                # Как обработчик изображения при промахе кеша: отрисовка и кодирование в пуле
+                await image_renderer.encode(await image_renderer.render_image(board, shots))
+
+            except ImageRendererBusy as e:
+                counters["rejected"] += 1
+                await asyncio.sleep(min(e.retry_after, 0.05))
+                continue
+
+        counters["rendered"] += 1
+
+
+async def _run(mode: str, seconds: float, clients: int, interval: float, size: int, states):
+    stop = asyncio.Event()
+    counters = {"rendered": 0, "rejected": 0}
+
+    player = asyncio.create_task(_player(stop, interval, size))
+    renders = [
+        asyncio.create_task(_client(stop, mode, states, counters))
+        for _ in range(clients if mode != "idle" else 0)
+    ]
+
+    await asyncio.sleep(seconds)
+    stop.set()
+
+    latencies = await player
+    await asyncio.gather(*renders)
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+
+    print(
+        f"{mode:<8} {statistics.median(latencies):>9.2f} {p99:>9.2f} {latencies[-1]:>9.2f} "
+        f"{counters['rendered'] / seconds:>10,.0f} {counters['rejected']:>9}"
+    )
+
+
+async def main_async(args):
+    rng = random.Random(args.size)
+    states = [_state(args.size, rng) for _ in range(20)]
+
+    warm_up(args.size)
+
+    print(f"{'mode':<8} {'p50, ms':>9} {'p99, ms':>9} {'max, ms':>9} {'images/s':>10} {'rejected':>9}")
+
+    for mode in ("idle", "inline", "thread", "process"):
+        if mode in ("thread", "process"):
+            image_renderer.stop()
+            image_renderer.executor_kind = mode
+            image_renderer.start()
+
+            # Прогрев пула: процессы запускаются и рисуют слои заранее
+            await asyncio.gather(*(image_renderer.render_image(*states[0]) for _ in range(image_renderer.workers)))
+
+        await _run(mode, args.seconds, args.clients, args.interval / 1000, args.size, states)
+
+    image_renderer.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=3.0, help="Длительность замера каждого режима")
+    parser.add_argument("--clients", type=int, default=8, help="Клиентов, запрашивающих изображения")
+    parser.add_argument("--interval", type=float, default=5.0, help="Интервал между ходами игрока, мс")
+    parser.add_argument("--size", type=int, default=20, help="Размер доски")
+
+    args = parser.parse_args()
+
+    logging.getLogger("battleship").setLevel(logging.WARNING)
+
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+    Бенчмарк протоколов WebSocket: JSON (по умолчанию) и бинарный battleship.bin.
+
+    Для каждого сообщения игры замеряются размер кадра и время кодирования
+    и декодирования:
+        - game_state: полное состояние (при подключении и resync), доски в середине игры;
+        - game_delta: изменение одним ходом (с потопленным кораблём);
+        - move:       ход клиента.
+
+    Запуск: python -m benchmarks.ws_protocol [--messages N] [--sizes 10 20 50]
+"""
+
+import argparse
+import logging
+import random
+import time
+import uuid
+
+from src.db.enums import ShotResult
+from src.schemas.websocket import GameDeltaMessage, GameStateMessage, WSMessageType
+from src.services.board_generator import BOARD_SIZE, SHIPS, generate_random_board
+from src.services.ws_protocol import BinaryProtocol, JsonProtocol
+
+
+PROTOCOLS = {
+    "json":   JsonProtocol,
+    "binary": BinaryProtocol
+}
+
+
+def _messages(size: int):
+    rng = random.Random(size)
+
+    fleet = sorted(SHIPS * max(1, (size * size) // (BOARD_SIZE * BOARD_SIZE)), reverse=True)
+    board = generate_random_board(rng, size, fleet)
+
+    def shots():
+        return [[rng.random() < 0.5 for _ in range(size)] for _ in range(size)]
+
+    state = GameStateMessage(
+        game_id=str(uuid.uuid4()),
+        seq=size * size,
+        turn_player_id=str(uuid.uuid4()),
+        your_board=board,
+        opponent_shots=shots(),
+        your_shots=shots(),
+        ships_remaining=len(fleet) // 2,
+        opponent_ships_remaining=len(fleet) // 3
+    )
+
+    delta = GameDeltaMessage(
+        seq=size * size + 1,
+        cell=(1, 2),
+        result=ShotResult.SUNK,
+        sunk_ship_cells=[(1, 2), (1, 3), (1, 4)],
+        turn=str(uuid.uuid4())
+    )
+
+    return {
+        "game_state": {"type": WSMessageType.GAME_STATE, "data": state.model_dump()},
+        "game_delta": {"type": WSMessageType.GAME_DELTA, "data": delta.model_dump()},
+        "move":       {"type": WSMessageType.MOVE, "data": {"x": 3, "y": 4}}
+    }
+
+
+def _bench(size: int, name: str, message: dict, messages: int):
+    for protocol_name, protocol in PROTOCOLS.items():
+        frame = protocol.encode(message)
+        frame_bytes = len(frame.encode()) if isinstance(frame, str) else len(frame)
+
+        started = time.perf_counter()
+
+        for _ in range(messages):
+            protocol.encode(message)
+
+        encode_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+
+        for _ in range(messages):
+            protocol.decode(frame)
+
+        decode_seconds = time.perf_counter() - started
+
+        print(
+            f"{size:<6} {name:<12} {protocol_name:<8} {frame_bytes:>8,} "
+            f"{encode_seconds / messages * 1e6:>10.2f} {decode_seconds / messages * 1e6:>10.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=10_000, help="Количество сообщений на замер")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[10, 20, 50], help="Размеры досок")
+
+    args = parser.parse_args()
+
+    logging.getLogger("battleship").setLevel(logging.WARNING)
+
+    print(f"{'size':<6} {'message':<12} {'protocol':<8} {'bytes':>8} {'encode us':>10} {'decode us':>10}")
+
+    for size in args.sizes:
+        for name, message in _messages(size).items():
+            _bench(size, name, message, args.messages)
+
+
+if __name__ == "__main__":
+    main()
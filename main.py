@@ -7,6 +7,17 @@ from contextlib import asynccontextmanager
 
 from src.core import database_client
 from src.api import api_router
+from src.services.board_pool import board_pool
+from src.services.board_visualizer import warm_up as warm_up_board_images
+from src.services.bot import ensure_bot_player
+from src.services.broadcast import broadcast
+from src.services.connection_manager import manager as connection_manager
+from src.services.game_engine import game_engine
+from src.services.image_cache import image_cache
+from src.services.image_renderer import image_renderer
+from src.services.password_hasher import password_hasher
+from src.services.principal_cache import principal_cache
+from src.services.token_cache import token_cache
 
 load_dotenv()
 
@@ -14,9 +25,22 @@ load_dotenv()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await database_client.create_tables()
+    await ensure_bot_player()
+
+    board_pool.start()
+    game_engine.start()
+    warm_up_board_images()
+    image_renderer.start()
+    await connection_manager.start()
 
     yield
 
+    await connection_manager.stop()
+    await game_engine.stop()
+    image_renderer.stop()
+    password_hasher.stop()
+    board_pool.stop()
+
 
 app = FastAPI(lifespan=lifespan)
 
@@ -38,6 +62,22 @@ async def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+async def metrics():
+    return {
+        "board_pool":      board_pool.metrics,
+        "broadcast":       broadcast.metrics,
+        "database":        database_client.metrics,
+        "connections":     connection_manager.metrics,
+        "game_engine":     game_engine.metrics,
+        "image_cache":     image_cache.metrics,
+        "image_renderer":  image_renderer.metrics,
+        "password_hasher": password_hasher.metrics,
+        "principal_cache": principal_cache.metrics,
+        "token_cache":     token_cache.metrics
+    }
+
+
 def custom_openapi():
     if app.openapi_schema:
         return app.openapi_schema
@@ -2,6 +2,7 @@ from fastapi import Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.db.models import Player
+from src.services.principal_cache import PlayerPrincipal
 
 from .db import get_db
 from .security import get_current_player
@@ -11,6 +12,7 @@ __all__ = [
     'get_current_player',
     'get_db',
     'Player',
+    'PlayerPrincipal',
 
     'HTTPException',
     'Depends',
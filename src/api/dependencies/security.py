@@ -1,23 +1,23 @@
+import uuid
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 
 from src import logger
-from src.db.models import Player
 from src.services.auth import decode_access_token
-
-from .db import get_db
+from src.services.principal_cache import PlayerPrincipal, principal_cache
 
 
 security = HTTPBearer()
 
 
 async def get_current_player(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db:          AsyncSession = Depends(get_db)
-) -> Player:
-    """Получение текущего аутентифицированного игрока"""
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> PlayerPrincipal:
+    """
+        Получение текущего аутентифицированного игрока.
+        Игрок берётся из кеша по sub токена, к базе данных запрос идёт только при промахе
+    """
     try:
         token = credentials.credentials
         payload = decode_access_token(token)
@@ -29,8 +29,7 @@ async def get_current_player(
                 detail="Недействительный токен"
             )
 
-        result = await db.execute(select(Player).where(Player.id == player_id))
-        player = result.scalar_one_or_none()
+        player = await principal_cache.load(uuid.UUID(player_id))
 
         if player is None:
             raise HTTPException(
@@ -1,11 +1,14 @@
-from fastapi import APIRouter, Response
+import asyncio
+
+from fastapi import APIRouter, Header, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, or_
-from typing import List
+from typing import List, Optional
 
 from src.api.dependencies import (
     get_db,
     get_current_player,
+    PlayerPrincipal,
     HTTPException,
     status,
     Depends
@@ -22,19 +25,51 @@ from src.db.models import Player, Game, GameBoard
 
 from src.db.schemas import GameBoardViewSchema, GameCreateSchema, PlayerBoardSchema, GameResponseSchema
 
-from src.services.board_generator import generate_random_board
-from src.services.board_visualizer import generate_board_image
+from src.services.board_generator import (
+    BOARD_SEED_VERSION,
+    BOARD_SIZE,
+    SHIPS,
+    check_fleet_fits,
+    generate_board_from_seed,
+    new_board_seed
+)
+from src.services.board_pool import board_pool
+from src.services.bot import BOT_USERNAME
+from src.services.board_visualizer import IMAGE_FORMATS, fog_of_war, generate_board_svg, generate_composite_svg
+from src.services.game_engine import BoardState, GameState, game_engine
+from src.services.image_cache import IMAGE_VIEWS, VIEW_BOARD, VIEW_COMPOSITE, board_image_key, image_cache
+from src.services.image_renderer import ImageRendererBusy, image_renderer
 from src import logger
 
 
 api_game_router = APIRouter()
 
 
+async def _get_bot_player(players_repo: PlayerRepository) -> Player:
+    """
+        Игрок-бот (создаётся при запуске приложения)
+
+        :param players_repo: Репозиторий игроков
+        :return:             Игрок-бот
+    """
+
+    bot = await players_repo.get_one_or_none(Player.username == BOT_USERNAME, Player.is_bot.is_(True))
+
+    if not bot:
+        logger.error("Игрок-бот не найден")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Игра против бота недоступна"
+        )
+
+    return bot
+
+
 @api_game_router.post("/create", response_model=GameResponseSchema, status_code=status.HTTP_201_CREATED)
 async def create_game(
     game_data: GameCreateSchema,
     db: AsyncSession = Depends(get_db),
-    current_player: Player = Depends(get_current_player)
+    current_player: PlayerPrincipal = Depends(get_current_player)
 ):
     """
         Создание новой игры
@@ -45,33 +80,52 @@ async def create_game(
         :returns:              Созданная игра
     """
 
-    logger.info(f"Создание игры между {game_data.player1_id} и {game_data.player2_id}")
+    logger.info(f"Создание игры между {game_data.player1_id} и {'ботом' if game_data.bot else game_data.player2_id}")
+
+    # Правила игры: корабли размещаются от больших к меньшим
+    board_size = game_data.board_size
+    fleet = sorted(game_data.fleet or SHIPS, reverse=True)
+
+    fleet_error = check_fleet_fits(board_size, fleet)
+
+    if fleet_error:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=fleet_error
+        )
 
     # Проверка существования игроков
     players_repo = PlayerRepository(session=db)
+
+    if game_data.bot:
+        player2_id = (await _get_bot_player(players_repo)).id
+    else:
+        player2_id = game_data.player2_id
+
     players = await players_repo.list(
         or_(
             Player.id == game_data.player1_id,
-            Player.id == game_data.player2_id
+            Player.id == player2_id
         )
     )
 
-    if len(players) != 2:
+    if len(players) != 2 or any(p.is_bot for p in players if p.id == game_data.player1_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Один или оба игрока не найдены"
         )
 
     player1 = next(p for p in players if p.id == game_data.player1_id)
-    player2 = next(p for p in players if p.id == game_data.player2_id)
+    player2 = next(p for p in players if p.id == player2_id)
 
-    # Проверка активных игр
+    # Проверка активных игр (бот может играть сколько угодно игр одновременно)
     games_repo = GameRepository(session=db)
+    human_ids = [p.id for p in (player1, player2) if not p.is_bot]
 
     active_game = await games_repo.get_one_or_none(
         or_(
-            Game.player1_id.in_([player1.id, player2.id]),
-            Game.player2_id.in_([player1.id, player2.id])
+            Game.player1_id.in_(human_ids),
+            Game.player2_id.in_(human_ids)
         ),
         Game.status.in_([GameStatus.WAITING, GameStatus.IN_PROGRESS])
     )
@@ -92,24 +146,34 @@ async def create_game(
 
     game = await games_repo.add(game, auto_refresh=True)
 
-    # Генерация досок для обоих игроков
-    board1 = generate_random_board()
-    board2 = generate_random_board()
+    if board_size == BOARD_SIZE and fleet == SHIPS:
+        # Классические доски берутся из заранее сгенерированного пула
+        seed1, seed2 = board_pool.take_pair()
+    else:
+        # Доски нестандартных игр строятся вне цикла событий и запоминаются
+        seed1, seed2 = new_board_seed(), new_board_seed()
+
+        for seed in (seed1, seed2):
+            await asyncio.to_thread(generate_board_from_seed, seed, BOARD_SEED_VERSION, board_size, tuple(fleet))
 
     game_board1 = GameBoard(
         game_id=game.id,
         player_id=player1.id,
-        board_state=board1,
-        shots_record=[[False] * 10 for _ in range(10)],
-        ships_remaining=10
+        board_seed=seed1,
+        board_version=BOARD_SEED_VERSION,
+        board_size=board_size,
+        fleet=fleet,
+        ships_remaining=len(fleet)
     )
 
     game_board2 = GameBoard(
         game_id=game.id,
         player_id=player2.id,
-        board_state=board2,
-        shots_record=[[False] * 10 for _ in range(10)],
-        ships_remaining=10
+        board_seed=seed2,
+        board_version=BOARD_SEED_VERSION,
+        board_size=board_size,
+        fleet=fleet,
+        ships_remaining=len(fleet)
     )
 
     game_boards_repo = GameBoardRepository(session=db)
@@ -127,7 +191,7 @@ async def create_game(
             player_id=player1.id,
             board=GameBoardViewSchema(
                 board=game_board1.board_state,
-                shots_received=game_board1.shots_record,
+                shots_received=[[False] * board_size for _ in range(board_size)],
                 ships_remaining=game_board1.ships_remaining
             )
         ),
@@ -135,7 +199,7 @@ async def create_game(
             player_id=player2.id,
             board=GameBoardViewSchema(
                 board=game_board2.board_state,
-                shots_received=game_board2.shots_record,
+                shots_received=[[False] * board_size for _ in range(board_size)],
                 ships_remaining=game_board2.ships_remaining
             )
         )
@@ -158,7 +222,7 @@ async def create_game(
 @api_game_router.get("", response_model=List[GameResponseSchema])
 async def get_active_games(
     db: AsyncSession = Depends(get_db),
-    current_player: Player = Depends(get_current_player)
+    current_player: PlayerPrincipal = Depends(get_current_player)
 ):
     """Получение всех активных игр"""
     logger.info("Fetching all active games")
@@ -223,23 +287,50 @@ async def get_active_games(
 @api_game_router.get("/{game_sid}/board/image")
 async def get_board_image(
     game_id: str,
-    db: AsyncSession = Depends(get_db),
-    current_player: Player = Depends(get_current_player)
+    image_format: Optional[str] = Query(None, alias="format"),
+    view: str = Query(VIEW_BOARD),
+    current_player: PlayerPrincipal = Depends(get_current_player),
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None)
 ):
     """
-        Получение изображения игрового поля
+        Получение изображения игрового поля.
+        Формат выбирается параметром format (png, png8 - PNG с палитрой, svg),
+        а без него - по заголовку Accept (image/svg+xml или image/png).
+        Параметр view=composite возвращает составное изображение: слева свой флот,
+        справа свои выстрелы по доске противника, его необнаруженные корабли скрыты.
+        Изображение адресуется хешем доски и выстрелов (строгий ETag):
+        если у клиента уже есть актуальная копия, отвечаем 304 без отрисовки.
+        Изображение кодируется один раз после хода и отдаётся из памяти до следующего.
 
         :param game_id:        Идентификатор игры
-        :param db:             Сессия базы данных
+        :param image_format:   Формат изображения
+        :param view:           Вид изображения: board или composite
         :param current_player: Текущий игрок
+        :param accept:         Форматы, которые принимает клиент
+        :param if_none_match:  ETag копии изображения у клиента
 
-        :return:               Изображение доски в формате PNG
+        :return:               Изображение доски
     """
     logger.info(f"Generating board image for game: {game_id}")
 
-    # Получение игры
-    games_repo = GameRepository(session=db)
-    game = await games_repo.get_one_or_none(Game.id == game_id)
+    if image_format is None:
+        image_format = _negotiate_image_format(accept)
+
+    elif image_format not in IMAGE_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Неизвестный формат изображения: {image_format}. Доступны: {', '.join(IMAGE_FORMATS)}"
+        )
+
+    if view not in IMAGE_VIEWS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Неизвестный вид изображения: {view}. Доступны: {', '.join(IMAGE_VIEWS)}"
+        )
+
+    # Получение игры: актуальное состояние досок хранится в памяти движка
+    game = await game_engine.get(game_id)
 
     if not game:
         raise HTTPException(
@@ -248,19 +339,14 @@ async def get_board_image(
         )
 
     # Проверка, что игрок участвует в игре
-    if game.player1_id != current_player.id and game.player2_id != current_player.id:
+    if not game.has_player(current_player.id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Вы не участвуете в этой игре"
         )
 
     # Получение доски игрока
-    game_boards_repo = GameBoardRepository(session=db)
-
-    game_board = await game_boards_repo.get_one_or_none(
-        GameBoard.game_id == game.id,
-            GameBoard.player_id == current_player.id
-    )
+    game_board = game.boards.get(current_player.id)
 
     if not game_board:
         raise HTTPException(
@@ -268,15 +354,154 @@ async def get_board_image(
             detail="Board not found"
         )
 
-    # Генерация изображения
-    image_bytes = generate_board_image(
-        game_board.board_state,
-        game_board.shots_record
+    board_size = len(game_board.board)
+
+    if view == VIEW_COMPOSITE:
+        generate_svg, render_image = generate_composite_svg, image_renderer.render_composite
+    else:
+        generate_svg, render_image = generate_board_svg, image_renderer.render_image
+
+    # Изображение из памяти, если после него не было ходов.
+    # Доски для ключа и отрисовки собираются только при промахе кеша
+    seq = game.seq
+    board_image = image_cache.get(game.game_id, current_player.id, seq, view)
+
+    image_key = board_image.keys.get(image_format) if board_image else None
+    panels = None
+
+    if image_key is None:
+        panels = _image_panels(game, game_board, view)
+        image_key = board_image_key(f"{view}:{image_format}", *panels)
+
+        if board_image:
+            board_image.keys[image_format] = image_key
+
+    headers = {
+        "ETag": f'"{image_key}"',
+        "Cache-Control": "private, no-cache",
+        "Vary": "Accept"
+    }
+
+    if if_none_match and _etag_matches(if_none_match, image_key):
+        image_cache.not_modified()
+
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    image_bytes = board_image.encoded.get(image_format) if board_image else None
+
+    if image_bytes is None:
+        if image_format == "svg":
+            # SVG собирается из готовых строк быстрее, чем задача доходит до пула
+            image_bytes = generate_svg(*(panels or _image_panels(game, game_board, view)))
+
+            if board_image is None:
+                board_image = image_cache.put(game.game_id, current_player.id, seq, board_size, view=view)
+                board_image.keys[image_format] = image_key
+
+        else:
+            # Отрисовка и кодирование в пуле, чтобы не останавливать цикл событий.
+            # Отрисованное изображение дальше обновляется по ходам (image_cache.apply_shot),
+            # кодировать остаётся только выбранный формат
+            try:
+                if board_image is None or board_image.image is None:
+                    image = await render_image(*(panels or _image_panels(game, game_board, view)))
+
+                    board_image = image_cache.put(game.game_id, current_player.id, seq, board_size, image, view)
+                    board_image.keys[image_format] = image_key
+
+                    logger.info(f"Сгенерировано изображение игрового поля для игры: {game_id}")
+
+                image_bytes = await image_renderer.encode(board_image.image, image_format)
+
+            except ImageRendererBusy as e:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Сервер занят отрисовкой изображений, повторите запрос позже",
+                    headers={"Retry-After": str(e.retry_after)}
+                )
+
+        image_cache.put_encoded(game.game_id, seq, board_image, image_format, image_bytes)
+
+    return Response(content=image_bytes, media_type=IMAGE_FORMATS[image_format], headers=headers)
+
+
+def _image_panels(game: GameState, game_board: BoardState, view: str) -> tuple:
+    """
+        Доски и записи выстрелов, из которых рисуется изображение.
+        На составном изображении доска противника видна только в обстрелянных клетках
+
+        :param game:       Игра
+        :param game_board: Доска игрока
+        :param view:       Вид изображения: board или composite
+        :return:           Аргументы отрисовки
+    """
+
+    if view != VIEW_COMPOSITE:
+        return game_board.board, game_board.shots
+
+    # Обе доски уже в памяти движка (загружены одним запросом), второго обращения к базе нет
+    opponent_board = game.boards[game.opponent_id(game_board.player_id)]
+
+    return (
+        game_board.board,
+        game_board.shots,
+        fog_of_war(opponent_board.board, opponent_board.shots),
+        opponent_board.shots
     )
 
-    logger.info(f"Сгенерировано изображение игрового поля для игры: {game_id}")
 
-    return Response(content=image_bytes, media_type="image/png")
+def _negotiate_image_format(accept: Optional[str]) -> str:
+    """
+        Выбор формата изображения по заголовку Accept (с учётом q).
+        При равном q выигрывает указанный раньше, по умолчанию - png
+
+        :param accept: Значение заголовка
+        :return:       Формат из IMAGE_FORMATS
+    """
+
+    best_format, best_q = "png", 0.0
+
+    for item in (accept or "").split(","):
+        media_type, *params = [part.strip() for part in item.split(";")]
+
+        image_format = {"image/svg+xml": "svg", "image/png": "png"}.get(media_type.lower())
+
+        if image_format is None:
+            continue
+
+        q = 1.0
+
+        for param in params:
+            name, _, value = param.partition("=")
+
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+
+        if q > best_q:
+            best_format, best_q = image_format, q
+
+    return best_format
+
+
+def _etag_matches(if_none_match: str, image_key: str) -> bool:
+    """
+        Проверка заголовка If-None-Match (список ETag через запятую или *)
+
+        :param if_none_match: Значение заголовка
+        :param image_key:     Ключ текущего изображения
+        :return:              True, если копия клиента актуальна
+    """
+
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+
+        if tag == "*" or tag.removeprefix("W/").strip('"') == image_key:
+            return True
+
+    return False
 
 
 __all__ = [
@@ -11,7 +11,8 @@ from src.api.dependencies import (
     HTTPException,
     Depends,
     status,
-    get_current_player
+    get_current_player,
+    PlayerPrincipal
 )
 
 from src.db.schemas import (
@@ -29,7 +30,9 @@ from src.db.repositories import (
 
 from src import logger
 from src.schemas.auth import TokenSchema
-from src.services.auth import create_access_token, verify_password, get_password_hash
+from src.services.auth import create_access_token
+from src.services.bot import BOT_USERNAME
+from src.services.password_hasher import PasswordHasherBusy, password_hasher
 
 
 api_players_router = APIRouter(prefix="/players", tags=["Сервис управления игроками"])
@@ -51,6 +54,13 @@ async def register_player(
 
     logger.info(f"Начало регистрации Игрока: {player_data.username}")
 
+    if player_data.username == BOT_USERNAME:
+        logger.warning(f"Попытка регистрации под зарезервированным именем: {player_data.username}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Имя игрока зарезервировано"
+        )
+
     players_repo = PlayerRepository(session=db)
 
     existing_player = await players_repo.get_one_or_none(
@@ -64,10 +74,15 @@ async def register_player(
             detail="Игрок с таким именем уже существует"
         )
 
+    try:
+        hashed_password = await password_hasher.hash(player_data.password)
+    except PasswordHasherBusy as e:
+        raise _password_hasher_busy(e)
+
     # Создание нового игрока
     player = Player(
         username=player_data.username,
-        hashed_password=get_password_hash(player_data.password)
+        hashed_password=hashed_password
     )
 
     player = await players_repo.add(player, auto_commit=True, auto_refresh=True)
@@ -104,13 +119,30 @@ async def login_player(
         Player.username == login_data.username
     )
 
-    if not player or not verify_password(login_data.password, player.hashed_password):
+    try:
+        if player:
+            verified, new_hash = await password_hasher.verify_and_update(login_data.password, player.hashed_password)
+        else:
+            # Неизвестное имя проверяется так же долго, как известное
+            verified, new_hash = await password_hasher.verify_unknown(login_data.password), None
+    except PasswordHasherBusy as e:
+        raise _password_hasher_busy(e)
+
+    if not verified:
         logger.warning(f"Неверный пароль или имя пользователя при авторизации пользователя: {login_data.username}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Неверный пароль или имя пользователя"
         )
 
+    # Прежний хеш salt:sha256 или bcrypt с другой стоимостью пересчитывается при входе
+    if new_hash:
+        player.hashed_password = new_hash
+        await db.commit()
+        await db.refresh(player)
+
+        logger.info(f"Хеш пароля игрока обновлён: {player.id}")
+
     access_token = create_access_token(data={"sub": player.id})
 
     logger.info(f"Player logged in successfully: {player.id}")
@@ -123,7 +155,7 @@ async def login_player(
 
 @api_players_router.get("", response_model=List[PlayerResponseSchema])
 async def get_available_players(
-    current_player: Player = Depends(get_current_player),
+    current_player: PlayerPrincipal = Depends(get_current_player),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -171,7 +203,7 @@ async def get_available_players(
 async def get_player_stats(
     player_id: str,
     db: AsyncSession = Depends(get_db),
-    current_player: Player = Depends(get_current_player)
+    current_player: PlayerPrincipal = Depends(get_current_player)
 ):
     """
         Получение статистики игрока
@@ -237,6 +269,21 @@ async def get_player_stats(
     )
 
 
+def _password_hasher_busy(e: PasswordHasherBusy) -> HTTPException:
+    """
+        Ответ 503 при заполненной очереди хеширования паролей
+
+        :param e: Исключение пула хеширования
+        :return:  HTTP-исключение с заголовком Retry-After
+    """
+
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Сервер занят проверкой паролей, повторите запрос позже",
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+
 __all__ = [
     'api_players_router'
 ]
@@ -1,22 +1,19 @@
-import json
+import uuid
 
-from typing import Dict
-from datetime import datetime
+import numpy as np
+
+from typing import Dict, Optional
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from sqlalchemy.ext.asyncio import AsyncSession
-
-from src.db.repositories import (
-    PlayerRepository,
-    GameRepository,
-    GameBoardRepository
-)
-
-from src.core import database_client
-from src.db.enums import GameStatus
-from src.db.models import Player, Game, GameBoard
-from src.schemas.websocket import WSMessageType, MoveMessage, GameStateMessage
-from src.services.game_logic import process_move, check_winner
-from src.utils import SingletonMeta
+from pydantic import ValidationError
+
+from src.schemas.websocket import WSMessageType, MoveMessage, GameStateMessage, GameDeltaMessage
+from src.db.enums import GameStatus, ShotResult
+from src.services.bot import choose_shot
+from src.services.connection_manager import ConnectionManager, manager
+from src.services.game_engine import GameContext, GameEngineError, GameState, MoveResult, game_engine
+from src.services.image_cache import image_cache
+from src.services.principal_cache import principal_cache
+from src.services.ws_protocol import ProtocolError, negotiate_protocol
 from src import logger
 
 ws_router = APIRouter()
@@ -25,47 +22,13 @@ ws_router = APIRouter()
 active_connections: Dict[str, Dict[str, WebSocket]] = {}
 
 
-class ConnectionManager(metaclass=SingletonMeta):
-    def __init__(self):
-        self.active_connections: Dict[str, Dict[str, WebSocket]] = {}
-
-    async def connect(self, websocket: WebSocket, game_id: str, player_id: str):
-        await websocket.accept()
-
-        if game_id not in self.active_connections:
-            self.active_connections[game_id] = {}
-
-        self.active_connections[game_id][player_id] = websocket
-        logger.info(f"Игрок {player_id} подключен к игре {game_id}")
-
-    def disconnect(self, game_id: str, player_id: str):
-        if game_id in self.active_connections:
-            if player_id in self.active_connections[game_id]:
-                del self.active_connections[game_id][player_id]
-                logger.info(f"Игрок {player_id} отключен от игры {game_id}")
-
-            if not self.active_connections[game_id]:
-                del self.active_connections[game_id]
-
-    async def send_personal_message(self, message: dict, game_id: str, player_id: str):
-        if game_id in self.active_connections and player_id in self.active_connections[game_id]:
-            websocket = self.active_connections[game_id][player_id]
-            await websocket.send_json(message)
-
-    async def broadcast_to_game(self, message: dict, game_id: str):
-        if game_id in self.active_connections:
-            for player_sid, websocket in self.active_connections[game_id].items():
-                await websocket.send_json(message)
-
-
-manager = ConnectionManager()
+# Генератор случайных чисел бота (выбор среди равновероятных клеток)
+bot_rng = np.random.default_rng()
 
 
 @ws_router.websocket("/{game_sid}/play")
 async def websocket_endpoint(websocket: WebSocket, game_id: str, token: str):
     """WebSocket для игры"""
-    db = database_client.async_session_factory()
-
     player_id = None
 
     try:
@@ -79,28 +42,30 @@ async def websocket_endpoint(websocket: WebSocket, game_id: str, token: str):
             await websocket.close(code=1008)
             return
 
-        players_repo = PlayerRepository(session=db)
-        player = await players_repo.get_one_or_none(Player.id == player_id)
+        player = await principal_cache.load(uuid.UUID(player_id))
 
         if not player:
             await websocket.close(code=1008)
             return
 
         # Проверка игры
-        game_repo = GameRepository(session=db)
-        game = await game_repo.get_one_or_none(Game.id == game_id)
+        game = await game_engine.get(game_id)
 
         if not game:
             await websocket.close(code=1008)
             return
 
         # Проверка, что игрок участвует в игре
-        if game.player1_id != player.id and game.player2_id != player.id:
+        if not game.has_player(player.id):
             await websocket.close(code=1008)
             return
 
-        # Подключение
-        await manager.connect(websocket, game_id, player_id)
+        game_id = str(game.game_id)
+
+        # Подключение: протокол сообщений выбирается по Sec-WebSocket-Protocol, по умолчанию JSON
+        protocol, subprotocol = negotiate_protocol(websocket.scope.get("subprotocols", []))
+
+        await manager.connect(websocket, game_id, player_id, protocol, subprotocol)
 
         # Отправка подтверждения подключения
         await manager.send_personal_message(
@@ -112,126 +77,203 @@ async def websocket_endpoint(websocket: WebSocket, game_id: str, token: str):
             player_id
         )
 
+        # Полное состояние игры, дальше игроку идут изменения по ходам
+        await send_game_state(game, manager, player.id)
+
+        # Между сообщениями соединение держит только лёгкую запись об игре,
+        # состояние берётся у движка на время обработки сообщения
+        context = game.context
+        del game
+
         # Обработка сообщений
         while True:
-            data = await websocket.receive_text()
-            message = json.loads(data)
+            frame = await websocket.receive()
+
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
 
-            msg_type = message.get("type")
+            data = frame.get("bytes" if protocol.binary else "text")
 
-            if msg_type == WSMessageType.START_GAME:
-                # Начало игры
-                logger.info(f"Начата игра {game_id}")
+            try:
+                # Кадр другого типа (текст в бинарном протоколе и наоборот) - ошибка клиента, а не разрыв
+                if data is None:
+                    raise ProtocolError(
+                        f"Некорректное сообщение: ожидался {'бинарный' if protocol.binary else 'текстовый'} кадр"
+                    )
 
-                game.status = GameStatus.IN_PROGRESS
-                game.started_at = datetime.now()
-                await db.commit()
+                await handle_message(context, player.id, protocol.decode(data))
 
-                await manager.broadcast_to_game(
+            except (GameEngineError, ProtocolError) as e:
+                await manager.send_personal_message(
                     {
-                        "type": WSMessageType.GAME_STATE,
-                        "message": "Игра начата!"
+                        "type": WSMessageType.ERROR,
+                        "message": str(e)
                     },
-                    game_id
+                    game_id,
+                    player_id
                 )
 
-                # Отправка состояния игры обоим игрокам
-                await send_game_state(db, game, manager)
-
-            elif msg_type == WSMessageType.MOVE:
-                # Обработка хода
-                if game.status != GameStatus.IN_PROGRESS:
-                    await manager.send_personal_message(
-                        {
-                            "type": WSMessageType.ERROR,
-                            "message": "Игра не в процессе"
-                        },
-                        game_id,
-                        player_id
-                    )
-                    continue
-
-                # Проверка, чей ход
-                if game.current_turn_player_id != player.id:
-                    await manager.send_personal_message(
-                        {
-                            "type": WSMessageType.ERROR,
-                            "message": "Не ваш ход"
-                        },
-                        game_id,
-                        player_id
-                    )
-                    continue
+    except WebSocketDisconnect:
+        manager.disconnect(game_id, player_id, websocket)
+        logger.info(f"Игрок {player_id} отключен от игры {game_id}")
 
-                move_data = MoveMessage(**message.get("data", {}))
+    except Exception as e:
+        logger.error(f"WebSocket error: {e}")
+        manager.disconnect(game_id, player_id, websocket)
 
-                # Обработка хода
-                opponent_id = game.player2_id if game.player1_id == player.id else game.player1_id
+        # Клиент не должен остаться на соединении, которое больше никто не обслуживает
+        try:
+            await websocket.close(code=1011)
+        except Exception:
+            pass
 
-                hit, sunk = await process_move(db, game, move_data.x, move_data.y, opponent_id)
 
-                # Проверка победителя
-                winner_id = await check_winner(db, game)
+async def handle_message(game: GameContext, player_id: uuid.UUID, message: dict):
+    """
+        Обработка сообщения игрока.
+        Состояние игры нужно только на время обработки: с GAME_ENGINE=database
+        каждое обращение к движку - отдельная короткая сессия базы данных,
+        поэтому простаивающие соединения не держат подключений к ней
 
-                if winner_id:
-                    game.winner_id = winner_id
-                    game.status = GameStatus.FINISHED
-                    game.finished_at = datetime.now()
-                    await db.commit()
+        :param game:      Игра (идентификатор и игроки)
+        :param player_id: Идентификатор игрока
+        :param message:   Сообщение
+    """
 
-                    winner_sid = game.player1.sid if winner_id == game.player1_id else game.player2.sid
+    game_id = str(game.game_id)
+    msg_type = message.get("type")
 
-                    await manager.broadcast_to_game(
-                        {
-                            "type": WSMessageType.GAME_OVER,
-                            "data": {
-                                "winner_id": winner_sid,
-                                "message": f"Игрок {winner_sid} победил!"
-                            }
-                        },
-                        game_id
-                    )
+    if msg_type == WSMessageType.START_GAME:
+        # Начало игры
+        state = await game_engine.start_game(game_id, player_id)
 
-                    logger.info(f"Игра {game_id} Завершена. Победитель: {winner_sid}")
-                else:
-                    # Смена хода, если промах
-                    if not hit:
-                        game.current_turn_player_id = opponent_id
-                        await db.commit()
+        await manager.broadcast_to_game(
+            {
+                "type": WSMessageType.GAME_STATE,
+                "message": "Игра начата!"
+            },
+            game_id
+        )
 
-                    # Отправка обновленного состояния
-                    await send_game_state(db, game, manager)
+        # Отправка состояния игры обоим игрокам
+        await send_game_state(state, manager)
 
-    except WebSocketDisconnect:
-        manager.disconnect(game_id, player_id)
-        logger.info(f"Игрок {player_id} отключен от игры {game_id}")
+        await play_bot_turns(game_id)
 
-    except Exception as e:
-        logger.error(f"WebSocket error: {e}")
-        manager.disconnect(game_id, player_id)
+    elif msg_type == WSMessageType.MOVE:
+        # Обработка хода
+        try:
+            move_data = MoveMessage.model_validate(message.get("data"))
+        except ValidationError:
+            raise ProtocolError("Некорректный ход: ожидались целые координаты x и y")
 
-    finally:
-        await db.close()
+        await process_move(game, player_id, move_data.x, move_data.y)
 
+        await play_bot_turns(game_id)
 
-async def send_game_state(db: AsyncSession, game: Game, manager: ConnectionManager):
-    """Отправка текущего состояния игры всем игрокам"""
+    elif msg_type == WSMessageType.RESYNC:
+        # Клиент пропустил ход: полное состояние заново
+        state = await game_engine.get(game_id)
 
-    # Получение досок
-    game_board_repo = GameBoardRepository(session=db)
-    boards = await game_board_repo.list(GameBoard.game_id == game.id)
+        # Игра могла быть удалена после подключения: игрок получит ERROR, соединение останется открытым
+        if state is None:
+            raise GameEngineError("Игра не найдена")
 
-    for board in boards:
-        player_id = game.player1.sid if board.player_id == game.player1_id else game.player2.sid
-        opponent_board = next(b for b in boards if b.player_id != board.player_id)
+        await send_game_state(state, manager, player_id)
+
+
+async def process_move(game: GameContext, player_id: uuid.UUID, x: int, y: int) -> MoveResult:
+    """
+        Применение хода и рассылка его результата игрокам (общий путь для игроков и бота)
+
+        :param game:      Игра (идентификатор и игроки)
+        :param player_id: Идентификатор игрока, совершающего ход
+        :param x:         Координата X выстрела
+        :param y:         Координата Y выстрела
+
+        :return: Результат хода
+    """
+
+    move = await game_engine.apply_move(game.game_id, player_id, x, y)
+
+    # Изображения с обстрелянной доской обновляются на одну клетку
+    image_cache.apply_shot(game.game_id, player_id, game.opponent_id(player_id), move.seq, x, y, move.hit)
+
+    # Изменение одним ходом вместо полного состояния, одно сообщение на обоих игроков
+    await send_game_delta(game, x, y, move, manager)
+
+    if move.winner_id:
+        image_cache.finish(game.game_id)
+
+        winner_sid = str(move.winner_id)
+
+        await manager.broadcast_to_game(
+            {
+                "type": WSMessageType.GAME_OVER,
+                "data": {
+                    "winner_id": winner_sid,
+                    "message": f"Игрок {winner_sid} победил!"
+                }
+            },
+            str(game.game_id)
+        )
+
+    return move
+
+
+async def play_bot_turns(game_id: str):
+    """
+        Ходы бота, пока очередь за ним (при попадании бот ходит снова)
+
+        :param game_id: Идентификатор игры
+    """
+
+    game = await game_engine.get(game_id)
+
+    if not game or not game.bot_id or game.status != GameStatus.IN_PROGRESS:
+        return
+
+    # Состояние в памяти движок обновляет ходом сам, очередь хода и победитель приходят в результате хода
+    turn_player_id = game.turn_player_id
+
+    while turn_player_id == game.bot_id:
+        target = game.boards[game.opponent_id(game.bot_id)]
+        x, y = choose_shot(target.board, target.shots, target.ship_hits, bot_rng)
+
+        move = await process_move(game.context, game.bot_id, x, y)
+
+        if move.winner_id:
+            break
+
+        turn_player_id = move.turn_player_id
+
+
+async def send_game_state(game: GameState, manager: ConnectionManager, player_id: Optional[uuid.UUID] = None):
+    """
+        Отправка полного состояния игры из памяти движка
+
+        :param game:      Игра
+        :param manager:   Менеджер соединений
+        :param player_id: Игрок, которому нужно состояние (None - всем игрокам)
+    """
+
+    game_sid = str(game.game_id)
+    turn_player_sid = str(game.turn_player_id) if game.turn_player_id else None
+
+    for board_player_id, board in game.boards.items():
+        if player_id is not None and board_player_id != player_id:
+            continue
+
+        opponent_board = game.boards[game.opponent_id(board_player_id)]
 
         # Создание состояния игры для игрока
         state = GameStateMessage(
-            game_id=game.id,
-            turn_player_id=game.player1.sid if game.turn_player_id == game.player1_id else game.player2.sid,
-            your_board=board.board_state,
-            opponent_shots=board.shots_record,
-            your_shots=opponent_board.shots_record,
+            game_id=game_sid,
+            seq=game.seq,
+            turn_player_id=turn_player_sid,
+            your_board=board.board,
+            opponent_shots=board.shots,
+            your_shots=opponent_board.shots,
             ships_remaining=board.ships_remaining,
             opponent_ships_remaining=opponent_board.ships_remaining
         )
@@ -241,11 +283,39 @@ async def send_game_state(db: AsyncSession, game: Game, manager: ConnectionManag
                 "type": WSMessageType.GAME_STATE,
                 "data": state.model_dump()
             },
-            game.id,
-            player_id
+            game_sid,
+            str(board_player_id),
+            coalesce_key=WSMessageType.GAME_STATE
         )
 
 
+async def send_game_delta(game: GameContext, x: int, y: int, move: MoveResult, manager: ConnectionManager):
+    """
+        Отправка изменения игры одним ходом обоим игрокам
+
+        :param game:    Игра
+        :param x:       Координата X выстрела
+        :param y:       Координата Y выстрела
+        :param move:    Результат хода
+        :param manager: Менеджер соединений
+    """
+
+    delta = GameDeltaMessage(
+        seq=move.seq,
+        cell=(x, y),
+        result=ShotResult.SUNK if move.sunk else ShotResult.HIT if move.hit else ShotResult.MISS,
+        sunk_ship_cells=list(move.sunk_cells),
+        turn=str(move.turn_player_id) if move.turn_player_id else None
+    )
+
+    await manager.broadcast_to_game(
+        {
+            "type": WSMessageType.GAME_DELTA,
+            "data": delta.model_dump()
+        },
+        str(game.game_id)
+    )
+
 __all__ = [
     'ws_router'
 ]
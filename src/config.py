@@ -13,6 +13,43 @@ class Config(BaseSettings):
     SECRET_KEY: str
     ALGORITHM:  str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
+    TOKEN_CACHE_SIZE:     int = 10000
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL:  float = 60.0
+
+    # Password hashing
+    PASSWORD_BCRYPT_ROUNDS:    int = 12
+    PASSWORD_HASH_WORKERS:     int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    PASSWORD_HASH_RETRY_AFTER: int = 1
+
+    # Board
+    MIN_BOARD_SIZE: int = 5
+    MAX_BOARD_SIZE: int = 50
+
+    # Board pool
+    BOARD_POOL_SIZE:      int = 256
+    BOARD_POOL_LOW_WATER: int = 64
+    BOARD_CACHE_SIZE:     int = 4096
+
+    # Game engine
+    GAME_ENGINE:         str = "memory"
+    GAME_FLUSH_INTERVAL: float = 1.0
+    GAME_IDLE_TIMEOUT:   int = 1800
+
+    # WebSocket
+    WS_SEND_QUEUE_SIZE: int = 64
+    WS_SEND_TIMEOUT:    float = 5.0
+    BROADCAST_BACKEND:  str = "local"
+    BROADCAST_CHANNEL:  str = "battleship"
+
+    # Board images
+    IMAGE_CACHE_MAX_BYTES:    int = 32 * 1024 * 1024
+    IMAGE_CACHE_IDLE_TIMEOUT: int = 600
+    IMAGE_RENDER_EXECUTOR:    str = "process"
+    IMAGE_RENDER_WORKERS:     int = 2
+    IMAGE_RENDER_MAX_PENDING: int = 16
+    IMAGE_RENDER_RETRY_AFTER: int = 1
 
     @property
     def database_url(self) -> str:
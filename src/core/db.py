@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 from contextlib import asynccontextmanager
-from typing import Optional, AsyncGenerator, Any
+from typing import Optional, AsyncGenerator, Any, Dict
+from sqlalchemy import event
 from sqlalchemy.pool import NullPool
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, AsyncEngine, async_sessionmaker
 from advanced_alchemy.config import AsyncSessionConfig, SQLAlchemyAsyncConfig
@@ -18,6 +19,11 @@ class DatabaseClient(metaclass=SingletonMeta):
         self._async_session_factory: Optional[async_sessionmaker] = None
         self._sqlalchemy_config:     Optional[SQLAlchemyAsyncConfig] = None
 
+        # Метрики подключений
+        self._in_use     = 0
+        self._max_in_use = 0
+        self._checkouts  = 0
+
     @property
     def engine(self) -> AsyncEngine:
         if not self._engine:
@@ -39,18 +45,25 @@ class DatabaseClient(metaclass=SingletonMeta):
 
         return self._sqlalchemy_config
 
-    async def initialize(self):
+    async def initialize(self, url: Optional[str] = None):
         """
         Инициализация подключения к базе данных
+
+        :param url: Адрес базы данных (по умолчанию - из настроек приложения)
         """
 
+        url = url or config.database_url
+
         self._engine = create_async_engine(
-            config.database_url,
+            url,
             echo=False,
             poolclass=NullPool,
             pool_pre_ping=True
         )
 
+        event.listen(self._engine.sync_engine, "checkout", self._on_checkout)
+        event.listen(self._engine.sync_engine, "checkin", self._on_checkin)
+
         self._async_session_factory = async_sessionmaker(
             bind=self._engine,
             expire_on_commit=False,
@@ -64,7 +77,7 @@ class DatabaseClient(metaclass=SingletonMeta):
         )
 
         self._sqlalchemy_config = SQLAlchemyAsyncConfig(
-            connection_string=config.database_url,
+            connection_string=url,
             session_config=session_config
         )
 
@@ -98,10 +111,31 @@ class DatabaseClient(metaclass=SingletonMeta):
             await self.initialize()
 
         from src.db.models import UUIDBase
+        from src.db import functions  # регистрация хранимых функций
 
         async with self._engine.begin() as conn:
             await conn.run_sync(UUIDBase.metadata.create_all)
 
+    @property
+    def metrics(self) -> Dict[str, int]:
+        """
+            Метрики подключений: занятые сейчас (с NullPool - открытые), наибольшее число и всего выдано
+        """
+
+        return {
+            "connections_in_use":     self._in_use,
+            "max_connections_in_use": self._max_in_use,
+            "checkouts":              self._checkouts
+        }
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self._in_use += 1
+        self._max_in_use = max(self._max_in_use, self._in_use)
+        self._checkouts += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        self._in_use -= 1
+
     async def stop(self):
         """
         Закрытие подключения к базе данных
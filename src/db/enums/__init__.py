@@ -1,6 +1,8 @@
 from .game_status import GameStatus
+from .shot_result import ShotResult
 
 
 __all__ = [
-    'GameStatus'
+    'GameStatus',
+    'ShotResult'
 ]
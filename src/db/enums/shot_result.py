@@ -0,0 +1,14 @@
+from enum import Enum
+
+
+class ShotResult(str, Enum):
+    """ Перечисление результатов выстрела. """
+
+    MISS = "miss"
+    HIT = "hit"
+    SUNK = "sunk"
+
+
+__all__ = [
+    'ShotResult'
+]
@@ -0,0 +1,8 @@
+from .apply_move import APPLY_MOVE_SQL, apply_move_function, drop_apply_move_function
+
+
+__all__ = [
+    'APPLY_MOVE_SQL',
+    'apply_move_function',
+    'drop_apply_move_function'
+]
@@ -0,0 +1,156 @@
+from sqlalchemy import DDL, event, text
+
+from src.db.models import UUIDBase
+
+
+# CREATE OR REPLACE не может изменить тип результата функции: версия без OUT seq удаляется
+drop_apply_move_function = DDL("""
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_proc
+         WHERE proname = 'battleship_apply_move' AND NOT ('seq' = ANY(proargnames))
+    ) THEN
+        DROP FUNCTION battleship_apply_move(uuid, uuid, integer, integer, integer[]);
+    END IF;
+END
+$$
+""")
+
+apply_move_function = DDL("""
+CREATE OR REPLACE FUNCTION battleship_apply_move(
+    p_game_id        uuid,
+    p_player_id      uuid,
+    p_x              integer,
+    p_y              integer,
+    p_ship_cells     integer[],
+    OUT error           text,
+    OUT hit             boolean,
+    OUT sunk            boolean,
+    OUT ships_remaining integer,
+    OUT winner_id       uuid,
+    OUT turn_player_id  uuid,
+    OUT seq             integer
+)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+DECLARE
+    v_game      record;
+    v_opponent  uuid;
+    v_board_id  uuid;
+    v_size      integer;
+    v_remaining integer;
+    v_seq       integer;
+    v_hits      integer;
+    v_hit       boolean;
+    v_sunk      boolean := false;
+BEGIN
+    -- Блокировка строки игры сериализует конкурентные ходы в одной игре
+    SELECT * INTO v_game FROM games WHERE id = p_game_id FOR UPDATE;
+
+    IF NOT FOUND THEN
+        error := 'not_found';
+        RETURN;
+    END IF;
+
+    IF v_game.status <> 'IN_PROGRESS' THEN
+        error := 'not_in_progress';
+        RETURN;
+    END IF;
+
+    IF v_game.turn_player_id IS DISTINCT FROM p_player_id THEN
+        error := 'not_your_turn';
+        RETURN;
+    END IF;
+
+    v_opponent := CASE WHEN v_game.player1_id = p_player_id THEN v_game.player2_id ELSE v_game.player1_id END;
+
+    SELECT id, board_size, ships_remaining
+      INTO v_board_id, v_size, v_remaining
+      FROM game_boards
+     WHERE game_id = p_game_id AND player_id = v_opponent;
+
+    -- Клетка должна существовать и ещё не быть обстрелянной
+    IF p_x < 0 OR p_x >= v_size OR p_y < 0 OR p_y >= v_size
+       OR EXISTS (
+           SELECT 1 FROM moves
+            WHERE game_id = p_game_id AND shooter_id = p_player_id AND x = p_x AND y = p_y
+       ) THEN
+        error := 'invalid_cell';
+        RETURN;
+    END IF;
+
+    -- p_ship_cells - клетки корабля под выстрелом [x1, y1, x2, y2, ...], пустой массив при промахе.
+    -- Корабль потоплен, если остальные его клетки уже обстреляны
+    v_hit := cardinality(p_ship_cells) > 0;
+
+    IF v_hit THEN
+        SELECT count(*) INTO v_hits
+          FROM moves
+         WHERE game_id = p_game_id
+           AND shooter_id = p_player_id
+           AND (x, y) IN (
+               SELECT p_ship_cells[i], p_ship_cells[i + 1]
+                 FROM generate_series(1, cardinality(p_ship_cells), 2) AS i
+           );
+
+        v_sunk := v_hits = cardinality(p_ship_cells) / 2 - 1;
+    END IF;
+
+    SELECT coalesce(max(seq), 0) + 1 INTO v_seq FROM moves WHERE game_id = p_game_id;
+
+    INSERT INTO moves (game_id, seq, shooter_id, x, y, result)
+    VALUES (
+        p_game_id, v_seq, p_player_id, p_x, p_y,
+        (CASE WHEN v_sunk THEN 'SUNK' WHEN v_hit THEN 'HIT' ELSE 'MISS' END)::shotresult
+    );
+
+    IF v_sunk THEN
+        v_remaining := v_remaining - 1;
+
+        UPDATE game_boards
+           SET ships_remaining = v_remaining, updated_at = now()
+         WHERE id = v_board_id;
+    END IF;
+
+    hit := v_hit;
+    sunk := v_sunk;
+    seq := v_seq;
+    ships_remaining := v_remaining;
+    turn_player_id := p_player_id;
+
+    IF v_remaining = 0 THEN
+        winner_id := p_player_id;
+
+        UPDATE games
+           SET status = 'FINISHED', winner_id = p_player_id, finished_at = now(), updated_at = now()
+         WHERE id = p_game_id;
+
+    ELSIF NOT v_hit THEN
+        -- Ход переходит к противнику при промахе
+        turn_player_id := v_opponent;
+
+        UPDATE games
+           SET turn_player_id = v_opponent, updated_at = now()
+         WHERE id = p_game_id;
+    END IF;
+END;
+$$
+""")
+
+# Функция создаётся (и обновляется) вместе с таблицами
+event.listen(UUIDBase.metadata, "after_create", drop_apply_move_function)
+event.listen(UUIDBase.metadata, "after_create", apply_move_function)
+
+
+APPLY_MOVE_SQL = text(
+    "SELECT * FROM battleship_apply_move(:game_id, :player_id, :x, :y, CAST(:ship_cells AS integer[]))"
+)
+
+
+__all__ = [
+    'APPLY_MOVE_SQL',
+    'apply_move_function',
+    'drop_apply_move_function'
+]
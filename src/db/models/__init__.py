@@ -1,14 +1,17 @@
-from .base_model import UUIDBase
+from .base_model import UUIDBase, DefaultBase
 
 from .player import Player
 from .game import Game
 from .game_board import GameBoard
+from .move import Move
 
 
 __all__ = [
     'UUIDBase',
+    'DefaultBase',
 
     'Player',
     'Game',
-    'GameBoard'
+    'GameBoard',
+    'Move'
 ]
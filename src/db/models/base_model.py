@@ -1,6 +1,7 @@
-from advanced_alchemy.base import UUIDAuditBase as UUIDBase
+from advanced_alchemy.base import UUIDAuditBase as UUIDBase, DefaultBase
 
 
 __all__ = [
-    'UUIDBase'
+    'UUIDBase',
+    'DefaultBase'
 ]
@@ -32,6 +32,7 @@ class Game(UUIDBase):
             - player2:         второй игрок (связь с таблицей игроков)
             - turn_player:     игрок, чей сейчас ход (связь с таблицей игроков)
             - winner:          победитель игры (связь с таблицей игроков)
+            - moves:           журнал ходов игры (связь с таблицей ходов)
     """
 
     __tablename__ = "games"
@@ -53,6 +54,7 @@ class Game(UUIDBase):
     winner:         Mapped["Player"] = relationship("Player", foreign_keys=[winner_id])
 
     game_boards = relationship("GameBoard", back_populates="game", cascade="all, delete-orphan")
+    moves       = relationship("Move", order_by="Move.seq", cascade="all, delete-orphan")
 
     def __repr__(self):
         return f"<Game(sid={self.id}, status={self.status})>"
@@ -1,12 +1,15 @@
 from __future__ import annotations
 
 from datetime import datetime
+from typing import List
 from uuid import UUID as UUIDType
-from sqlalchemy import ForeignKey, Index, Integer
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy import BigInteger, ForeignKey, Index, Integer, SmallInteger
+from sqlalchemy.dialects.postgresql import UUID, ARRAY
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
-from src.db.schemas import TShotsRecord, TGameBoardState
+from src.db.schemas import TGameBoardState
+from src.services.board_generator import BOARD_SEED_VERSION, BOARD_SIZE, SHIPS, generate_board_from_seed
+from src.services.ship_index import ShipIndex, get_ship_index
 
 from .base_model import UUIDBase
 
@@ -19,9 +22,12 @@ class GameBoard(UUIDBase):
             - id:              уникальный идентификатор игровой доски (UUID)
             - game_id:         идентификатор игры (UUID)
             - player_id:       идентификатор игрока (UUID)
-            - board_state:     состояние игровой доски (JSONB)
-            - shots_record:    запись выстрелов (JSONB)
-            - ships_remaining: количество оставшихся кораблей у игрока (Integer)
+            - board_seed:      64-битное зерно, из которого строится расстановка кораблей (BigInteger)
+            - board_version:   версия алгоритма построения доски из зерна (SmallInteger)
+            - board_size:      размер стороны доски (SmallInteger)
+            - fleet:           размеры кораблей флота в порядке их номеров (ARRAY[SmallInteger])
+            - ships_remaining: количество оставшихся кораблей у игрока (Integer),
+                               меняется только при потоплении корабля
             - created_at:      дата и время создания записи (из UUIDBase)
             - updated_at:      дата и время последнего обновления записи (из UUIDBase)
 
@@ -29,15 +35,15 @@ class GameBoard(UUIDBase):
             - game:            игра, связанная с игровой доской
             - player:          игрок, связанный с игровой доской
 
+        Вычисляемые поля:
+            - board_state:     состояние игровой доски, строится из board_seed и запоминается
+            - ship_index:      клетки каждого корабля, строится один раз на расстановку
+
+        Выстрелы по доске хранятся в журнале ходов (таблица moves).
+
         Индексы:
             - ix_game_boards_game_id_player_id: уникальный индекс по колонкам game_id
                 и player_id для обеспечения уникальности игровой доски на игрока в игре
-
-            - idx_game_boards_board_state: GIN-индекс по колонке board_state для
-                оптимизации запросов, связанных с состоянием игровой доски
-
-            - idx_game_boards_shots_record: GIN-индекс по колонке shots_record для
-                оптимизации запросов, связанных с записью выстрелов
     """
 
     __tablename__ = "game_boards"
@@ -45,8 +51,10 @@ class GameBoard(UUIDBase):
     game_id:         Mapped[UUIDType] = mapped_column(UUID(as_uuid=True), ForeignKey("games.id"), nullable=False)
     player_id:       Mapped[UUIDType] = mapped_column(UUID(as_uuid=True), ForeignKey("players.id"), nullable=False)
 
-    board_state:     Mapped[TGameBoardState] = mapped_column(JSONB, nullable=False)
-    shots_record:    Mapped[TShotsRecord] = mapped_column(JSONB, nullable=False)
+    board_seed:      Mapped[int] = mapped_column(BigInteger, nullable=False)
+    board_version:   Mapped[int] = mapped_column(SmallInteger, default=BOARD_SEED_VERSION, nullable=False)
+    board_size:      Mapped[int] = mapped_column(SmallInteger, default=BOARD_SIZE, nullable=False)
+    fleet:           Mapped[List[int]] = mapped_column(ARRAY(SmallInteger), default=lambda: list(SHIPS), nullable=False)
     ships_remaining: Mapped[int] = mapped_column(Integer, default=10, nullable=False)
 
     game:   Mapped["Game"] = relationship("Game", back_populates="game_boards")
@@ -54,10 +62,16 @@ class GameBoard(UUIDBase):
 
     __table_args__ = (
         Index('ix_game_boards_game_id_player_id', 'game_id', 'player_id', unique=True),
-        Index('idx_game_boards_board_state', 'board_state', postgresql_using='gin'),
-        Index('idx_game_boards_shots_record', 'shots_record', postgresql_using='gin'),
     )
 
+    @property
+    def board_state(self) -> TGameBoardState:
+        return generate_board_from_seed(self.board_seed, self.board_version, self.board_size, tuple(self.fleet))
+
+    @property
+    def ship_index(self) -> ShipIndex:
+        return get_ship_index(self.board_seed, self.board_version, self.board_size, tuple(self.fleet))
+
     def __repr__(self):
         return f"<GameBoard(game_id={self.game_id}, player_id={self.player_id})>"
 
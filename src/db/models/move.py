@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from datetime import datetime
+from uuid import UUID as UUIDType
+from sqlalchemy import DateTime, Enum, ForeignKey, Index, Integer, SmallInteger, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.db.enums import ShotResult
+
+from .base_model import DefaultBase
+
+
+class Move(DefaultBase):
+    """
+        Журнал ходов (только добавление записей).
+
+        Источник истины для выстрелов: запись выстрелов по доске игрока строится
+        из ходов его противника, поэтому ход - это одна короткая вставка вместо
+        перезаписи JSONB-документа доски.
+
+        Колонки:
+            - game_id:    идентификатор игры (UUID)
+            - seq:        порядковый номер хода в игре, начиная с 1 (Integer)
+            - shooter_id: идентификатор стрелявшего игрока (UUID)
+            - x:          координата X выстрела (SmallInteger)
+            - y:          координата Y выстрела (SmallInteger)
+            - result:     результат выстрела (Enum: MISS, HIT, SUNK)
+            - ts:         дата и время хода
+
+        Индексы:
+            - первичный ключ (game_id, seq): порядок ходов внутри игры
+
+            - ix_moves_game_id_shooter_id_x_y: уникальный индекс, запрещающий
+                повторный выстрел игрока по одной клетке
+    """
+
+    __tablename__ = "moves"
+
+    game_id:    Mapped[UUIDType] = mapped_column(UUID(as_uuid=True), ForeignKey("games.id"), primary_key=True)
+    seq:        Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    shooter_id: Mapped[UUIDType] = mapped_column(UUID(as_uuid=True), ForeignKey("players.id"), nullable=False)
+    x:          Mapped[int] = mapped_column(SmallInteger, nullable=False)
+    y:          Mapped[int] = mapped_column(SmallInteger, nullable=False)
+    result:     Mapped[ShotResult] = mapped_column(Enum(ShotResult), nullable=False)
+    ts:         Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index('ix_moves_game_id_shooter_id_x_y', 'game_id', 'shooter_id', 'x', 'y', unique=True),
+    )
+
+    def __repr__(self):
+        return f"<Move(game_id={self.game_id}, seq={self.seq}, x={self.x}, y={self.y}, result={self.result})>"
+
+
+__all__ = [
+    'Move'
+]
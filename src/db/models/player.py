@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from sqlalchemy import String
+from sqlalchemy import Boolean, String, false
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
 from .base_model import UUIDBase
@@ -14,6 +14,7 @@ class Player(UUIDBase):
             - id:              уникальный идентификатор игрока (UUID)
             - username:        уникальное имя пользователя
             - hashed_password: хешированный пароль пользователя
+            - is_bot:          встроенный бот-противник (ходит на сервере, войти под ним нельзя)
             - created_at:      дата и время создания записи (из UUIDBase)
             - updated_at:      дата и время последнего обновления записи (из UUIDBase)
 
@@ -27,6 +28,7 @@ class Player(UUIDBase):
 
     username:         Mapped[str] = mapped_column(String(128), unique=True, index=True, nullable=False)
     hashed_password:  Mapped[str] = mapped_column(String(128), nullable=False)
+    is_bot:           Mapped[bool] = mapped_column(Boolean, default=False, server_default=false(), nullable=False)
 
     games_as_player1: Mapped["Game"] = relationship("Game", foreign_keys="Game.player1_id", back_populates="player1")
     games_as_player2: Mapped["Game"] = relationship("Game", foreign_keys="Game.player2_id", back_populates="player2")
@@ -2,9 +2,10 @@ from __future__ import annotations
 
 from uuid import UUID
 from datetime import datetime
-from pydantic import BaseModel, field_serializer
+from pydantic import BaseModel, Field, field_serializer, model_validator
 from typing import List, Optional
 
+from src import config
 from src.db.enums import GameStatus
 from src.db.schemas import PlayerBoardSchema, GameBoardSchema
 
@@ -35,10 +36,24 @@ class GameSchema(BaseModel):
 
 
 class GameCreateSchema(BaseModel):
-    """ Модель для создания игры """
+    """
+        Модель для создания игры.
+        Без board_size и fleet создаётся классическая игра 10x10.
+        С bot=True вторым игроком становится встроенный бот (player2_id не передаётся).
+    """
 
     player1_id: UUID
-    player2_id: UUID
+    player2_id: Optional[UUID] = None
+    bot:        bool = False
+    board_size: int = Field(10, ge=config.MIN_BOARD_SIZE, le=config.MAX_BOARD_SIZE)
+    fleet:      Optional[List[int]] = Field(None, min_length=1, max_length=1000)
+
+    @model_validator(mode='after')
+    def _check_opponent(self) -> 'GameCreateSchema':
+        if self.bot == (self.player2_id is not None):
+            raise ValueError("Нужно указать либо player2_id, либо bot=true")
+
+        return self
 
     @field_serializer('player1_id', 'player2_id')
     def _serialize_uuid(self, value: UUID | None) -> UUID | None:
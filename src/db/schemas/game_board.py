@@ -6,8 +6,8 @@ from typing import List, Literal, Optional
 
 """
 Типы для представления состояния игровой доски
-    0     - пустая клетка 
-    1 - 4 - клетка с кораблем (число обозначает размер корабля)
+    0     - пустая клетка
+    1 - N - клетка с кораблем (число обозначает номер корабля во флоте)
     -1    - промах
     -2    - попадание
 """
@@ -29,8 +29,11 @@ class GameBoardSchema(BaseModel):
     id:              UUID
     game_id:         UUID
     player_id:       UUID
+    board_seed:      int
+    board_version:   int
+    board_size:      int
+    fleet:           List[int]
     board_state:     TGameBoardState
-    shots_record:    TShotsRecord
     created_at:      datetime
     updated_at:      Optional[datetime]
     ships_remaining: int
@@ -14,6 +14,7 @@ class PlayerSchema(BaseModel):
 
     id:         UUID
     username:   str
+    is_bot:     bool
     created_at: datetime
     updated_at: Optional[datetime]
 
@@ -1,7 +1,8 @@
 from enum import Enum
-from typing import Optional
+from typing import List, Optional, Tuple
 from pydantic import BaseModel
 
+from src.db.enums import ShotResult
 from src.db.schemas import TGameBoardState, TShotsRecord
 
 
@@ -9,6 +10,8 @@ class WSMessageType(str, Enum):
     START_GAME = "start_game"
     MOVE = "move"
     GAME_STATE = "game_state"
+    GAME_DELTA = "game_delta"
+    RESYNC = "resync"
     GAME_OVER = "game_over"
     ERROR = "error"
     CONNECTED = "connected"
@@ -20,8 +23,11 @@ class MoveMessage(BaseModel):
 
 
 class GameStateMessage(BaseModel):
+    """ Полное состояние игры для игрока на момент хода seq """
+
     game_id:         str
-    turn_player_id:  str
+    seq:             int
+    turn_player_id:  Optional[str]
     your_board:      TGameBoardState
     opponent_shots:  TShotsRecord
     your_shots:      TShotsRecord
@@ -29,6 +35,21 @@ class GameStateMessage(BaseModel):
     opponent_ships_remaining: int
 
 
+class GameDeltaMessage(BaseModel):
+    """
+        Изменение игры одним ходом (одинаковое для обоих игроков).
+        Стрелял игрок, чей ход был в состоянии seq - 1, turn - чей ход теперь.
+        Ходы идут подряд: клиент применяет ход seq поверх состояния seq - 1,
+        пропускает уже известные и при пропуске хода запрашивает resync
+    """
+
+    seq:             int
+    cell:            Tuple[int, int]
+    result:          ShotResult
+    sunk_ship_cells: List[Tuple[int, int]]
+    turn:            Optional[str]
+
+
 class WSMessage(BaseModel):
     type:    WSMessageType
     data:    Optional[dict] = None
@@ -39,5 +60,6 @@ __all__ = [
     'WSMessageType',
     'MoveMessage',
     'GameStateMessage',
+    'GameDeltaMessage',
     'WSMessage'
 ]
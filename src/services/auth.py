@@ -1,28 +1,67 @@
 import jwt
+import hmac
+import bcrypt
 import hashlib
-import secrets
 
 from datetime import datetime, timedelta
-from passlib.context import CryptContext
+from typing import Optional
 
 from src import config, logger
 
+from .token_cache import token_cache
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# bcrypt учитывает только первые 72 байта пароля
+BCRYPT_MAX_PASSWORD_BYTES = 72
+
+
+def _password_bytes(password: str) -> bytes:
+    return password.encode()[:BCRYPT_MAX_PASSWORD_BYTES]
+
+
+def _bcrypt_rounds(hashed_password: str) -> Optional[int]:
+    """Стоимость bcrypt-хеша или None, если хеш не bcrypt ($2b$12$...)"""
+    parts = hashed_password.split("$")
+
+    if len(parts) != 4 or not parts[1].startswith("2") or not parts[2].isdigit():
+        return None
+
+    return int(parts[2])
+
+
+def is_bcrypt_hash(hashed_password: str) -> bool:
+    """Хеш пароля в формате bcrypt"""
+    return _bcrypt_rounds(hashed_password) is not None
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Проверка пароля"""
-    salt, hashed = hashed_password.split(":")
+    """
+        Проверка пароля.
+        Поддерживаются bcrypt-хеши и прежние хеши вида salt:sha256,
+        любые другие значения (например, у бота) не подходят ни к какому паролю
+    """
+    if is_bcrypt_hash(hashed_password):
+        try:
+            return bcrypt.checkpw(_password_bytes(plain_password), hashed_password.encode())
+        except ValueError:
+            return False
 
-    return hashed == hashlib.sha256((plain_password + salt).encode()).hexdigest()
+    salt, separator, hashed = hashed_password.partition(":")
+
+    if not separator or len(hashed) != 64:
+        return False
+
+    return hmac.compare_digest(hashed, hashlib.sha256((plain_password + salt).encode()).hexdigest())
 
 def get_password_hash(password: str) -> str:
-    """Хеширование пароля"""
-    salt = secrets.token_hex(16)
-    hashed_password = hashlib.sha256((password + salt).encode()).hexdigest()
+    """Хеширование пароля (bcrypt со стоимостью PASSWORD_BCRYPT_ROUNDS)"""
+    salt = bcrypt.gensalt(rounds=config.PASSWORD_BCRYPT_ROUNDS)
+
+    return bcrypt.hashpw(_password_bytes(password), salt).decode()
 
-    return f'{salt}:{hashed_password}'
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Хеш нужно пересчитать: прежний salt:sha256 или bcrypt с другой стоимостью"""
+    return _bcrypt_rounds(hashed_password) != config.PASSWORD_BCRYPT_ROUNDS
 
 
 def create_access_token(data: dict) -> str:
@@ -45,22 +84,35 @@ def create_access_token(data: dict) -> str:
 
 
 def decode_access_token(token: str) -> dict:
-    """Декодирование JWT токена"""
+    """
+        Декодирование JWT токена.
+        Уже проверенный токен берётся из кеша до истечения exp
+    """
+    payload = token_cache.get(token)
+
+    if payload is not None:
+        return payload
+
     try:
         payload = jwt.decode(
             token,
             config.SECRET_KEY,
             algorithms=[config.ALGORITHM]
         )
-        return payload
     except Exception as e:
         logger.error(f"Ошибка чтения JWT токена: {e}")
         raise
 
+    token_cache.put(token, payload)
+
+    return payload
+
 
 __all__ = [
     'verify_password',
     'get_password_hash',
+    'password_needs_rehash',
+    'is_bcrypt_hash',
     'create_access_token',
     'decode_access_token',
 ]
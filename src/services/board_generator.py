@@ -1,122 +1,649 @@
 import random
+import secrets
+import numpy as np
 
-from src import logger
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from src import config, logger
 from src.db.schemas import TGameBoardState
 
 
 BOARD_SIZE = 10
 SHIPS = [4, 3, 3, 2, 2, 2, 1, 1, 1, 1]
 
+# Версия алгоритма построения доски из зерна.
+# Должна увеличиваться при любом изменении, меняющем доску для того же зерна:
+#   1 - при тупике флот размещается заново с первого корабля
+#   2 - при тупике выполняется откат к предыдущему кораблю
+BOARD_SEED_VERSION = 2
+
+# Ограничение количества шагов поиска с откатом до перезапуска размещения
+_SEARCH_STEPS_PER_SHIP = 64
+_SEARCH_RESTARTS = 8
+
 
-def _can_place_ship(
-    board:     TGameBoardState,
-    x:         int,
-    y:         int,
-    size:      int,
-    direction: int,
-) -> bool:
+class ShipPlacement(NamedTuple):
     """
-        Проверка возможности размещения корабля.
-        Корабли не должны соприкасаться даже углами.
+        Предрассчитанное размещение корабля на битборде.
 
-        :param board:      Игровая доска
-        :param x:          Координата X начальной точки
-        :param y:          Координата Y начальной точки
-        :param size:       Размер корабля
-        :param direction:  Направление (0 - горизонтально, 1 - вертикально)
-        :return:           True, если корабль можно разместить, иначе False
-    """
-    # Проверка самого корабля и окружающих клеток
-    for i in range(size):
-        if direction == 0:  # Горизонтально
-            check_x, check_y = x + i, y
-        else:  # Вертикально
-            check_x, check_y = x, y + i
-
-        # Проверка клетки и всех соседних (8 направлений + сама клетка)
-        for dx in [-1, 0, 1]:
-            for dy in [-1, 0, 1]:
-                nx, ny = check_x + dx, check_y + dy
-
-                if 0 <= nx < BOARD_SIZE and 0 <= ny < BOARD_SIZE:
-                    if board[ny][nx] != 0:
-                        return False
-
-    return True
-
-
-def _place_ship(
-    board:     TGameBoardState,
-    x:         int,
-    y:         int,
-    size:      int,
-    direction: int,
-    ship_id:   int
-):
+        Клетка (x, y) соответствует биту с номером y * board_size + x.
+
+        - x, y:       координаты начальной точки
+        - direction:  направление (0 - горизонтально, 1 - вертикально)
+        - mask:       битовая маска клеток корабля
+        - halo:       битовая маска клеток корабля вместе со всеми соседними
+        - cells:      номера клеток корабля (y * board_size + x)
+        - halo_cells: номера клеток корабля и всех соседних
     """
-        Размещение корабля на доске
 
-        :param board:      Игровая доска
-        :param x:          Координата X начальной точки
-        :param y:          Координата Y начальной точки
+    x:          int
+    y:          int
+    direction:  int
+    mask:       int
+    halo:       int
+    cells:      Tuple[int, ...]
+    halo_cells: Tuple[int, ...]
+
+
+def _build_placements(board_size: int, size: int) -> List[ShipPlacement]:
+    """
+        Построение всех возможных размещений корабля заданного размера.
+
+        :param board_size: Размер доски
         :param size:       Размер корабля
-        :param direction:  Направление (0 - горизонтально, 1 - вертикально)
-        :param ship_id:    Идентификатор корабля
+        :return:           Список размещений с масками корабля и его окружения
+    """
+
+    placements = []
+
+    # Для однопалубного корабля оба направления дают одно и то же размещение
+    directions = (0,) if size == 1 else (0, 1)
+
+    for direction in directions:
+        dx, dy = (1, 0) if direction == 0 else (0, 1)
+
+        for y in range(board_size - dy * (size - 1)):
+            for x in range(board_size - dx * (size - 1)):
+                cells = tuple((y + dy * i) * board_size + x + dx * i for i in range(size))
+                halo_cells = set()
+                mask = 0
+
+                for cell in cells:
+                    cx, cy = cell % board_size, cell // board_size
+                    mask |= 1 << cell
+
+                    # Клетка и все соседние (8 направлений + сама клетка)
+                    for nx in range(max(cx - 1, 0), min(cx + 2, board_size)):
+                        for ny in range(max(cy - 1, 0), min(cy + 2, board_size)):
+                            halo_cells.add(ny * board_size + nx)
+
+                halo = 0
+
+                for cell in halo_cells:
+                    halo |= 1 << cell
+
+                placements.append(ShipPlacement(x, y, direction, mask, halo, cells, tuple(sorted(halo_cells))))
+
+    return placements
+
+
+class PlacementTable:
+    """
+        Предрассчитанные размещения кораблей для доски заданного размера.
+
+        Для каждого размера корабля хранятся все размещения и маски "клетка -> размещения,
+        которые её занимают" (по номерам размещений). По ним маски совместимости
+        выбранного размещения с остальными строятся за O(размер окружения)
+        и запоминаются, поэтому таблицы не растут квадратично с размером доски.
+    """
+
+    __slots__ = ('board_size', 'placements', 'all_placements', '_covers', '_compatible', '_np_cells', '_np_halos')
+
+    def __init__(self, board_size: int, sizes: Sequence[int]):
+        self.board_size = board_size
+
+        self.placements:     Dict[int, List[ShipPlacement]] = {
+            size: _build_placements(board_size, size) for size in sizes
+        }
+        self.all_placements: Dict[int, int] = {
+            size: (1 << len(placements)) - 1 for size, placements in self.placements.items()
+        }
+
+        self._covers:     Dict[int, List[int]] = {}
+        self._compatible: Dict[Tuple[int, int], Dict[int, int]] = {}
+        self._np_cells:   Dict[int, np.ndarray] = {}
+        self._np_halos:   Dict[int, np.ndarray] = {}
+
+        for size, placements in self.placements.items():
+            covers = [0] * (board_size * board_size)
+
+            for index, placement in enumerate(placements):
+                for cell in placement.cells:
+                    covers[cell] |= 1 << index
+
+            self._covers[size] = covers
+
+    def compatible(self, size: int, index: int) -> Dict[int, int]:
+        """
+            Маски размещений каждого размера, совместимых с выбранным размещением:
+            сброшены размещения, пересекающие корабль или его окружение
+
+            :param size:  Размер выбранного корабля
+            :param index: Номер выбранного размещения
+            :return:      {размер: маска совместимых размещений}
+        """
+
+        key = (size, index)
+        compatible = self._compatible.get(key)
+
+        if compatible is None:
+            halo_cells = self.placements[size][index].halo_cells
+            compatible = {}
+
+            for other_size, covers in self._covers.items():
+                conflicts = 0
+
+                for cell in halo_cells:
+                    conflicts |= covers[cell]
+
+                compatible[other_size] = ~conflicts
+
+            self._compatible[key] = compatible
+
+        return compatible
+
+    def np_cells(self, size: int) -> np.ndarray:
+        """ Номера клеток всех размещений корабля для пакетной генерации """
+
+        if size not in self._np_cells:
+            self._np_cells[size] = np.array([p.cells for p in self.placements[size]], dtype=np.intp)
+
+        return self._np_cells[size]
+
+    def np_halos(self, size: int) -> np.ndarray:
+        """
+            Номера клеток окружения всех размещений корабля для пакетной генерации.
+            Строки дополнены фиктивной клеткой с номером board_size * board_size
+        """
+
+        if size not in self._np_halos:
+            rows = [p.halo_cells for p in self.placements[size]]
+            width = max(len(row) for row in rows)
+            padding = self.board_size * self.board_size
+
+            self._np_halos[size] = np.array(
+                [row + (padding,) * (width - len(row)) for row in rows],
+                dtype=np.intp
+            )
+
+        return self._np_halos[size]
+
+
+@lru_cache(maxsize=32)
+def get_placement_table(board_size: int, sizes: Tuple[int, ...]) -> PlacementTable:
+    """
+        Таблица размещений для доски и набора размеров кораблей (строится один раз)
+
+        :param board_size: Размер доски
+        :param sizes:      Отсортированные уникальные размеры кораблей
+        :return:           Таблица размещений
+    """
+
+    return PlacementTable(board_size, sizes)
+
+
+def _table_for(board_size: int, fleet: Sequence[int]) -> PlacementTable:
+    return get_placement_table(board_size, tuple(sorted(set(fleet))))
+
+
+# Таблица стандартной доски строится при импорте
+PLACEMENTS: Dict[int, List[ShipPlacement]] = _table_for(BOARD_SIZE, SHIPS).placements
+
+_rng = random.Random()
+_BATCH_CHUNK = 2048
+
+# Наибольший размер доски, на котором пакетная генерация быстрее поиска с откатом.
+# Замер benchmarks.board_generator с флотом, пропорциональным площади (досок/с, по одной / пакетом):
+# 20x20 - 3 500 / 3 600, 22x22 - 3 500 / 3 200, 25x25 - 2 000 / 1 650, 50x50 - 290 / 94
+_BATCH_MAX_BOARD_SIZE = 20
+
+# Количество попыток пакетной генерации для досок, на которых флот не поместился,
+# после чего они строятся по одной поиском с откатом
+_BATCH_ROUNDS = 8
+
+
+def check_fleet_fits(board_size: int, fleet: Sequence[int]) -> Optional[str]:
+    """
+        Проверка, что флот гарантированно помещается на доску, до запуска поиска.
+
+        Необходимое условие: корабль размера s вместе с правой и нижней полосой
+        окружения занимает 2 * (s + 1) клеток доски, расширенной на одну строку
+        и столбец. Достаточное условие: корабли раскладываются горизонтально
+        по строкам через одну (первый подходящий, от больших к меньшим).
+        Флоты, для которых расстановка не доказана, отклоняются.
+
+        :param board_size: Размер доски
+        :param fleet:      Размеры кораблей
+        :return:           Описание проблемы или None, если флот помещается
+    """
+
+    if not fleet:
+        return "Флот не может быть пустым"
+
+    if min(fleet) < 1 or max(fleet) > board_size:
+        return f"Размер корабля должен быть от 1 до {board_size}"
+
+    if sum(2 * (size + 1) for size in fleet) > (board_size + 1) ** 2:
+        return "Флот не помещается на доску"
+
+    if _pack_rows(board_size, fleet) is None:
+        return "Для флота не найдена гарантированная расстановка"
+
+    return None
+
+
+def _pack_rows(board_size: int, fleet: Sequence[int]) -> Optional[List[Tuple[int, int]]]:
+    """
+        Детерминированная расстановка: корабли от больших к меньшим кладутся
+        горизонтально в первую подходящую строку (строки через одну, между кораблями одна клетка).
+
+        :param board_size: Размер доски
+        :param fleet:      Размеры кораблей
+        :return:           Начальные клетки (x, y) горизонтальных кораблей в порядке fleet или None
+    """
+
+    row_used = [0] * ((board_size + 1) // 2)
+    result: List[Tuple[int, int]] = [(0, 0)] * len(fleet)
+
+    for ship, size in sorted(enumerate(fleet), key=lambda item: -item[1]):
+        for row, used in enumerate(row_used):
+            if used + size <= board_size:
+                result[ship] = (used, 2 * row)
+                row_used[row] = used + size + 1
+                break
+        else:
+            return None
+
+    return result
+
+
+def _nth_set_bit(bits: int, n: int) -> int:
+    """
+        Номер n-го (с нуля) установленного бита, двоичный поиск по популяции бит
+
+        :param bits: Битовая маска
+        :param n:    Порядковый номер установленного бита
+        :return:     Номер бита
+    """
+
+    offset = 0
+    width = bits.bit_length()
+
+    while width > 1:
+        half = width >> 1
+        low = bits & ((1 << half) - 1)
+        count = low.bit_count()
+
+        if n < count:
+            bits = low
+            width = half
+        else:
+            n -= count
+            bits >>= half
+            offset += half
+            width -= half
+
+    return offset
+
+
+def _choose_legal(legal: int, total: int, rng: random.Random) -> Optional[int]:
+    """
+        Равновероятный выбор одного из допустимых размещений
+
+        :param legal: Битовая маска допустимых размещений
+        :param total: Общее количество размещений этого размера
+        :param rng:   Генератор случайных чисел
+        :return:      Номер размещения или None, если допустимых нет
+    """
+
+    count = legal.bit_count()
+
+    if not count:
+        return None
+
+    # Пока допустимых размещений много, дешевле угадать номер, чем искать n-й бит
+    if count * 4 >= total:
+        while True:
+            index = rng.randrange(total)
+
+            if legal >> index & 1:
+                return index
+
+    return _nth_set_bit(legal, rng.randrange(count))
+
+
+def _place_fleet(
+    table:     PlacementTable,
+    fleet:     Sequence[int],
+    rng:       random.Random,
+    backtrack: bool = True
+) -> Optional[List[ShipPlacement]]:
+    """
+        Размещение флота на битборде.
+        Для каждого корабля выбирается одно из допустимых размещений,
+        после чего маски допустимых размещений всех размеров сужаются
+        по маскам совместимости - без проверки соседних клеток.
+
+        Если для корабля не осталось размещений, выполняется откат:
+        у предыдущего корабля исключается выбранное размещение и выбирается другое.
+        Количество откатов ограничено, чтобы неудачное начало не приводило к полному перебору.
+
+        :param table:     Таблица размещений
+        :param fleet:     Размеры кораблей в порядке размещения
+        :param rng:       Генератор случайных чисел
+        :param backtrack: Выполнять откат (False - поведение версии 1)
+        :return:          Размещения кораблей в порядке fleet или None, если флот не поместился
+    """
+
+    # Для каждого размещённого корабля: допустимые маски до него и ещё не опробованные размещения
+    frames: List[Tuple[Dict[int, int], int]] = []
+    placed: List[ShipPlacement] = []
+
+    legal = dict(table.all_placements)
+    candidates = legal[fleet[0]]
+    backtracks = _SEARCH_STEPS_PER_SHIP * len(fleet)
+
+    while len(placed) < len(fleet):
+        ship_size = fleet[len(placed)]
+        size_placements = table.placements[ship_size]
+        index = _choose_legal(candidates, len(size_placements), rng)
+
+        if index is None:
+            backtracks -= 1
+
+            if not backtrack or not frames or backtracks <= 0:
+                return None
+
+            legal, candidates = frames.pop()
+            placed.pop()
+            continue
+
+        frames.append((legal, candidates & ~(1 << index)))
+        placed.append(size_placements[index])
+
+        legal = dict(legal)
+
+        for size, compatible in table.compatible(ship_size, index).items():
+            legal[size] &= compatible
+
+        if len(placed) < len(fleet):
+            candidates = legal[fleet[len(placed)]]
+
+    return placed
+
+
+def _fleet_to_board(board_size: int, fleet: List[ShipPlacement]) -> TGameBoardState:
+    """
+        Преобразование размещений кораблей в игровую доску
+
+        :param board_size: Размер доски
+        :param fleet:      Размещения кораблей
+        :return:           Игровая доска, где клетки корабля содержат его номер
     """
 
-    for i in range(size):
-        if direction == 0:  # Горизонтально
-            board[y][x + i] = ship_id
+    cells = [0] * (board_size * board_size)
+
+    for ship_id, placement in enumerate(fleet, start=1):
+        for cell in placement.cells:
+            cells[cell] = ship_id
+
+    return [cells[row:row + board_size] for row in range(0, board_size * board_size, board_size)]
 
-        else:  # Вертикально
-            board[y + i][x] = ship_id
 
+def _generate_fleet(board_size: int, fleet: Sequence[int], rng: random.Random) -> List[ShipPlacement]:
+    """
+        Размещение флота с ограниченным количеством перезапусков поиска.
+        Если поиск так и не удался, используется детерминированная расстановка по строкам,
+        существование которой проверяет check_fleet_fits.
 
-def generate_random_board() -> TGameBoardState:
+        :param board_size: Размер доски
+        :param fleet:      Размеры кораблей
+        :param rng:        Генератор случайных чисел
+        :return:           Размещения кораблей в порядке fleet
+    """
+
+    table = _table_for(board_size, fleet)
+
+    for _ in range(_SEARCH_RESTARTS):
+        placements = _place_fleet(table, fleet, rng)
+
+        if placements is not None:
+            return placements
+
+        logger.warning(f"Не удалось разместить флот на доске {board_size}x{board_size}, повторная генерация")
+
+    packed = _pack_rows(board_size, fleet)
+
+    if packed is None:
+        raise ValueError(f"Флот {list(fleet)} не помещается на доску {board_size}x{board_size}")
+
+    # Горизонтальные размещения идут первыми: по строкам, затем по столбцам
+    return [
+        table.placements[size][y * (board_size - size + 1) + x]
+        for size, (x, y) in zip(fleet, packed)
+    ]
+
+
+def generate_random_board(
+    rng:        Optional[random.Random] = None,
+    board_size: int = BOARD_SIZE,
+    fleet:      Sequence[int] = SHIPS
+) -> TGameBoardState:
     """
     Генерация случайной доски с кораблями по правилам.
     0 - пустая клетка
-    Иначе - номер корабля
+    Иначе - номер корабля (в порядке fleet, начиная с 1)
 
-    :return: Сгенерированная доска
+    :param rng:        Генератор случайных чисел (по умолчанию - общий для модуля)
+    :param board_size: Размер доски
+    :param fleet:      Размеры кораблей
+    :return:           Сгенерированная доска
     """
 
-    board = [[0 for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
+    placements = _generate_fleet(board_size, fleet, rng or _rng)
+
+    return _fleet_to_board(board_size, placements)
+
+
+def new_board_seed() -> int:
+    """
+        Новое случайное 64-битное зерно доски
+        (со знаком, чтобы помещаться в BIGINT)
+
+        :return: Зерно доски
+    """
+
+    return secrets.randbits(64) - (1 << 63)
+
+
+@lru_cache(maxsize=config.BOARD_CACHE_SIZE)
+def generate_board_from_seed(
+    seed:       int,
+    version:    int = BOARD_SEED_VERSION,
+    board_size: int = BOARD_SIZE,
+    fleet:      Tuple[int, ...] = tuple(SHIPS)
+) -> TGameBoardState:
+    """
+        Детерминированное построение доски из 64-битного зерна.
+        Одно и то же зерно, версия и правила всегда дают одну и ту же доску,
+        результат запоминается, поэтому доска неизменяемая (кортежи).
+
+        :param seed:       Зерно доски
+        :param version:    Версия алгоритма построения
+        :param board_size: Размер доски
+        :param fleet:      Размеры кораблей
+        :return:           Игровая доска
+    """
+
+    # random.Random берёт модуль зерна, поэтому отрицательные зёрна приводятся к беззнаковым
+    rng = random.Random(seed & 0xFFFFFFFFFFFFFFFF)
+
+    if version == 1:
+        table = _table_for(board_size, fleet)
+        placements = _place_fleet(table, fleet, rng, backtrack=False)
+
+        while placements is None:
+            placements = _place_fleet(table, fleet, rng, backtrack=False)
+
+    elif version == 2:
+        placements = _generate_fleet(board_size, fleet, rng)
+
+    else:
+        raise ValueError(f"Неизвестная версия генератора доски: {version}")
+
+    return tuple(tuple(row) for row in _fleet_to_board(board_size, placements))
+
+
+def _place_fleets_batch(
+    table: PlacementTable,
+    fleet: Sequence[int],
+    count: int,
+    rng:   np.random.Generator
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+        Размещение флота сразу на пакете досок.
+        Каждый корабль ставится на всех досках пакета за один векторный шаг:
+        допустимость всех размещений проверяется по занятым клеткам, а выбор
+        среди допустимых делается по случайным ключам.
+
+        :param table: Таблица размещений
+        :param fleet: Размеры кораблей
+        :param count: Количество досок
+        :param rng:   Генератор случайных чисел NumPy
+        :return:      Tuple[<доски (count, board_size * board_size)>, <маска успешно размещённых флотов>]
+    """
+
+    cells_count = table.board_size * table.board_size
+
+    rows = np.arange(count)[:, None]
+    cells = np.zeros((count, cells_count), dtype=np.int16 if len(fleet) > 127 else np.int8)
+    blocked = np.zeros((count, cells_count + 1), dtype=bool)
+    placed = np.ones(count, dtype=bool)
+
+    for ship_id, ship_size in enumerate(fleet, start=1):
+        ship_cells = table.np_cells(ship_size)
+
+        # (count, размещения): ни одна клетка корабля не занята кораблём или окружением
+        legal = ~blocked[:, ship_cells].any(axis=2)
+
+        keys = rng.random(legal.shape, dtype=np.float32)
+        keys *= legal
+        index = keys.argmax(axis=1)
+
+        placed &= legal[rows[:, 0], index]
+
+        blocked[rows, table.np_halos(ship_size)[index]] = True
+        cells[rows, ship_cells[index]] = ship_id
+
+    return cells, placed
+
+
+def _generate_boards_one_by_one(
+    boards:     np.ndarray,
+    rows:       Iterable[int],
+    board_size: int,
+    fleet:      Sequence[int],
+    rng:        np.random.Generator
+):
+    """
+        Построение досок пакета по одной поиском с откатом (как generate_random_board).
+        Генератор поиска берёт зерно из генератора пакета, поэтому результат воспроизводим
+
+        :param boards:     Доски пакета (n, board_size * board_size)
+        :param rows:       Номера досок, которые нужно построить
+        :param board_size: Размер доски
+        :param fleet:      Размеры кораблей
+        :param rng:        Генератор случайных чисел пакета
+    """
+
+    search_rng = random.Random(int(rng.integers(1 << 63)))
+
+    for row in rows:
+        boards[row] = np.ravel(_fleet_to_board(board_size, _generate_fleet(board_size, fleet, search_rng)))
+
+
+def generate_random_boards(
+    n:          int,
+    seed:       Optional[int] = None,
+    board_size: int = BOARD_SIZE,
+    fleet:      Sequence[int] = SHIPS
+) -> np.ndarray:
+    """
+        Пакетная генерация случайных досок с кораблями по правилам.
+        0 - пустая клетка
+        Иначе - номер корабля
+
+        Результат приводится к формату TGameBoardState через boards.tolist()
+        (список досок) или boards[i].tolist() (одна доска).
+
+        На досках больше _BATCH_MAX_BOARD_SIZE пакетное размещение медленнее
+        поиска с откатом, поэтому они строятся по одной, как generate_random_board.
+
+        :param n:          Количество досок
+        :param seed:       Зерно генератора для воспроизводимости
+        :param board_size: Размер доски
+        :param fleet:      Размеры кораблей
+        :return:           Массив досок формы (n, board_size, board_size) типа int8
+                           (int16, если кораблей больше 127)
+    """
+
+    rng = np.random.default_rng(seed)
+    boards = np.empty((n, board_size * board_size), dtype=np.int16 if len(fleet) > 127 else np.int8)
+
+    if board_size > _BATCH_MAX_BOARD_SIZE:
+        _generate_boards_one_by_one(boards, range(n), board_size, fleet, rng)
 
-    for ship_id, ship_size in enumerate(SHIPS, start=1):
-        placed = False
-        attempts = 0
-        max_attempts = 1000
+        logger.info(f"Генерация игровых полей выполнена успешно: {n}")
+        return boards.reshape(n, board_size, board_size)
 
-        while not placed and attempts < max_attempts:
-            attempts += 1
+    table = _table_for(board_size, fleet)
 
-            # Случайное направление (0 - горизонтально, 1 - вертикально)
-            direction = random.randint(0, 1)
+    # На больших досках пакет меньше, чтобы ограничить память под маски допустимости
+    chunk = max(1, _BATCH_CHUNK * BOARD_SIZE * BOARD_SIZE // (board_size * board_size))
 
-            if direction == 0:  # Горизонтально
-                x = random.randint(0, BOARD_SIZE - ship_size)
-                y = random.randint(0, BOARD_SIZE - 1)
+    for start in range(0, n, chunk):
+        pending = np.arange(start, min(start + chunk, n))
 
-                if _can_place_ship(board, x, y, ship_size, direction):
-                    _place_ship(board, x, y, ship_size, direction, ship_id)
-                    placed = True
-            else:  # Вертикально
-                x = random.randint(0, BOARD_SIZE - 1)
-                y = random.randint(0, BOARD_SIZE - ship_size)
+        # Доски, на которых флот не поместился, перегенерируются отдельно
+        for _ in range(_BATCH_ROUNDS):
+            if not pending.size:
+                break
 
-                if _can_place_ship(board, x, y, ship_size, direction):
-                    _place_ship(board, x, y, ship_size, direction, ship_id)
-                    placed = True
+            cells, placed = _place_fleets_batch(table, fleet, pending.size, rng)
+            boards[pending[placed]] = cells[placed]
+            pending = pending[~placed]
 
-        if not placed:
-            logger.error(f"Не удалось разместить корабль {ship_id} после {max_attempts} попыток")
-            return generate_random_board()
+        # Пакетное размещение не умеет откатываться: на плотном флоте оставшиеся
+        # доски строятся как generate_random_board (с расстановкой по строкам в запасе)
+        if pending.size:
+            _generate_boards_one_by_one(boards, pending, board_size, fleet, rng)
 
-    logger.info("Генерация игрового поля выполнена успешно")
-    return board
+    logger.info(f"Пакетная генерация игровых полей выполнена успешно: {n}")
+    return boards.reshape(n, board_size, board_size)
 
 
 __all__ = [
-    'generate_random_board'
+    'BOARD_SIZE',
+    'SHIPS',
+    'ShipPlacement',
+    'PlacementTable',
+    'PLACEMENTS',
+    'BOARD_SEED_VERSION',
+    'get_placement_table',
+    'check_fleet_fits',
+    'generate_random_board',
+    'generate_random_boards',
+    'generate_board_from_seed',
+    'new_board_seed'
 ]
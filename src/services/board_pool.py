@@ -0,0 +1,151 @@
+import threading
+import time
+
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from src import config, logger
+from src.utils import SingletonMeta
+
+from .board_generator import generate_board_from_seed, new_board_seed
+
+
+class BoardPool(metaclass=SingletonMeta):
+    """
+        Пул заранее сгенерированных игровых досок.
+
+        В пуле хранятся зёрна досок, расстановка которых уже построена
+        и запомнена generate_board_from_seed. Зёрна выдаются за O(1) из очереди.
+        Когда в пуле остаётся меньше low_water досок, фоновый поток дозаполняет
+        его до capacity. Если пул пуст, доска генерируется на месте (промах пула).
+    """
+
+    def __init__(
+        self,
+        capacity:  int = config.BOARD_POOL_SIZE,
+        low_water: int = config.BOARD_POOL_LOW_WATER
+    ):
+        self.capacity = capacity
+        self.low_water = min(low_water, capacity)
+
+        self._seeds:   Deque[int] = deque(maxlen=capacity)
+        self._wake     = threading.Event()
+        self._stopping = threading.Event()
+        self._worker:  Optional[threading.Thread] = None
+
+        # Метрики
+        self._hits           = 0
+        self._misses         = 0
+        self._refilled       = 0
+        self._refill_seconds = 0.0
+
+    def start(self):
+        """
+            Запуск фонового потока заполнения пула
+        """
+
+        if self._worker and self._worker.is_alive():
+            return
+
+        self._stopping.clear()
+        self._wake.set()
+
+        self._worker = threading.Thread(target=self._run, name="board-pool-refill", daemon=True)
+        self._worker.start()
+
+        logger.info(f"Пул игровых досок запущен: ёмкость {self.capacity}, порог дозаполнения {self.low_water}")
+
+    def stop(self):
+        """
+            Остановка фонового потока заполнения пула
+        """
+
+        self._stopping.set()
+        self._wake.set()
+
+        if self._worker:
+            self._worker.join(timeout=5)
+            self._worker = None
+
+    def take(self) -> int:
+        """
+            Получение доски из пула.
+            Если пул пуст, доска генерируется синхронно.
+
+            :return: Зерно игровой доски
+        """
+
+        try:
+            seed = self._seeds.popleft()
+            self._hits += 1
+
+        except IndexError:
+            self._misses += 1
+            logger.warning("Пул игровых досок пуст, доска сгенерирована на месте")
+            seed = new_board_seed()
+            generate_board_from_seed(seed)
+
+        if len(self._seeds) < self.low_water:
+            self._wake.set()
+
+        return seed
+
+    def take_pair(self) -> Tuple[int, int]:
+        """
+            Получение двух досок для новой игры
+
+            :return: Tuple[<зерно доски первого игрока>, <зерно доски второго игрока>]
+        """
+
+        return self.take(), self.take()
+
+    @property
+    def metrics(self) -> Dict[str, float]:
+        """
+            Метрики пула для подбора его размера:
+            глубина, попадания/промахи и скорость дозаполнения (досок в секунду)
+        """
+
+        return {
+            "depth":       len(self._seeds),
+            "capacity":    self.capacity,
+            "low_water":   self.low_water,
+            "hits":        self._hits,
+            "misses":      self._misses,
+            "refilled":    self._refilled,
+            "refill_rate": round(self._refilled / self._refill_seconds, 1) if self._refill_seconds else 0.0
+        }
+
+    def _run(self):
+        """
+            Цикл фонового потока: ожидание сигнала и дозаполнение пула до capacity
+        """
+
+        while not self._stopping.is_set():
+            self._wake.wait()
+            self._wake.clear()
+
+            started = time.perf_counter()
+            generated = 0
+
+            while len(self._seeds) < self.capacity and not self._stopping.is_set():
+                seed = new_board_seed()
+                generate_board_from_seed(seed)
+                self._seeds.append(seed)
+                generated += 1
+
+                # Отдаём GIL циклу событий между досками
+                time.sleep(0)
+
+            if generated:
+                self._refilled += generated
+                self._refill_seconds += time.perf_counter() - started
+
+
+board_pool = BoardPool()
+
+
+__all__ = [
+    'BoardPool',
+    'board_pool'
+]
@@ -1,123 +1,535 @@
 import io
 
-from PIL import Image, ImageDraw, ImageFont
+from functools import lru_cache
+from typing import Iterator, NamedTuple, Tuple
+from PIL import Image, ImageColor, ImageDraw, ImageFont
 
 from src import logger
 from src.db.schemas import TGameBoardState, TShotsRecord
 
+from .board_generator import BOARD_SIZE
+
 
 CELL_SIZE = 40
-BOARD_SIZE = 10
+MIN_CELL_SIZE = 8
+BOARD_PIXELS = 400
 MARGIN = 30
 FONT_SIZE = 20
+LABEL_MIN_SPACING = 20
 
 
-def generate_board_image(board: TGameBoardState, shots: TShotsRecord) -> bytes:
+def _column_label(index: int) -> str:
     """
-        Генерация изображения игрового поля.
-        Синий - корабль
-        Красный - попадание
-        Серый - промах
-        Белый - пустая клетка
+        Подпись столбца: A-Z, затем AA, AB, ...
 
-        :param board: Состояние игровой доски
-        :param shots: Запись выстрелов по доске
-        :return:      Изображение в формате PNG в виде байтов
+        :param index: Номер столбца (с нуля)
+        :return:      Подпись
+    """
+
+    label = ""
+    index += 1
+
+    while index:
+        index, rest = divmod(index - 1, 26)
+        label = chr(65 + rest) + label
+
+    return label
+
+
+# Состояния клеток (индексы спрайтов)
+CELL_EMPTY = 0
+CELL_SHIP = 1
+CELL_MISS = 2
+CELL_HIT = 3
+
+CELL_COLORS = {
+    CELL_EMPTY: 'lightblue',
+    CELL_SHIP:  'blue',
+    CELL_MISS:  'gray',
+    CELL_HIT:   'red'
+}
+
+# Палитра изображений: слои рисуются индексами цветов (режим P), а не RGB
+PALETTE = ('white', 'black', 'lightblue', 'blue', 'gray', 'red')
+PALETTE_RGB = [channel for color in PALETTE for channel in ImageColor.getrgb(color)]
+
+INK_WHITE = PALETTE.index('white')
+INK_BLACK = PALETTE.index('black')
+
+# Форматы изображения: формат -> MIME-тип
+IMAGE_FORMATS = {
+    'png':  'image/png',      # RGB PNG, как раньше
+    'png8': 'image/png',      # PNG с палитрой
+    'svg':  'image/svg+xml'   # SVG без Pillow
+}
+
+# Сжатие PNG с палитрой: уровень 9 даёт на доске 10x10 лишь ~5% меньше байт, но кодирует в ~5 раз дольше
+PALETTE_PNG_COMPRESS_LEVEL = 6
+
+
+class BoardLayers(NamedTuple):
+    """
+        Заранее отрисованные слои изображения доски одного размера:
+        фон с подписями и сеткой пустых клеток и спрайты состояний клеток
+    """
+
+    cell_size: int
+    base:      Image.Image
+    sprites:   Tuple[Image.Image, ...]
+
+
+def _new_image(size: Tuple[int, int]) -> Image.Image:
+    """
+        Белое изображение в палитре PALETTE
+    """
+
+    img = Image.new('P', size, color=INK_WHITE)
+    img.putpalette(PALETTE_RGB)
+
+    return img
+
+
+def _cell_size(board_size: int) -> int:
+    # Большие доски рисуются мельче, чтобы изображение оставалось около BOARD_PIXELS
+    return max(MIN_CELL_SIZE, min(CELL_SIZE, BOARD_PIXELS // board_size))
+
+
+def _draw_cell(draw: ImageDraw.ImageDraw, x_pos: int, y_pos: int, cell_size: int, state: int):
+    """
+        Отрисовка одной клетки с рамкой и отметкой попадания/промаха
+    """
+
+    draw.rectangle(
+        [x_pos, y_pos, x_pos + cell_size, y_pos + cell_size],
+        fill=PALETTE.index(CELL_COLORS[state]),
+        outline=INK_BLACK,
+        width=1
+    )
+
+    mark = max(1, cell_size // 8)
+
+    if state == CELL_HIT:
+        # Крестик для попадания
+        draw.line(
+            [x_pos + mark, y_pos + mark, x_pos + cell_size - mark, y_pos + cell_size - mark],
+            fill=INK_WHITE,
+            width=3
+        )
+        draw.line(
+            [x_pos + cell_size - mark, y_pos + mark, x_pos + mark, y_pos + cell_size - mark],
+            fill=INK_WHITE,
+            width=3
+        )
+
+    elif state == CELL_MISS:
+        # Точка для промаха
+        draw.ellipse(
+            [x_pos + cell_size // 2 - mark, y_pos + cell_size // 2 - mark,
+             x_pos + cell_size // 2 + mark, y_pos + cell_size // 2 + mark],
+            fill=INK_WHITE
+        )
+
+
+@lru_cache(maxsize=64)
+def get_board_layers(board_size: int) -> BoardLayers:
     """
+        Слои изображения доски: рисуются один раз на размер доски
 
-    logger.info("Начата генерация изображения игрового поля")
+        :param board_size: Размер доски
+        :return:           Фон и спрайты клеток
+    """
+
+    cell_size = _cell_size(board_size)
+
+    # На мелких клетках подписывается только каждая k-я
+    label_step = -(-LABEL_MIN_SPACING // cell_size)
 
     # Размеры изображения
-    img_width = BOARD_SIZE * CELL_SIZE + 2 * MARGIN
-    img_height = BOARD_SIZE * CELL_SIZE + 2 * MARGIN
+    img_width = board_size * cell_size + 2 * MARGIN
+    img_height = board_size * cell_size + 2 * MARGIN
 
-    # Создание изображения
-    img = Image.new('RGB', (img_width, img_height), color='white')
-    draw = ImageDraw.Draw(img)
+    base = _new_image((img_width, img_height))
+    draw = ImageDraw.Draw(base)
 
     font = ImageFont.load_default()
 
     # Отрисовка координат
-    for i in range(BOARD_SIZE):
-        # Буквы (A-J)
-        letter = chr(65 + i)
+    for i in range(0, board_size, label_step):
+        # Буквы (A, B, ...)
         draw.text(
-            (MARGIN + i * CELL_SIZE + CELL_SIZE // 2 - 5, 5),
-            letter,
-            fill='black',
+            (MARGIN + i * cell_size + cell_size // 2 - 5, 5),
+            _column_label(i),
+            fill=INK_BLACK,
             font=font
         )
 
-        # Цифры (1-10)
-        number = str(i + 1)
+        # Цифры (1, 2, ...)
         draw.text(
-            (5, MARGIN + i * CELL_SIZE + CELL_SIZE // 2 - 10),
-            number,
-            fill='black',
+            (5, MARGIN + i * cell_size + cell_size // 2 - 10),
+            str(i + 1),
+            fill=INK_BLACK,
             font=font
         )
 
-    # Отрисовка клеток
-    for y in range(BOARD_SIZE):
-        for x in range(BOARD_SIZE):
-            x_pos = MARGIN + x * CELL_SIZE
-            y_pos = MARGIN + y * CELL_SIZE
-
-            # Определение цвета клетки
-            cell_value = board[y][x]
-            is_shot = shots[y][x]
-
-            if is_shot:
-                if cell_value > 0:  # Попадание
-                    color = 'red'
-                else:  # Промах
-                    color = 'gray'
-            else:
-                if cell_value > 0:  # Корабль
-                    color = 'blue'
-                else:  # Пустая клетка
-                    color = 'lightblue'
-
-            # Рисование клетки
-            draw.rectangle(
-                [x_pos, y_pos, x_pos + CELL_SIZE, y_pos + CELL_SIZE],
-                fill=color,
-                outline='black',
-                width=1
-            )
-
-            # Отметка попадания/промаха
-            if is_shot:
-                if cell_value > 0:
-                    # Крестик для попадания
-                    draw.line(
-                        [x_pos + 5, y_pos + 5, x_pos + CELL_SIZE - 5, y_pos + CELL_SIZE - 5],
-                        fill='white',
-                        width=3
-                    )
-                    draw.line(
-                        [x_pos + CELL_SIZE - 5, y_pos + 5, x_pos + 5, y_pos + CELL_SIZE - 5],
-                        fill='white',
-                        width=3
-                    )
-                else:
-                    # Точка для промаха
-                    draw.ellipse(
-                        [x_pos + CELL_SIZE // 2 - 5, y_pos + CELL_SIZE // 2 - 5,
-                         x_pos + CELL_SIZE // 2 + 5, y_pos + CELL_SIZE // 2 + 5],
-                        fill='white'
-                    )
-
-    # Сохранение в байты
+    # Сетка пустых клеток
+    for y in range(board_size):
+        for x in range(board_size):
+            _draw_cell(draw, MARGIN + x * cell_size, MARGIN + y * cell_size, cell_size, CELL_EMPTY)
+
+    # Спрайты клеток вместе с рамкой (соседние клетки делят линию рамки)
+    sprites = []
+
+    for state in (CELL_EMPTY, CELL_SHIP, CELL_MISS, CELL_HIT):
+        sprite = _new_image((cell_size + 1, cell_size + 1))
+        _draw_cell(ImageDraw.Draw(sprite), 0, 0, cell_size, state)
+        sprites.append(sprite)
+
+    return BoardLayers(cell_size, base, tuple(sprites))
+
+
+@lru_cache(maxsize=64)
+def get_composite_layers(board_size: int) -> BoardLayers:
+    """
+        Слои составного изображения: два фона доски рядом (свой флот и вид на противника),
+        спрайты клеток общие с одиночным изображением
+
+        :param board_size: Размер доски
+        :return:           Фон и спрайты клеток
+    """
+
+    layers = get_board_layers(board_size)
+    panel_width = layers.base.width
+
+    base = _new_image((panel_width * 2, layers.base.height))
+    base.paste(layers.base, (0, 0))
+    base.paste(layers.base, (panel_width, 0))
+
+    return BoardLayers(layers.cell_size, base, layers.sprites)
+
+
+def warm_up(board_size: int = BOARD_SIZE):
+    """
+        Отрисовка слоёв для доски заданного размера заранее (при запуске приложения)
+
+        :param board_size: Размер доски
+    """
+
+    get_board_layers(board_size)
+    get_composite_layers(board_size)
+
+    logger.info(f"Слои изображения доски {board_size}x{board_size} подготовлены")
+
+
+def render_board(board: TGameBoardState, shots: TShotsRecord) -> Image.Image:
+    """
+        Отрисовка игрового поля без кодирования.
+        На копию заранее отрисованного фона накладываются спрайты
+        только тех клеток, которые отличаются от пустой.
+
+        :param board: Состояние игровой доски
+        :param shots: Запись выстрелов по доске
+        :return:      Изображение
+    """
+
+    layers = get_board_layers(len(board))
+
+    img = layers.base.copy()
+    _paste_cells(img, layers, board, shots, 0)
+
+    return img
+
+
+def fog_of_war(board: TGameBoardState, shots: TShotsRecord) -> TGameBoardState:
+    """
+        Доска противника такой, какой её видит стреляющий:
+        корабли остаются только в обстрелянных клетках
+
+        :param board: Доска противника
+        :param shots: Выстрелы по доске противника
+        :return:      Доска со скрытыми кораблями
+    """
+
+    return tuple(
+        tuple(cell_value if shot else 0 for cell_value, shot in zip(row, shot_row))
+        for row, shot_row in zip(board, shots)
+    )
+
+
+def render_composite(
+    board:          TGameBoardState,
+    shots:          TShotsRecord,
+    opponent_board: TGameBoardState,
+    opponent_shots: TShotsRecord
+) -> Image.Image:
+    """
+        Отрисовка составного изображения без кодирования:
+        слева свой флот с выстрелами противника, справа выстрелы игрока
+        по доске противника со скрытыми необнаруженными кораблями
+
+        :param board:          Доска игрока
+        :param shots:          Выстрелы противника по доске игрока
+        :param opponent_board: Доска противника
+        :param opponent_shots: Выстрелы игрока по доске противника
+        :return:               Изображение
+    """
+
+    layers = get_composite_layers(len(board))
+
+    img = layers.base.copy()
+    _paste_cells(img, layers, board, shots, 0)
+    _paste_cells(img, layers, fog_of_war(opponent_board, opponent_shots), opponent_shots, 1)
+
+    return img
+
+
+def _paste_cells(img: Image.Image, layers: BoardLayers, board: TGameBoardState, shots: TShotsRecord, panel: int):
+    """
+        Наложение спрайтов клеток, отличающихся от пустой, на панель изображения
+    """
+
+    cell_size = layers.cell_size
+    sprites = layers.sprites
+    left = MARGIN + panel * _panel_width(len(board))
+
+    for x, y, state in _marked_cells(board, shots):
+        img.paste(sprites[state], (left + x * cell_size, MARGIN + y * cell_size))
+
+
+def _panel_width(board_size: int) -> int:
+    return board_size * _cell_size(board_size) + 2 * MARGIN
+
+
+def _marked_cells(board: TGameBoardState, shots: TShotsRecord) -> Iterator[Tuple[int, int, int]]:
+    """
+        Клетки, отличающиеся от пустой: (x, y, состояние)
+    """
+
+    for y, (row, shot_row) in enumerate(zip(board, shots)):
+        for x, cell_value in enumerate(row):
+            if shot_row[x]:
+                yield x, y, CELL_HIT if cell_value > 0 else CELL_MISS
+            elif cell_value > 0:
+                yield x, y, CELL_SHIP
+
+
+def paste_cell(img: Image.Image, board_size: int, x: int, y: int, state: int, panel: int = 0):
+    """
+        Перерисовка одной клетки уже отрисованного изображения (после хода)
+
+        :param img:        Изображение, полученное из render_board или render_composite
+        :param board_size: Размер доски
+        :param x:          Координата X клетки
+        :param y:          Координата Y клетки
+        :param state:      Новое состояние клетки (CELL_*)
+        :param panel:      Панель составного изображения: 0 - свой флот, 1 - противник
+    """
+
+    layers = get_board_layers(board_size)
+    cell_size = layers.cell_size
+
+    img.paste(
+        layers.sprites[state],
+        (MARGIN + panel * _panel_width(board_size) + x * cell_size, MARGIN + y * cell_size)
+    )
+
+
+def encode_png(img: Image.Image) -> bytes:
+    """
+        Кодирование изображения в RGB PNG
+
+        :param img: Изображение
+        :return:    PNG в виде байтов
+    """
+
     img_byte_arr = io.BytesIO()
-    img.save(img_byte_arr, format='PNG')
-    img_byte_arr.seek(0)
+    img.convert('RGB').save(img_byte_arr, format='PNG')
+
+    return img_byte_arr.getvalue()
+
+
+def encode_palette_png(img: Image.Image) -> bytes:
+    """
+        Кодирование изображения в PNG с палитрой.
+        Палитра из шести цветов даёт 4 бита на пиксель вместо 24
+
+        :param img: Изображение в палитре PALETTE (из render_board)
+        :return:    PNG в виде байтов
+    """
 
-    logger.info("Изображение игровой доски успешно сгенерировано")
+    img_byte_arr = io.BytesIO()
+    img.save(img_byte_arr, format='PNG', compress_level=PALETTE_PNG_COMPRESS_LEVEL)
 
     return img_byte_arr.getvalue()
 
 
+def encode_image(img: Image.Image, image_format: str = 'png') -> bytes:
+    """
+        Кодирование изображения в растровый формат из IMAGE_FORMATS
+
+        :param img:          Изображение
+        :param image_format: Формат: png или png8
+        :return:             Изображение в виде байтов
+    """
+
+    if image_format == 'png8':
+        return encode_palette_png(img)
+
+    return encode_png(img)
+
+
+def generate_board_image(board: TGameBoardState, shots: TShotsRecord) -> bytes:
+    """
+        Генерация изображения игрового поля.
+        Синий - корабль
+        Красный - попадание
+        Серый - промах
+        Светло-голубой - пустая клетка
+
+        :param board: Состояние игровой доски
+        :param shots: Запись выстрелов по доске
+        :return:      Изображение в формате PNG в виде байтов
+    """
+
+    return encode_png(render_board(board, shots))
+
+
+@lru_cache(maxsize=64)
+def _svg_layers(board_size: int, panels: int = 1) -> Tuple[str, str]:
+    """
+        Неизменная часть SVG доски: начало документа с определениями клеток,
+        подписями и сеткой пустых клеток на каждой панели и конец документа
+
+        :param board_size: Размер доски
+        :param panels:     Количество панелей (досок) в ряд
+        :return:           Tuple[<начало>, <конец>]
+    """
+
+    cell_size = _cell_size(board_size)
+    label_step = -(-LABEL_MIN_SPACING // cell_size)
+    grid = board_size * cell_size
+    size = grid + 2 * MARGIN
+    mark = max(1, cell_size // 8)
+    center = cell_size // 2
+
+    def cell(state: int, content: str = "") -> str:
+        # Клетка с рамкой, как в _draw_cell: рамка по границам пикселей 0 и cell_size
+        return (
+            f'<g id="c{state}"><rect x=".5" y=".5" width="{cell_size}" height="{cell_size}" '
+            f'fill="{CELL_COLORS[state]}" stroke="black"/>{content}</g>'
+        )
+
+    cross = (
+        f'<path d="M{mark} {mark}L{cell_size - mark} {cell_size - mark}'
+        f'M{cell_size - mark} {mark}L{mark} {cell_size - mark}" stroke="white" stroke-width="3"/>'
+    )
+
+    dot = f'<circle cx="{center}" cy="{center}" r="{mark}" fill="white"/>'
+
+    labels = "".join(
+        f'<text x="{MARGIN + i * cell_size + center - 5}" y="15">{_column_label(i)}</text>'
+        f'<text x="5" y="{MARGIN + i * cell_size + center + 5}">{i + 1}</text>'
+        for i in range(0, board_size, label_step)
+    )
+
+    panel = (
+        f'<g font-family="sans-serif" font-size="11">{labels}</g>'
+        f'<rect x="{MARGIN}" y="{MARGIN}" width="{grid + 1}" height="{grid + 1}" fill="url(#grid)"/>'
+        f'<rect x="{MARGIN + .5}" y="{MARGIN + .5}" width="{grid}" height="{grid}" fill="none" stroke="black"/>'
+    )
+
+    width = size * panels
+
+    head = (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{size}" viewBox="0 0 {width} {size}">'
+        f'<defs>'
+        f'<pattern id="grid" x="{MARGIN}" y="{MARGIN}" width="{cell_size}" height="{cell_size}" '
+        f'patternUnits="userSpaceOnUse">'
+        f'<rect width="{cell_size}" height="{cell_size}" fill="{CELL_COLORS[CELL_EMPTY]}"/>'
+        f'<path d="M0 .5H{cell_size}M.5 0V{cell_size}" stroke="black"/>'
+        f'</pattern>'
+        f'{cell(CELL_SHIP)}'
+        f'{cell(CELL_MISS, dot)}'
+        f'{cell(CELL_HIT, cross)}'
+        f'</defs>'
+        f'<rect width="{width}" height="{size}" fill="white"/>'
+        + "".join(f'<g transform="translate({i * size} 0)">{panel}</g>' for i in range(panels))
+    )
+
+    return head, '</svg>'
+
+
+def generate_board_svg(board: TGameBoardState, shots: TShotsRecord) -> bytes:
+    """
+        Генерация изображения игрового поля в SVG без Pillow.
+        Неизменная часть документа строится один раз на размер доски,
+        на каждый запрос добавляются только ссылки на клетки, отличающиеся от пустой.
+
+        :param board: Состояние игровой доски
+        :param shots: Запись выстрелов по доске
+        :return:      SVG в виде байтов
+    """
+
+    head, tail = _svg_layers(len(board))
+
+    return f'{head}{_svg_cells(board, shots, 0)}{tail}'.encode()
+
+
+def generate_composite_svg(
+    board:          TGameBoardState,
+    shots:          TShotsRecord,
+    opponent_board: TGameBoardState,
+    opponent_shots: TShotsRecord
+) -> bytes:
+    """
+        Генерация составного изображения (как render_composite) в SVG без Pillow
+
+        :param board:          Доска игрока
+        :param shots:          Выстрелы противника по доске игрока
+        :param opponent_board: Доска противника
+        :param opponent_shots: Выстрелы игрока по доске противника
+        :return:               SVG в виде байтов
+    """
+
+    head, tail = _svg_layers(len(board), 2)
+
+    own = _svg_cells(board, shots, 0)
+    opponent = _svg_cells(fog_of_war(opponent_board, opponent_shots), opponent_shots, 1)
+
+    return f'{head}{own}{opponent}{tail}'.encode()
+
+
+def _svg_cells(board: TGameBoardState, shots: TShotsRecord, panel: int) -> str:
+    """
+        Ссылки на клетки панели, отличающиеся от пустой
+    """
+
+    cell_size = _cell_size(len(board))
+    left = MARGIN + panel * _panel_width(len(board))
+
+    return "".join(
+        f'<use href="#c{state}" x="{left + x * cell_size}" y="{MARGIN + y * cell_size}"/>'
+        for x, y, state in _marked_cells(board, shots)
+    )
+
+
 __all__ = [
-    'generate_board_image'
+    'CELL_EMPTY',
+    'CELL_SHIP',
+    'CELL_MISS',
+    'CELL_HIT',
+    'IMAGE_FORMATS',
+    'BoardLayers',
+    'get_board_layers',
+    'get_composite_layers',
+    'warm_up',
+    'render_board',
+    'fog_of_war',
+    'render_composite',
+    'paste_cell',
+    'encode_png',
+    'encode_palette_png',
+    'encode_image',
+    'generate_board_image',
+    'generate_board_svg',
+    'generate_composite_svg'
 ]
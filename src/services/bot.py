@@ -0,0 +1,189 @@
+import uuid
+
+from collections import Counter
+from functools import lru_cache
+from typing import Sequence, Tuple
+
+import numpy as np
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from src import logger
+from src.core import database_client
+from src.db.models import Player
+from src.db.schemas import TGameBoardState, TShotsRecord
+
+from .ship_index import ShipHits
+
+
+# Имя игрока-бота, с которым можно создать игру (зарезервировано: зарегистрироваться под ним нельзя)
+BOT_USERNAME = "__bot__"
+
+# Постоянный идентификатор игрока-бота: повторное создание бота ничего не меняет
+BOT_PLAYER_ID = uuid.UUID("00000000-0000-4000-8000-000000000b07")
+
+# Во сколько раз размещение, проходящее через подбитую клетку, весомее обычного
+HIT_WEIGHT = 50
+
+
+@lru_cache(maxsize=64)
+def placement_cells(board_size: int, length: int) -> np.ndarray:
+    """
+        Все размещения корабля на пустой доске
+
+        :param board_size: Размер доски
+        :param length:     Длина корабля
+        :return:           Массив (размещения, length) номеров клеток y * board_size + x
+    """
+
+    offsets = np.arange(length)
+    starts = np.arange(board_size - length + 1)
+    lines = np.arange(board_size)
+
+    # Горизонтальные: строка y, начало x
+    horizontal = (lines[:, None, None] * board_size + starts[None, :, None] + offsets).reshape(-1, length)
+
+    if length == 1:
+        return horizontal
+
+    # Вертикальные: столбец x, начало y
+    vertical = ((starts[None, :, None] + offsets) * board_size + lines[:, None, None]).reshape(-1, length)
+
+    return np.concatenate((horizontal, vertical))
+
+
+def choose_target(
+    board_size: int,
+    shot:       np.ndarray,
+    hits:       np.ndarray,
+    blocked:    np.ndarray,
+    lengths:    Sequence[int],
+    rng:        np.random.Generator
+) -> int:
+    """
+        Выбор клетки по плотности вероятности: для каждой необстрелянной клетки считается,
+        сколько возможных размещений оставшихся кораблей её покрывает.
+        Если есть подбитые, но не потопленные корабли, размещения через их клетки
+        весят в HIT_WEIGHT раз больше (добивание).
+
+        :param board_size: Размер доски
+        :param shot:       Обстрелянные клетки (bool, board_size * board_size)
+        :param hits:       Попадания в ещё не потопленные корабли (bool, board_size * board_size)
+        :param blocked:    Клетки, где кораблей точно нет: промахи, потопленные корабли
+                           и клетки вокруг них (bool, board_size * board_size)
+        :param lengths:    Длины ещё не потопленных кораблей
+        :param rng:        Генератор случайных чисел для выбора среди равных клеток
+
+        :return: Номер клетки y * board_size + x
+    """
+
+    cells_count = board_size * board_size
+    density = np.zeros(cells_count)
+    hunting = not hits.any()
+
+    for length, count in Counter(lengths).items():
+        cells = placement_cells(board_size, length)
+        weights = (~blocked[cells].any(axis=1)).astype(np.float64)
+
+        if not hunting:
+            weights *= 1 + HIT_WEIGHT * hits[cells].sum(axis=1)
+
+        density += count * np.bincount(cells.ravel(), weights=np.repeat(weights, length), minlength=cells_count)
+
+    density[shot] = -1
+
+    best = np.flatnonzero(density == density.max())
+
+    return int(best[rng.integers(len(best))])
+
+
+def _halo(cells: np.ndarray) -> np.ndarray:
+    """
+        Клетки вместе с соседними (включая диагональные)
+
+        :param cells: Маска клеток (bool, board_size x board_size)
+        :return:      Расширенная маска той же формы
+    """
+
+    size = cells.shape[0]
+    padded = np.zeros((size + 2, size + 2), dtype=bool)
+
+    for dy in range(3):
+        for dx in range(3):
+            padded[dy:dy + size, dx:dx + size] |= cells
+
+    return padded[1:-1, 1:-1]
+
+
+def choose_shot(
+    board:     TGameBoardState,
+    shots:     TShotsRecord,
+    ship_hits: ShipHits,
+    rng:       np.random.Generator
+) -> Tuple[int, int]:
+    """
+        Ход бота по доске противника.
+        Используется только то, что видно стреляющему: результаты его выстрелов
+        и клетки потопленных кораблей.
+
+        :param board:     Доска противника
+        :param shots:     Выстрелы бота по доске противника
+        :param ship_hits: Счётчики неподбитых клеток кораблей противника
+        :param rng:       Генератор случайных чисел
+
+        :return: Координаты (x, y) выстрела
+    """
+
+    board_size = len(board)
+
+    layout = np.asarray(board)
+    shot = np.asarray(shots, dtype=bool)
+
+    sunk_ids = [ship_id for ship_id, remaining in ship_hits.remaining.items() if remaining == 0]
+    sunk = np.isin(layout, sunk_ids) if sunk_ids else np.zeros_like(shot)
+
+    hits = shot & (layout > 0) & ~sunk
+    blocked = (shot & ~hits) | _halo(sunk)
+
+    lengths = [
+        len(cells) for ship_id, cells in ship_hits.index.cells.items() if ship_hits.remaining[ship_id] > 0
+    ]
+
+    cell = choose_target(board_size, shot.ravel(), hits.ravel(), blocked.ravel(), lengths, rng)
+
+    return cell % board_size, cell // board_size
+
+
+async def ensure_bot_player():
+    """
+        Создание игрока-бота при запуске приложения.
+        INSERT ... ON CONFLICT DO NOTHING: одновременный запуск нескольких процессов
+        и уже созданный бот не приводят к ошибке
+    """
+
+    async with database_client.get_session() as db:
+        # Пароль в недопустимом формате: войти под ботом нельзя
+        await db.execute(
+            insert(Player)
+            .values(id=BOT_PLAYER_ID, username=BOT_USERNAME, hashed_password="!:!", is_bot=True)
+            .on_conflict_do_nothing()
+        )
+
+        bot_id = await db.scalar(
+            select(Player.id).where(Player.username == BOT_USERNAME, Player.is_bot.is_(True))
+        )
+
+    if bot_id is None:
+        logger.error(f"Имя игрока-бота {BOT_USERNAME} занято обычным игроком: игры против бота недоступны")
+
+
+__all__ = [
+    'BOT_USERNAME',
+    'BOT_PLAYER_ID',
+    'HIT_WEIGHT',
+    'placement_cells',
+    'choose_target',
+    'choose_shot',
+    'ensure_bot_player'
+]
@@ -0,0 +1,236 @@
+import asyncio
+import json
+import uuid
+
+import asyncpg
+
+from typing import Callable, Dict, Optional
+
+from sqlalchemy.engine import make_url
+
+from src import config, logger
+from src.schemas.websocket import WSMessageType
+from src.utils import SingletonMeta
+
+
+# Доставка сообщения соединениям своего процесса: (игра, игрок или None - всем игрокам игры, сообщение, ключ склейки)
+TDeliver = Callable[[str, Optional[str], dict, Optional[str]], None]
+
+# Предел размера полезной нагрузки NOTIFY в Postgres (8000 байт) с запасом
+NOTIFY_MAX_PAYLOAD = 7900
+
+# Интервал проверки соединения LISTEN и пауза перед переподключением
+LISTEN_PING_INTERVAL = 30.0
+LISTEN_RECONNECT_DELAY = 1.0
+
+
+class Broadcast(metaclass=SingletonMeta):
+    """
+        Рассылка сообщений игр между процессами приложения.
+
+        Соединения своего процесса ConnectionManager обслуживает сам, а через
+        рассылку сообщение доходит до соединений игры в других процессах.
+        Базовая рассылка работает в пределах одного процесса и ничего не передаёт.
+    """
+
+    name = "local"
+
+    def __init__(self):
+        self._deliver: Optional[TDeliver] = None
+
+        # Метрики
+        self._published = 0
+        self._received  = 0
+
+    async def start(self, deliver: TDeliver):
+        """
+            Запуск рассылки
+
+            :param deliver: Доставка полученных сообщений соединениям своего процесса
+        """
+
+        self._deliver = deliver
+
+    async def stop(self):
+        """
+            Остановка рассылки
+        """
+
+    def publish(self, game_id: str, player_id: Optional[str], message: dict, coalesce_key: Optional[str] = None):
+        """
+            Передача сообщения соединениям игры в других процессах (не ждёт отправки)
+
+            :param game_id:      Идентификатор игры
+            :param player_id:    Идентификатор игрока (None - всем игрокам игры)
+            :param message:      Сообщение
+            :param coalesce_key: Ключ склейки сообщения в очереди соединения
+        """
+
+    @property
+    def metrics(self) -> Dict[str, float]:
+        """
+            Метрики рассылки: переданные и полученные сообщения
+        """
+
+        return {
+            "backend":   self.name,
+            "published": self._published,
+            "received":  self._received
+        }
+
+
+class PostgresBroadcast(Broadcast):
+    """
+        Рассылка через LISTEN/NOTIFY Postgres для нескольких процессов приложения.
+
+        Каждый процесс держит одно отдельное соединение: слушает канал channel
+        и отправляет в него уведомления по очереди фоновой задачей, так что
+        рассылка не задерживает ход. Свои уведомления процесс пропускает
+        (по идентификатору процесса в сообщении).
+
+        Уведомление ограничено 8000 байт: слишком большое сообщение (полное
+        состояние большой доски) заменяется просьбой resync, и клиент получает
+        состояние от своего процесса. Сообщения, потерянные при переподключении,
+        клиент восстанавливает так же - по пропуску в номерах ходов.
+
+        Состояние игр должно быть общим для процессов, поэтому рассылка
+        работает только с GAME_ENGINE=database.
+    """
+
+    name = "postgres"
+
+    def __init__(self, channel: str = config.BROADCAST_CHANNEL):
+        if config.GAME_ENGINE != "database":
+            raise ValueError("Рассылка между процессами требует GAME_ENGINE=database")
+
+        super().__init__()
+
+        self.channel = channel
+        self.origin = uuid.uuid4().hex
+
+        self._outbox: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        # Метрики
+        self._oversized  = 0
+        self._lost       = 0
+        self._reconnects = 0
+
+    async def start(self, deliver: TDeliver):
+        await super().start(deliver)
+
+        if self._worker:
+            return
+
+        self._outbox = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker:
+            self._worker.cancel()
+
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+
+            self._worker = None
+
+    def publish(self, game_id: str, player_id: Optional[str], message: dict, coalesce_key: Optional[str] = None):
+        if self._outbox is None:
+            return
+
+        payload = self._payload(game_id, player_id, message, coalesce_key)
+
+        if len(payload.encode()) > NOTIFY_MAX_PAYLOAD:
+            self._oversized += 1
+            payload = self._payload(game_id, player_id, {"type": WSMessageType.RESYNC}, coalesce_key)
+
+        self._outbox.put_nowait(payload)
+        self._published += 1
+
+    @property
+    def metrics(self) -> Dict[str, float]:
+        metrics = super().metrics
+        metrics.update({
+            "pending":    self._outbox.qsize() if self._outbox else 0,
+            "oversized":  self._oversized,
+            "lost":       self._lost,
+            "reconnects": self._reconnects
+        })
+
+        return metrics
+
+    def _payload(self, game_id: str, player_id: Optional[str], message: dict, coalesce_key: Optional[str]) -> str:
+        return json.dumps(
+            {"o": self.origin, "g": game_id, "p": player_id, "k": coalesce_key, "m": message},
+            separators=(",", ":"),
+            ensure_ascii=False
+        )
+
+    def _on_notify(self, connection, pid: int, channel: str, payload: str):
+        try:
+            notification = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Некорректное уведомление в канале {channel}")
+            return
+
+        if notification["o"] == self.origin:
+            return
+
+        self._received += 1
+        self._deliver(notification["g"], notification["p"], notification["m"], notification["k"])
+
+    async def _run(self):
+        """
+            Фоновая задача: соединение LISTEN и отправка уведомлений из очереди
+        """
+
+        dsn = make_url(config.database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+        while True:
+            connection = None
+
+            try:
+                connection = await asyncpg.connect(dsn)
+                await connection.add_listener(self.channel, self._on_notify)
+
+                logger.info(f"Рассылка через Postgres запущена: канал {self.channel}")
+
+                while True:
+                    try:
+                        payload = await asyncio.wait_for(self._outbox.get(), LISTEN_PING_INTERVAL)
+                    except asyncio.TimeoutError:
+                        await connection.execute("SELECT 1")
+                        continue
+
+                    try:
+                        await connection.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+                    except Exception:
+                        self._lost += 1
+                        raise
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception as e:
+                logger.error(f"Ошибка соединения рассылки через Postgres: {e}")
+                self._reconnects += 1
+
+                await asyncio.sleep(LISTEN_RECONNECT_DELAY)
+
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+
+
+# Рассылка выбирается настройкой BROADCAST_BACKEND: local - один процесс приложения, postgres - несколько
+broadcast = PostgresBroadcast() if config.BROADCAST_BACKEND == "postgres" else Broadcast()
+
+
+__all__ = [
+    'NOTIFY_MAX_PAYLOAD',
+    'Broadcast',
+    'PostgresBroadcast',
+    'broadcast'
+]
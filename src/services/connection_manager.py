@@ -0,0 +1,373 @@
+import asyncio
+import time
+
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from fastapi import WebSocket
+
+from src import config, logger
+from src.utils import SingletonMeta
+
+from .broadcast import Broadcast, broadcast
+from .ws_protocol import JsonProtocol, TFrame, TProtocol
+
+
+# Код закрытия соединения с клиентом, который не успевает принимать сообщения (Try Again Later)
+WS_CLOSE_SLOW_CONSUMER = 1013
+
+# Код закрытия прежнего соединения игрока, подключившегося заново
+WS_CLOSE_REPLACED = 4000
+
+
+class Connection:
+    """
+        WebSocket-соединение игрока с очередью исходящих сообщений.
+        Сообщения отправляет отдельная задача, поэтому медленный клиент
+        задерживает только свою очередь. Кадры кодируются протоколом,
+        выбранным при подключении.
+    """
+
+    __slots__ = ('websocket', 'protocol', 'queue', 'ready', 'closing', 'writer')
+
+    def __init__(self, websocket: WebSocket, protocol: TProtocol):
+        self.websocket: WebSocket = websocket
+        self.protocol:  TProtocol = protocol
+        self.queue:     Deque[Tuple[Optional[str], TFrame]] = deque()
+        self.ready:     asyncio.Event = asyncio.Event()
+        self.closing:   bool = False
+        self.writer:    Optional[asyncio.Task] = None
+
+
+class ConnectionManager(metaclass=SingletonMeta):
+    """
+        WebSocket-соединения игр.
+
+        Сообщение кодируется один раз на протокол и кладётся в ограниченную очередь
+        каждого получателя, отправкой занимается задача соединения, так что
+        рассылка не ждёт клиентов и идёт всем одновременно.
+
+        Сообщения с ключом склейки (состояние игры) устаревают со следующим
+        таким же: в очереди остаётся только последнее. Если очередь всё равно
+        заполнена, вытесняется самое старое склеиваемое сообщение, а если
+        таких нет или одна отправка дольше send_timeout - клиент отключается.
+
+        Игроки одной игры могут быть подключены к разным процессам приложения:
+        сообщения для соединений других процессов передаются через backend
+        (BROADCAST_BACKEND).
+    """
+
+    def __init__(
+        self,
+        queue_size:   int = config.WS_SEND_QUEUE_SIZE,
+        send_timeout: float = config.WS_SEND_TIMEOUT,
+        backend:      Broadcast = broadcast
+    ):
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.backend = backend
+
+        self.active_connections: Dict[str, Dict[str, Connection]] = {}
+
+        # Метрики
+        self._sent             = 0
+        self._coalesced        = 0
+        self._dropped          = 0
+        self._slow_disconnects = 0
+        self._send_seconds     = 0.0
+        self._max_send_seconds = 0.0
+
+    async def start(self):
+        """
+            Запуск рассылки между процессами
+        """
+
+        await self.backend.start(self._deliver)
+
+    async def stop(self):
+        """
+            Остановка рассылки между процессами
+        """
+
+        await self.backend.stop()
+
+    async def connect(
+        self,
+        websocket:   WebSocket,
+        game_id:     str,
+        player_id:   str,
+        protocol:    TProtocol = JsonProtocol,
+        subprotocol: Optional[str] = None
+    ):
+        """
+            Подключение игрока
+
+            :param websocket:   Соединение
+            :param game_id:     Идентификатор игры
+            :param player_id:   Идентификатор игрока
+            :param protocol:    Протокол сообщений соединения
+            :param subprotocol: Подпротокол для ответа Sec-WebSocket-Protocol
+        """
+
+        await websocket.accept(subprotocol=subprotocol)
+
+        if game_id not in self.active_connections:
+            self.active_connections[game_id] = {}
+
+        # Повторное подключение игрока заменяет прежнее соединение
+        previous = self.active_connections[game_id].get(player_id)
+
+        if previous is not None:
+            self._stop(previous)
+
+        connection = Connection(websocket, protocol)
+        connection.writer = asyncio.create_task(self._write(connection, game_id, player_id))
+
+        self.active_connections[game_id][player_id] = connection
+        logger.info(f"Игрок {player_id} подключен к игре {game_id}")
+
+        # Прежнее соединение закрывается, чтобы его обработчик завершился,
+        # а не продолжал принимать сообщения от имени игрока
+        if previous is not None:
+            await self._close(previous.websocket, WS_CLOSE_REPLACED)
+
+    def disconnect(self, game_id: str, player_id: str, websocket: Optional[WebSocket] = None):
+        """
+            Отключение игрока
+
+            :param game_id:   Идентификатор игры
+            :param player_id: Идентификатор игрока
+            :param websocket: Соединение (если задано - отключается, только если оно ещё активно)
+        """
+
+        connections = self.active_connections.get(game_id)
+
+        if connections is None:
+            return
+
+        connection = connections.get(player_id)
+
+        if connection is not None and (websocket is None or connection.websocket is websocket):
+            self._stop(connection)
+            del connections[player_id]
+            logger.info(f"Игрок {player_id} отключен от игры {game_id}")
+
+        if not connections:
+            del self.active_connections[game_id]
+
+    async def send_personal_message(
+        self,
+        message:      dict,
+        game_id:      str,
+        player_id:    str,
+        coalesce_key: Optional[str] = None
+    ):
+        """
+            Постановка сообщения в очередь игрока
+
+            :param message:      Сообщение
+            :param game_id:      Идентификатор игры
+            :param player_id:    Идентификатор игрока
+            :param coalesce_key: Ключ склейки: неотправленное сообщение с тем же ключом заменяется этим
+        """
+
+        connection = self.active_connections.get(game_id, {}).get(player_id)
+
+        if connection is not None:
+            self._enqueue(connection, connection.protocol.encode(message), coalesce_key)
+        else:
+            # Игрок может быть подключен к другому процессу
+            self.backend.publish(game_id, player_id, message, coalesce_key)
+
+    async def broadcast_to_game(self, message: dict, game_id: str, coalesce_key: Optional[str] = None):
+        """
+            Постановка сообщения в очереди всех игроков игры (кодируется один раз на протокол)
+            и передача соединениям игры в других процессах
+
+            :param message:      Сообщение
+            :param game_id:      Идентификатор игры
+            :param coalesce_key: Ключ склейки: неотправленное сообщение с тем же ключом заменяется этим
+        """
+
+        self.backend.publish(game_id, None, message, coalesce_key)
+        self._broadcast_local(message, game_id, coalesce_key)
+
+    @property
+    def metrics(self) -> Dict[str, float]:
+        """
+            Метрики соединений: протоколы, глубина очередей, склеенные и вытесненные сообщения,
+            отключения медленных клиентов и время отправки
+        """
+
+        connections = [connection for game in self.active_connections.values() for connection in game.values()]
+        depths = [len(connection.queue) for connection in connections]
+        protocols: Dict[str, int] = {}
+
+        for connection in connections:
+            protocols[connection.protocol.name] = protocols.get(connection.protocol.name, 0) + 1
+
+        return {
+            "connections":      len(connections),
+            "protocols":        protocols,
+            "queue_size":       self.queue_size,
+            "queued":           sum(depths),
+            "max_queue_depth":  max(depths, default=0),
+            "sent":             self._sent,
+            "coalesced":        self._coalesced,
+            "dropped":          self._dropped,
+            "slow_disconnects": self._slow_disconnects,
+            "avg_send_ms":      round(self._send_seconds / self._sent * 1000, 2) if self._sent else 0.0,
+            "max_send_ms":      round(self._max_send_seconds * 1000, 2)
+        }
+
+    def _deliver(self, game_id: str, player_id: Optional[str], message: dict, coalesce_key: Optional[str]):
+        """
+            Доставка сообщения из другого процесса соединениям этого процесса
+        """
+
+        if player_id is None:
+            self._broadcast_local(message, game_id, coalesce_key)
+            return
+
+        connection = self.active_connections.get(game_id, {}).get(player_id)
+
+        if connection is not None:
+            self._enqueue(connection, connection.protocol.encode(message), coalesce_key)
+
+    def _broadcast_local(self, message: dict, game_id: str, coalesce_key: Optional[str]):
+        """
+            Постановка сообщения в очереди соединений игры этого процесса
+        """
+
+        connections = self.active_connections.get(game_id)
+
+        if not connections:
+            return
+
+        frames: Dict[TProtocol, TFrame] = {}
+
+        for connection in connections.values():
+            frame = frames.get(connection.protocol)
+
+            if frame is None:
+                frame = frames[connection.protocol] = connection.protocol.encode(message)
+
+            self._enqueue(connection, frame, coalesce_key)
+
+    def _enqueue(self, connection: Connection, frame: TFrame, coalesce_key: Optional[str]):
+        """
+            Постановка сообщения в очередь соединения с политикой для медленных клиентов
+        """
+
+        if connection.closing:
+            return
+
+        queue = connection.queue
+
+        # Устаревшее сообщение с тем же ключом больше не нужно
+        if coalesce_key is not None:
+            for i, (key, _) in enumerate(queue):
+                if key == coalesce_key:
+                    del queue[i]
+                    self._coalesced += 1
+                    break
+
+        if len(queue) >= self.queue_size:
+            for i, (key, _) in enumerate(queue):
+                if key is not None:
+                    del queue[i]
+                    self._dropped += 1
+                    break
+            else:
+                self._close_slow(connection)
+                return
+
+        queue.append((coalesce_key, frame))
+        connection.ready.set()
+
+    async def _write(self, connection: Connection, game_id: str, player_id: str):
+        """
+            Задача соединения: отправка сообщений из очереди по порядку
+        """
+
+        websocket = connection.websocket
+
+        try:
+            while True:
+                while not connection.queue and not connection.closing:
+                    connection.ready.clear()
+                    await connection.ready.wait()
+
+                if connection.closing:
+                    break
+
+                _, frame = connection.queue.popleft()
+                started = time.perf_counter()
+
+                send = websocket.send_bytes(frame) if connection.protocol.binary else websocket.send_text(frame)
+
+                await asyncio.wait_for(send, self.send_timeout)
+
+                elapsed = time.perf_counter() - started
+
+                self._sent += 1
+                self._send_seconds += elapsed
+                self._max_send_seconds = max(self._max_send_seconds, elapsed)
+
+        except asyncio.TimeoutError:
+            self._close_slow(connection)
+
+        except Exception as e:
+            # Клиент уже отключился: соединение уберёт обработчик WebSocket
+            logger.debug(f"Отправка игроку {player_id} в игре {game_id} прервана: {e}")
+            return
+
+        if connection.closing:
+            logger.warning(f"Игрок {player_id} не успевает принимать сообщения игры {game_id}, соединение закрыто")
+
+            await self._close(websocket, WS_CLOSE_SLOW_CONSUMER)
+
+    async def _close(self, websocket: WebSocket, code: int):
+        """
+            Закрытие соединения с кодом; клиент мог уже отключиться сам
+        """
+
+        try:
+            await asyncio.wait_for(websocket.close(code=code), self.send_timeout)
+        except Exception:
+            pass
+
+    def _close_slow(self, connection: Connection):
+        """
+            Закрытие соединения медленного клиента: очередь сбрасывается,
+            соединение закрывает его задача
+        """
+
+        if connection.closing:
+            return
+
+        connection.closing = True
+        connection.queue.clear()
+        connection.ready.set()
+
+        self._slow_disconnects += 1
+
+    @staticmethod
+    def _stop(connection: Connection):
+        connection.closing = True
+        connection.queue.clear()
+
+        if connection.writer is not None:
+            connection.writer.cancel()
+
+
+manager = ConnectionManager()
+
+
+__all__ = [
+    'WS_CLOSE_SLOW_CONSUMER',
+    'WS_CLOSE_REPLACED',
+    'Connection',
+    'ConnectionManager',
+    'manager'
+]
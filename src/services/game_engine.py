@@ -0,0 +1,769 @@
+import asyncio
+import time
+import uuid
+
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple, Union
+from sqlalchemy import func, insert, select, update
+
+from src import config, logger
+from src.core import database_client
+from src.db.enums import GameStatus, ShotResult
+from src.db.functions import APPLY_MOVE_SQL
+from src.db.models import Game, GameBoard, Move, Player
+from src.db.repositories import GameRepository, GameBoardRepository
+from src.db.schemas import TGameBoardState, TShotsRecord
+from src.utils import SingletonMeta
+
+from .game_logic import apply_shot
+from .ship_index import ShipHits
+
+
+TGameId = Union[str, uuid.UUID]
+
+# Коды ошибок хранимой функции battleship_apply_move
+MOVE_ERRORS = {
+    "not_found":       "Игра не найдена",
+    "not_in_progress": "Игра не в процессе",
+    "not_your_turn":   "Не ваш ход",
+    "invalid_cell":    "Некорректный ход: клетка ({x}, {y}) вне доски или уже обстреляна"
+}
+
+
+class GameEngineError(Exception):
+    """ Ошибка применения действия к игре (сообщение передаётся игроку) """
+
+
+class MoveResult(NamedTuple):
+    hit:            bool
+    sunk:           bool
+    winner_id:      Optional[uuid.UUID]
+    turn_player_id: Optional[uuid.UUID]
+    seq:            int
+    sunk_cells:     Tuple[Tuple[int, int], ...] = ()
+
+
+class GameContext(NamedTuple):
+    """
+        Неизменяемая часть игры: идентификатор и игроки.
+        Лёгкая запись, которую WebSocket-соединение держит всё время игры
+        вместо полного состояния с досками
+    """
+
+    game_id:    uuid.UUID
+    player1_id: uuid.UUID
+    player2_id: uuid.UUID
+    bot_id:     Optional[uuid.UUID]
+
+    def opponent_id(self, player_id: uuid.UUID) -> uuid.UUID:
+        return self.player2_id if player_id == self.player1_id else self.player1_id
+
+    def has_player(self, player_id: uuid.UUID) -> bool:
+        return player_id == self.player1_id or player_id == self.player2_id
+
+
+class BoardState:
+    """
+        Игровая доска игрока в памяти.
+
+        board - расстановка кораблей (общая для всех читателей доски, не меняется),
+        shots - запись выстрелов по доске (строится из журнала ходов),
+        ship_hits - счётчики неподбитых клеток кораблей.
+    """
+
+    __slots__ = ('board_id', 'player_id', 'board', 'shots', 'ship_hits', 'ships_remaining', 'dirty')
+
+    def __init__(self, game_board: GameBoard, shots: TShotsRecord):
+        self.board_id:        uuid.UUID = game_board.id
+        self.player_id:       uuid.UUID = game_board.player_id
+        self.board:           TGameBoardState = game_board.board_state
+        self.shots:           TShotsRecord = shots
+        self.ship_hits:       ShipHits = ShipHits(game_board.ship_index, self.shots)
+        self.ships_remaining: int = game_board.ships_remaining
+        self.dirty:           bool = False
+
+
+class GameState:
+    """
+        Состояние активной игры в памяти.
+
+        Ходы одной игры применяются строго по очереди под lock,
+        изменения отмечаются флагом dirty и записываются в базу данных пачками:
+        новые ходы копятся в pending до записи в журнал ходов.
+    """
+
+    __slots__ = (
+        'game_id', 'player1_id', 'player2_id', 'bot_id', 'turn_player_id', 'winner_id',
+        'status', 'started_at', 'finished_at', 'boards', 'seq', 'pending', 'lock', 'dirty', 'last_access'
+    )
+
+    def __init__(
+        self,
+        game:   Game,
+        boards: List[GameBoard],
+        moves:  List[Tuple[uuid.UUID, int, int]],
+        bot_id: Optional[uuid.UUID] = None
+    ):
+        self.game_id:        uuid.UUID = game.id
+        self.player1_id:     uuid.UUID = game.player1_id
+        self.player2_id:     uuid.UUID = game.player2_id
+        self.bot_id:         Optional[uuid.UUID] = bot_id
+        self.turn_player_id: Optional[uuid.UUID] = game.turn_player_id
+        self.winner_id:      Optional[uuid.UUID] = game.winner_id
+        self.status:         GameStatus = game.status
+        self.started_at:     Optional[datetime] = game.started_at
+        self.finished_at:    Optional[datetime] = game.finished_at
+
+        # Запись выстрелов по доске игрока строится из ходов его противника
+        shots: Dict[uuid.UUID, TShotsRecord] = {
+            board.player_id: [[False] * board.board_size for _ in range(board.board_size)] for board in boards
+        }
+
+        for shooter_id, x, y in moves:
+            shots[self.opponent_id(shooter_id)][y][x] = True
+
+        self.boards:         Dict[uuid.UUID, BoardState] = {
+            board.player_id: BoardState(board, shots[board.player_id]) for board in boards
+        }
+
+        self.seq:            int = len(moves)
+        self.pending:        List[dict] = []
+
+        self.lock            = asyncio.Lock()
+        self.dirty:          bool = False
+        self.last_access:    float = time.monotonic()
+
+    def opponent_id(self, player_id: uuid.UUID) -> uuid.UUID:
+        """
+            Идентификатор противника игрока
+
+            :param player_id: Идентификатор игрока
+            :return:          Идентификатор противника
+        """
+
+        return self.player2_id if player_id == self.player1_id else self.player1_id
+
+    def has_player(self, player_id: uuid.UUID) -> bool:
+        return player_id == self.player1_id or player_id == self.player2_id
+
+    @property
+    def context(self) -> GameContext:
+        return GameContext(self.game_id, self.player1_id, self.player2_id, self.bot_id)
+
+
+class GameEngine(metaclass=SingletonMeta):
+    """
+        Авторитетный движок активных игр.
+
+        Игра загружается из базы данных один раз при первом обращении, дальше ходы
+        проверяются и применяются в памяти. Изменения записываются в базу данных
+        фоновой задачей раз в flush_interval секунд одной пачкой на все игры,
+        а при завершении игры и остановке приложения - сразу.
+        Завершённые и простаивающие дольше idle_timeout игры выгружаются из памяти.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = config.GAME_FLUSH_INTERVAL,
+        idle_timeout:   int = config.GAME_IDLE_TIMEOUT
+    ):
+        self.flush_interval = flush_interval
+        self.idle_timeout = idle_timeout
+
+        self._games:      Dict[uuid.UUID, GameState] = {}
+        self._dirty:      Set[uuid.UUID] = set()
+        self._load_lock:  Optional[asyncio.Lock] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._worker:     Optional[asyncio.Task] = None
+
+        # Метрики
+        self._loaded        = 0
+        self._evicted       = 0
+        self._moves         = 0
+        self._flushes       = 0
+        self._flushed_rows  = 0
+        self._flush_errors  = 0
+        self._flush_seconds = 0.0
+
+    def start(self):
+        """
+            Запуск фоновой записи изменений в базу данных
+        """
+
+        if self._worker and not self._worker.done():
+            return
+
+        self._worker = asyncio.create_task(self._run())
+
+        logger.info(f"Игровой движок запущен: запись в базу данных раз в {self.flush_interval} с")
+
+    async def stop(self):
+        """
+            Остановка фоновой записи и запись всех несохранённых изменений
+        """
+
+        if self._worker:
+            self._worker.cancel()
+
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+
+            self._worker = None
+
+        await self.flush()
+
+    def get_loaded(self, game_id: TGameId) -> Optional[GameState]:
+        """
+            Состояние игры, если она уже загружена в память
+
+            :param game_id: Идентификатор игры
+            :return:        Состояние игры или None
+        """
+
+        return self._games.get(self._key(game_id))
+
+    async def get(self, game_id: TGameId) -> Optional[GameState]:
+        """
+            Состояние игры; при первом обращении игра загружается из базы данных
+
+            :param game_id: Идентификатор игры
+            :return:        Состояние игры или None, если игра не найдена
+        """
+
+        try:
+            key = self._key(game_id)
+        except ValueError:
+            return None
+
+        state = self._games.get(key)
+
+        if state is not None:
+            state.last_access = time.monotonic()
+            return state
+
+        if self._load_lock is None:
+            self._load_lock = asyncio.Lock()
+
+        async with self._load_lock:
+            state = self._games.get(key)
+
+            if state is None:
+                state = await self._load(key)
+
+                if state is None:
+                    return None
+
+                self._games[key] = state
+                self._loaded += 1
+
+        state.last_access = time.monotonic()
+
+        return state
+
+    async def start_game(self, game_id: TGameId, player_id: uuid.UUID) -> GameState:
+        """
+            Начало игры
+
+            :param game_id:   Идентификатор игры
+            :param player_id: Идентификатор игрока, начинающего игру
+
+            :return: Состояние игры
+        """
+
+        state = await self._get_for_player(game_id, player_id)
+
+        async with state.lock:
+            if state.status == GameStatus.FINISHED:
+                raise GameEngineError("Игра уже завершена")
+
+            if state.status == GameStatus.WAITING:
+                state.status = GameStatus.IN_PROGRESS
+                state.started_at = datetime.now()
+
+                if state.turn_player_id is None:
+                    state.turn_player_id = state.player1_id
+
+                self._mark_dirty(state)
+
+                logger.info(f"Начата игра {state.game_id}")
+
+        return state
+
+    async def apply_move(self, game_id: TGameId, player_id: uuid.UUID, x: int, y: int) -> MoveResult:
+        """
+            Проверка и применение хода игрока
+
+            :param game_id:   Идентификатор игры
+            :param player_id: Идентификатор игрока, совершающего ход
+            :param x:         Координата X выстрела
+            :param y:         Координата Y выстрела
+
+            :return: Результат хода
+        """
+
+        state = await self._get_for_player(game_id, player_id)
+
+        async with state.lock:
+            if state.status != GameStatus.IN_PROGRESS:
+                raise GameEngineError(MOVE_ERRORS["not_in_progress"])
+
+            if state.turn_player_id != player_id:
+                raise GameEngineError(MOVE_ERRORS["not_your_turn"])
+
+            opponent_id = state.opponent_id(player_id)
+            target = state.boards[opponent_id]
+
+            result = apply_shot(target.board, target.shots, target.ship_hits, x, y)
+
+            if result is None:
+                raise GameEngineError(MOVE_ERRORS["invalid_cell"].format(x=x, y=y))
+
+            hit, sunk = result
+
+            state.seq += 1
+            state.pending.append({
+                "game_id":    state.game_id,
+                "seq":        state.seq,
+                "shooter_id": player_id,
+                "x":          x,
+                "y":          y,
+                "result":     ShotResult.SUNK if sunk else ShotResult.HIT if hit else ShotResult.MISS,
+                "ts":         datetime.now(timezone.utc)
+            })
+
+            if sunk:
+                target.ships_remaining -= 1
+                target.dirty = True
+
+            # Ход переходит к противнику при промахе
+            if not hit:
+                state.turn_player_id = opponent_id
+
+            if target.ships_remaining == 0:
+                state.winner_id = player_id
+                state.status = GameStatus.FINISHED
+                state.finished_at = datetime.now()
+
+            self._mark_dirty(state)
+            self._moves += 1
+
+            move = MoveResult(
+                hit,
+                sunk,
+                state.winner_id,
+                state.turn_player_id,
+                state.seq,
+                target.ship_hits.index.ship_cells(target.board[y][x]) if sunk else ()
+            )
+
+        if move.winner_id is not None:
+            logger.info(f"Игра {state.game_id} завершена. Победитель: {move.winner_id}")
+            await self.flush()
+
+        return move
+
+    async def flush(self):
+        """
+            Запись изменений всех игр в базу данных одной транзакцией.
+            При ошибке игры снова отмечаются изменёнными и записываются при следующей попытке.
+        """
+
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+
+            started = time.perf_counter()
+
+            # Снимок изменений берётся без переключения задач, поэтому он согласован
+            game_ids = list(self._dirty)
+            self._dirty.clear()
+
+            game_rows = []
+            board_rows = []
+            move_rows = []
+            flushed_boards: List[BoardState] = []
+            flushed_moves: List[Tuple[GameState, List[dict]]] = []
+
+            for game_id in game_ids:
+                state = self._games.get(game_id)
+
+                if state is None:
+                    continue
+
+                state.dirty = False
+
+                if state.pending:
+                    move_rows.extend(state.pending)
+                    flushed_moves.append((state, state.pending))
+                    state.pending = []
+
+                game_rows.append({
+                    "id":             state.game_id,
+                    "turn_player_id": state.turn_player_id,
+                    "winner_id":      state.winner_id,
+                    "status":         state.status,
+                    "started_at":     state.started_at,
+                    "finished_at":    state.finished_at
+                })
+
+                for board in state.boards.values():
+                    if board.dirty:
+                        board.dirty = False
+                        flushed_boards.append(board)
+
+                        board_rows.append({
+                            "id":              board.board_id,
+                            "ships_remaining": board.ships_remaining
+                        })
+
+            try:
+                async with database_client.get_session() as db:
+                    if move_rows:
+                        await db.execute(insert(Move), move_rows)
+
+                    if game_rows:
+                        await db.execute(update(Game), game_rows)
+
+                    if board_rows:
+                        await db.execute(update(GameBoard), board_rows)
+
+            except Exception as e:
+                self._flush_errors += 1
+                logger.error(f"Ошибка записи игр в базу данных: {e}")
+
+                for board in flushed_boards:
+                    board.dirty = True
+
+                for state, pending in flushed_moves:
+                    state.pending[:0] = pending
+
+                for game_id in game_ids:
+                    state = self._games.get(game_id)
+
+                    if state is not None:
+                        self._mark_dirty(state)
+
+                return
+
+            self._flushes += 1
+            self._flushed_rows += len(move_rows) + len(game_rows) + len(board_rows)
+            self._flush_seconds += time.perf_counter() - started
+
+    @property
+    def metrics(self) -> Dict[str, float]:
+        """
+            Метрики движка: игры в памяти, применённые ходы и запись в базу данных
+        """
+
+        return {
+            "games":        len(self._games),
+            "dirty":        len(self._dirty),
+            "loaded":       self._loaded,
+            "evicted":      self._evicted,
+            "moves":        self._moves,
+            "flushes":      self._flushes,
+            "flushed_rows": self._flushed_rows,
+            "flush_errors": self._flush_errors,
+            "avg_flush_ms": round(self._flush_seconds / self._flushes * 1000, 2) if self._flushes else 0.0
+        }
+
+    async def _get_for_player(self, game_id: TGameId, player_id: uuid.UUID) -> GameState:
+        state = await self.get(game_id)
+
+        if state is None:
+            raise GameEngineError(MOVE_ERRORS["not_found"])
+
+        if not state.has_player(player_id):
+            raise GameEngineError("Вы не участвуете в этой игре")
+
+        return state
+
+    def _mark_dirty(self, state: GameState):
+        state.dirty = True
+        self._dirty.add(state.game_id)
+
+    async def _load(self, game_id: uuid.UUID) -> Optional[GameState]:
+        async with database_client.get_session() as db:
+            game_repo = GameRepository(session=db)
+            game = await game_repo.get_one_or_none(Game.id == game_id)
+
+            if not game:
+                return None
+
+            game_board_repo = GameBoardRepository(session=db)
+            boards = await game_board_repo.list(GameBoard.game_id == game_id)
+
+            result = await db.execute(
+                select(Move.shooter_id, Move.x, Move.y)
+                .where(Move.game_id == game_id)
+                .order_by(Move.seq)
+            )
+
+            moves = [tuple(row) for row in result]
+
+            bot_id = await db.scalar(
+                select(Player.id).where(Player.id.in_([game.player1_id, game.player2_id]), Player.is_bot.is_(True))
+            )
+
+        if len(boards) != 2:
+            logger.error(f"У игры {game_id} найдено досок: {len(boards)}, ожидалось 2")
+            return None
+
+        return GameState(game, boards, moves, bot_id)
+
+    def _evict(self):
+        """
+            Выгрузка из памяти сохранённых завершённых и простаивающих игр
+        """
+
+        idle_before = time.monotonic() - self.idle_timeout
+
+        for game_id, state in list(self._games.items()):
+            if state.dirty or state.lock.locked():
+                continue
+
+            if state.status == GameStatus.FINISHED or state.last_access < idle_before:
+                del self._games[game_id]
+                self._evicted += 1
+
+    async def _run(self):
+        """
+            Цикл фоновой задачи: запись изменений и выгрузка неактивных игр
+        """
+
+        while True:
+            await asyncio.sleep(self.flush_interval)
+
+            await self.flush()
+            self._evict()
+
+    @staticmethod
+    def _key(game_id: TGameId) -> uuid.UUID:
+        return game_id if isinstance(game_id, uuid.UUID) else uuid.UUID(str(game_id))
+
+
+class DatabaseGameEngine(GameEngine):
+    """
+        Движок игр, у которого источником истины остаётся база данных.
+
+        Ход применяется одним вызовом хранимой функции battleship_apply_move: она под блокировкой
+        строки игры проверяет статус и очередь хода, добавляет ход в журнал moves, определяет
+        потопление и победителя, уменьшает ships_remaining и передаёт ход. Поэтому движок безопасен при нескольких
+        процессах приложения без блокировок на стороне клиента.
+
+        Неизменяемая часть игры (игроки, бот, расстановки кораблей) загружается один раз
+        и хранится в памяти: по ней клетки корабля под выстрелом передаются в функцию.
+        Изменяемая часть догружается при обращении: строка игры (статус, очередь хода)
+        и только новые ходы журнала (seq больше известного), а свои ходы процесс
+        применяет к состоянию в памяти сразу по результату функции.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # Метрики
+        self._refreshes     = 0
+        self._fetched_moves = 0
+        self._move_seconds  = 0.0
+
+    async def get(self, game_id: TGameId) -> Optional[GameState]:
+        """
+            Актуальное состояние игры: первое обращение загружает игру целиком,
+            следующие - только изменения из базы данных
+
+            :param game_id: Идентификатор игры
+            :return:        Состояние игры или None, если игра не найдена
+        """
+
+        try:
+            key = self._key(game_id)
+        except ValueError:
+            return None
+
+        state = self._games.get(key)
+
+        if state is None:
+            return await super().get(key)
+
+        state.last_access = time.monotonic()
+
+        if not await self._refresh(state):
+            self._games.pop(key, None)
+            return None
+
+        return state
+
+    async def start_game(self, game_id: TGameId, player_id: uuid.UUID) -> GameState:
+        state = await self._get_for_player(game_id, player_id)
+
+        if state.status == GameStatus.FINISHED:
+            raise GameEngineError("Игра уже завершена")
+
+        if state.status == GameStatus.WAITING:
+            async with database_client.get_session() as db:
+                await db.execute(
+                    update(Game)
+                    .where(Game.id == state.game_id, Game.status == GameStatus.WAITING)
+                    .values(
+                        status=GameStatus.IN_PROGRESS,
+                        started_at=datetime.now(),
+                        turn_player_id=func.coalesce(Game.turn_player_id, Game.player1_id)
+                    )
+                )
+
+            logger.info(f"Начата игра {state.game_id}")
+
+            state = await self.get(state.game_id)
+
+        return state
+
+    async def apply_move(self, game_id: TGameId, player_id: uuid.UUID, x: int, y: int) -> MoveResult:
+        key = self._key(game_id)
+        state = self._games.get(key)
+
+        if state is None:
+            state = await self._get_for_player(key, player_id)
+
+        elif not state.has_player(player_id):
+            raise GameEngineError("Вы не участвуете в этой игре")
+
+        target = state.boards[state.opponent_id(player_id)]
+        board_size = len(target.board)
+
+        if x < 0 or x >= board_size or y < 0 or y >= board_size:
+            raise GameEngineError(MOVE_ERRORS["invalid_cell"].format(x=x, y=y))
+
+        ship_id = target.board[y][x]
+        ship_cells = target.ship_hits.index.ship_cells(ship_id) if ship_id > 0 else ()
+
+        started = time.perf_counter()
+
+        async with database_client.get_session() as db:
+            result = await db.execute(
+                APPLY_MOVE_SQL,
+                {
+                    "game_id":    key,
+                    "player_id":  player_id,
+                    "x":          x,
+                    "y":          y,
+                    "ship_cells": [coord for cell in ship_cells for coord in cell]
+                }
+            )
+
+            row = result.one()
+
+        self._move_seconds += time.perf_counter() - started
+
+        if row.error:
+            raise GameEngineError(MOVE_ERRORS[row.error].format(x=x, y=y))
+
+        self._moves += 1
+
+        # Свой ход применяется к состоянию в памяти без повторной загрузки;
+        # если до него были ходы других процессов - состояние догружается
+        async with state.lock:
+            if row.seq == state.seq + 1:
+                self._apply_logged_move(state, row.seq, player_id, x, y)
+
+                state.turn_player_id = row.turn_player_id
+
+                if row.winner_id is not None:
+                    state.winner_id = row.winner_id
+                    state.status = GameStatus.FINISHED
+                    state.finished_at = datetime.now()
+
+        if row.seq > state.seq:
+            await self._refresh(state)
+
+        if row.winner_id is not None:
+            logger.info(f"Игра {key} завершена. Победитель: {row.winner_id}")
+            self._games.pop(key, None)
+
+        return MoveResult(row.hit, row.sunk, row.winner_id, row.turn_player_id, row.seq, ship_cells if row.sunk else ())
+
+    @property
+    def metrics(self) -> Dict[str, float]:
+        metrics = super().metrics
+        metrics.update({
+            "refreshes":     self._refreshes,
+            "fetched_moves": self._fetched_moves,
+            "avg_move_ms":   round(self._move_seconds / self._moves * 1000, 2) if self._moves else 0.0
+        })
+
+        return metrics
+
+    async def _refresh(self, state: GameState) -> bool:
+        """
+            Догрузка изменений игры: строка игры и ходы после последнего известного
+
+            :param state: Состояние игры в памяти
+            :return:      False, если игры больше нет в базе данных
+        """
+
+        async with state.lock:
+            async with database_client.get_session() as db:
+                game = (await db.execute(
+                    select(Game.status, Game.turn_player_id, Game.winner_id, Game.started_at, Game.finished_at)
+                    .where(Game.id == state.game_id)
+                )).one_or_none()
+
+                if game is None:
+                    return False
+
+                moves = (await db.execute(
+                    select(Move.seq, Move.shooter_id, Move.x, Move.y)
+                    .where(Move.game_id == state.game_id, Move.seq > state.seq)
+                    .order_by(Move.seq)
+                )).all()
+
+            for seq, shooter_id, x, y in moves:
+                self._apply_logged_move(state, seq, shooter_id, x, y)
+
+            state.status = game.status
+            state.turn_player_id = game.turn_player_id
+            state.winner_id = game.winner_id
+            state.started_at = game.started_at
+            state.finished_at = game.finished_at
+
+        self._refreshes += 1
+        self._fetched_moves += len(moves)
+
+        return True
+
+    @staticmethod
+    def _apply_logged_move(state: GameState, seq: int, shooter_id: uuid.UUID, x: int, y: int):
+        """
+            Применение хода из журнала к доскам в памяти (ход уже проверен хранимой функцией)
+        """
+
+        if seq <= state.seq:
+            return
+
+        target = state.boards[state.opponent_id(shooter_id)]
+        result = apply_shot(target.board, target.shots, target.ship_hits, x, y)
+
+        if result is not None and result[1]:
+            target.ships_remaining -= 1
+
+        state.seq = seq
+
+
+# Движок выбирается настройкой GAME_ENGINE: memory - один процесс приложения, database - несколько
+game_engine = DatabaseGameEngine() if config.GAME_ENGINE == "database" else GameEngine()
+
+
+__all__ = [
+    'GameEngineError',
+    'MoveResult',
+    'GameContext',
+    'BoardState',
+    'GameState',
+    'GameEngine',
+    'DatabaseGameEngine',
+    'game_engine'
+]
@@ -0,0 +1,389 @@
+import hashlib
+import time
+import uuid
+
+from collections import OrderedDict
+from typing import Dict, Optional, Sequence, Tuple
+
+from PIL import Image
+
+from src import config
+from src.db.schemas import TGameBoardState, TShotsRecord
+from src.utils import SingletonMeta
+
+from .board_visualizer import CELL_HIT, CELL_MISS, paste_cell
+
+
+# Виды изображения: своя доска или составное изображение со своим флотом и видом на противника
+VIEW_BOARD = "board"
+VIEW_COMPOSITE = "composite"
+
+IMAGE_VIEWS = (VIEW_BOARD, VIEW_COMPOSITE)
+
+
+def board_image_key(kind: str, *grids: Sequence[Sequence]) -> str:
+    """
+        Ключ изображения доски: хеш содержимого, из которого оно рисуется.
+        Одинаковые доски и выстрелы всегда дают одинаковое изображение,
+        поэтому ключ годится и как строгий ETag.
+        В ключ должно входить только видимое игроку (доска противника - после fog_of_war).
+
+        :param kind:  Вид изображения (формат и способ отрисовки)
+        :param grids: Доски и записи выстрелов, из которых рисуется изображение
+        :return:      Шестнадцатеричный хеш
+    """
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(kind.encode())
+
+    for grid in grids:
+        digest.update(repr(grid).encode())
+
+    return digest.hexdigest()
+
+
+class BoardImage:
+    """
+        Изображение доски одного игрока.
+        Отрисованное изображение (в палитре, байт на пиксель) обновляется по одной клетке на ход,
+        закодированные форматы (PNG, SVG) создаются только по запросу и хранятся до следующего хода.
+    """
+
+    __slots__ = ('board_size', 'image', 'keys', 'encoded')
+
+    def __init__(self, board_size: int, image: Optional[Image.Image]):
+        self.board_size: int = board_size
+        self.image:      Optional[Image.Image] = image
+        self.keys:       Dict[str, str] = {}
+        self.encoded:    Dict[str, bytes] = {}
+
+    @property
+    def size(self) -> int:
+        """
+            Занимаемая память в байтах (пиксели и закодированные изображения)
+        """
+
+        pixels = self.image.width * self.image.height * len(self.image.getbands()) if self.image else 0
+
+        return pixels + sum(map(len, self.encoded.values()))
+
+
+class GameImages:
+    """
+        Изображения досок одной игры на момент хода seq
+    """
+
+    __slots__ = ('seq', 'finished', 'boards', 'last_access')
+
+    def __init__(self, seq: int):
+        self.seq:         int = seq
+        self.finished:    bool = False
+        self.boards:      Dict[Tuple[uuid.UUID, str], BoardImage] = {}
+        self.last_access: float = time.monotonic()
+
+    @property
+    def size(self) -> int:
+        return sum(board.size for board in self.boards.values())
+
+
+class ImageCache(metaclass=SingletonMeta):
+    """
+        Изображения досок активных игр.
+
+        Для каждой игры хранится отрисованное изображение досок и номер хода seq,
+        которому оно соответствует. Ход перерисовывает только обстрелянную клетку,
+        а закодированные изображения сбрасываются и кодируются заново при следующем запросе.
+        Если номер хода в памяти не совпадает с игрой (ходы прошли мимо кеша),
+        изображение рисуется заново.
+
+        Память ограничена max_bytes: вытесняются давно не запрашивавшиеся игры,
+        игры без запросов дольше idle_timeout выгружаются. У завершённых игр
+        хранятся только итоговые закодированные изображения.
+    """
+
+    def __init__(
+        self,
+        max_bytes:    int = config.IMAGE_CACHE_MAX_BYTES,
+        idle_timeout: int = config.IMAGE_CACHE_IDLE_TIMEOUT
+    ):
+        self.max_bytes = max_bytes
+        self.idle_timeout = idle_timeout
+
+        self._games: OrderedDict[uuid.UUID, GameImages] = OrderedDict()
+        self._bytes = 0
+
+        # Метрики
+        self._hits         = 0
+        self._misses       = 0
+        self._updates      = 0
+        self._evictions    = 0
+        self._not_modified = 0
+
+    def get(
+        self,
+        game_id:   uuid.UUID,
+        player_id: uuid.UUID,
+        seq:       int,
+        view:      str = VIEW_BOARD
+    ) -> Optional[BoardImage]:
+        """
+            Изображение для игрока, если оно соответствует ходу seq
+
+            :param game_id:   Идентификатор игры
+            :param player_id: Идентификатор игрока
+            :param seq:       Номер последнего хода игры
+            :param view:      Вид изображения из IMAGE_VIEWS
+            :return:          Изображение доски или None
+        """
+
+        self._evict_idle()
+
+        game = self._games.get(game_id)
+        board = game.boards.get((player_id, view)) if game and game.seq == seq else None
+
+        if board is None:
+            self._misses += 1
+            return None
+
+        game.last_access = time.monotonic()
+        self._games.move_to_end(game_id)
+        self._hits += 1
+
+        return board
+
+    def put(
+        self,
+        game_id:    uuid.UUID,
+        player_id:  uuid.UUID,
+        seq:        int,
+        board_size: int,
+        image:      Optional[Image.Image] = None,
+        view:       str = VIEW_BOARD
+    ) -> BoardImage:
+        """
+            Сохранение отрисованного изображения на момент хода seq
+
+            :param game_id:    Идентификатор игры
+            :param player_id:  Идентификатор игрока
+            :param seq:        Номер хода, по который отрисовано изображение
+            :param board_size: Размер доски
+            :param image:      Изображение (None, если нужны только форматы без Pillow)
+            :param view:       Вид изображения из IMAGE_VIEWS
+
+            :return: Изображение доски
+        """
+
+        game = self._games.get(game_id)
+
+        # Пока изображение рисовалось, в игре уже прошли новые ходы
+        if game is not None and game.seq > seq:
+            return BoardImage(board_size, image)
+
+        if game is None or game.seq != seq:
+            self._drop(game_id)
+
+            game = self._games[game_id] = GameImages(seq)
+
+        board = game.boards.get((player_id, view))
+
+        def store():
+            nonlocal board
+
+            if board is None:
+                board = game.boards[(player_id, view)] = BoardImage(board_size, image)
+            elif image is not None:
+                board.image = image
+
+        self._resize(game, store)
+
+        game.last_access = time.monotonic()
+        self._games.move_to_end(game_id)
+
+        return board
+
+    def put_encoded(self, game_id: uuid.UUID, seq: int, board: BoardImage, image_format: str, data: bytes):
+        """
+            Сохранение закодированного изображения, если доска не изменилась за время кодирования
+
+            :param game_id:      Идентификатор игры
+            :param seq:          Номер хода, по который закодировано изображение
+            :param board:        Изображение доски, которое кодировалось
+            :param image_format: Формат изображения
+            :param data:         Изображение в виде байтов
+        """
+
+        game = self._games.get(game_id)
+
+        if game is None or game.seq != seq or board not in game.boards.values():
+            return
+
+        def store():
+            board.encoded[image_format] = data
+
+            # У завершённой игры изображение больше не меняется, хватает закодированных
+            if game.finished:
+                board.image = None
+
+        self._resize(game, store)
+
+    def apply_shot(
+        self,
+        game_id:    uuid.UUID,
+        shooter_id: uuid.UUID,
+        target_id:  uuid.UUID,
+        seq:        int,
+        x:          int,
+        y:          int,
+        hit:        bool
+    ):
+        """
+            Обновление изображений после хода: на каждом затронутом изображении
+            перерисовывается одна клетка (доска цели на её изображениях
+            и панель противника на составном изображении стрелявшего)
+
+            :param game_id:    Идентификатор игры
+            :param shooter_id: Идентификатор стрелявшего игрока
+            :param target_id:  Идентификатор владельца обстрелянной доски
+            :param seq:        Номер этого хода
+            :param x:          Координата X выстрела
+            :param y:          Координата Y выстрела
+            :param hit:        Попадание
+        """
+
+        game = self._games.get(game_id)
+
+        if game is None:
+            return
+
+        if game.seq != seq - 1:
+            self._drop(game_id)
+            return
+
+        state = CELL_HIT if hit else CELL_MISS
+
+        def update():
+            game.seq = seq
+
+            for image_id, panel in (
+                ((target_id, VIEW_BOARD), 0),
+                ((target_id, VIEW_COMPOSITE), 0),
+                ((shooter_id, VIEW_COMPOSITE), 1)
+            ):
+                board = game.boards.get(image_id)
+
+                if board is None:
+                    continue
+
+                if board.image is None:
+                    del game.boards[image_id]
+                    continue
+
+                paste_cell(board.image, board.board_size, x, y, state, panel)
+                board.keys.clear()
+                board.encoded.clear()
+
+        self._resize(game, update)
+        self._updates += 1
+
+    def finish(self, game_id: uuid.UUID):
+        """
+            Завершение игры: отрисованные изображения больше не понадобятся,
+            остаются только закодированные
+
+            :param game_id: Идентификатор игры
+        """
+
+        game = self._games.get(game_id)
+
+        if game is None:
+            return
+
+        def release():
+            game.finished = True
+
+            for image_id, board in list(game.boards.items()):
+                if not board.encoded:
+                    del game.boards[image_id]
+                else:
+                    board.image = None
+
+        self._resize(game, release)
+
+    def not_modified(self):
+        """
+            Учёт ответа 304: клиенту хватило его копии изображения
+        """
+
+        self._not_modified += 1
+
+    @property
+    def metrics(self) -> Dict[str, int]:
+        """
+            Метрики кеша: размер, попадания/промахи, обновления по ходам, вытеснения и ответы 304
+        """
+
+        return {
+            "games":        len(self._games),
+            "bytes":        self._bytes,
+            "max_bytes":    self.max_bytes,
+            "hits":         self._hits,
+            "misses":       self._misses,
+            "updates":      self._updates,
+            "evictions":    self._evictions,
+            "not_modified": self._not_modified
+        }
+
+    def _resize(self, game: GameImages, change):
+        """
+            Изменение изображений игры с учётом занимаемой памяти и вытеснением старых игр
+        """
+
+        self._bytes -= game.size
+        change()
+        self._bytes += game.size
+
+        while self._bytes > self.max_bytes and len(self._games) > 1:
+            oldest = next(iter(self._games))
+
+            if self._games[oldest] is game:
+                self._games.move_to_end(oldest)
+                continue
+
+            self._drop(oldest)
+            self._evictions += 1
+
+    def _evict_idle(self):
+        """
+            Выгрузка игр без запросов дольше idle_timeout (игры упорядочены по времени запроса)
+        """
+
+        idle_before = time.monotonic() - self.idle_timeout
+
+        while self._games:
+            oldest = next(iter(self._games))
+
+            if self._games[oldest].last_access >= idle_before:
+                break
+
+            self._drop(oldest)
+            self._evictions += 1
+
+    def _drop(self, game_id: uuid.UUID):
+        game = self._games.pop(game_id, None)
+
+        if game is not None:
+            self._bytes -= game.size
+
+
+image_cache = ImageCache()
+
+
+__all__ = [
+    'VIEW_BOARD',
+    'VIEW_COMPOSITE',
+    'IMAGE_VIEWS',
+    'board_image_key',
+    'BoardImage',
+    'ImageCache',
+    'image_cache'
+]
@@ -0,0 +1,190 @@
+import asyncio
+import time
+
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, TypeVar
+
+from PIL import Image
+
+from src import config, logger
+from src.db.schemas import TGameBoardState, TShotsRecord
+from src.utils import SingletonMeta
+
+from .board_visualizer import encode_image, render_board, render_composite, warm_up
+
+
+T = TypeVar('T')
+
+
+class ImageRendererBusy(Exception):
+    """
+        Очередь отрисовки заполнена: запрос нужно повторить позже
+    """
+
+    def __init__(self, retry_after: int):
+        super().__init__("Очередь отрисовки изображений заполнена")
+        self.retry_after = retry_after
+
+
+class ImageRenderer(metaclass=SingletonMeta):
+    """
+        Отрисовка изображений досок вне цикла событий.
+
+        Pillow занимает процессор, поэтому отрисовка в самом обработчике запроса
+        останавливает все WebSocket-игры воркера. Изображения рисуются в пуле
+        процессов или потоков (IMAGE_RENDER_EXECUTOR), одновременно в работе
+        и в очереди не больше max_pending изображений. Сверх этого запросы
+        сразу отклоняются с ImageRendererBusy, а не копятся в очереди.
+    """
+
+    def __init__(
+        self,
+        executor:    str = config.IMAGE_RENDER_EXECUTOR,
+        workers:     int = config.IMAGE_RENDER_WORKERS,
+        max_pending: int = config.IMAGE_RENDER_MAX_PENDING,
+        retry_after: int = config.IMAGE_RENDER_RETRY_AFTER
+    ):
+        if executor not in ("process", "thread"):
+            raise ValueError(f"Неизвестный пул отрисовки: {executor}")
+
+        self.executor_kind = executor
+        self.workers = workers
+        self.max_pending = max(max_pending, workers)
+        self.retry_after = retry_after
+
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+
+        # Метрики
+        self._rendered       = 0
+        self._rejected       = 0
+        self._render_seconds = 0.0
+
+    def start(self):
+        """
+            Запуск пула отрисовки
+        """
+
+        if self._executor:
+            return
+
+        if self.executor_kind == "process":
+            # Слои стандартной доски рисуются в каждом процессе заранее
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=warm_up)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="board-image")
+
+        logger.info(
+            f"Пул отрисовки изображений запущен: {self.executor_kind}, "
+            f"воркеров {self.workers}, очередь {self.max_pending}"
+        )
+
+    def stop(self):
+        """
+            Остановка пула отрисовки
+        """
+
+        if self._executor:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def render_image(self, board: TGameBoardState, shots: TShotsRecord) -> Image.Image:
+        """
+            Отрисовка изображения доски без кодирования в пуле
+
+            :param board: Состояние игровой доски
+            :param shots: Запись выстрелов по доске
+
+            :raises ImageRendererBusy: Если очередь отрисовки заполнена
+            :return:                   Изображение
+        """
+
+        # Снимок выстрелов: пока изображение рисуется, по доске могут продолжать стрелять
+        return await self._submit(render_board, board, tuple(map(tuple, shots)))
+
+    async def render_composite(
+        self,
+        board:          TGameBoardState,
+        shots:          TShotsRecord,
+        opponent_board: TGameBoardState,
+        opponent_shots: TShotsRecord
+    ) -> Image.Image:
+        """
+            Отрисовка составного изображения (свой флот и вид на противника) без кодирования в пуле
+
+            :param board:          Доска игрока
+            :param shots:          Выстрелы противника по доске игрока
+            :param opponent_board: Доска противника
+            :param opponent_shots: Выстрелы игрока по доске противника
+
+            :raises ImageRendererBusy: Если очередь отрисовки заполнена
+            :return:                   Изображение
+        """
+
+        return await self._submit(
+            render_composite, board, tuple(map(tuple, shots)), opponent_board, tuple(map(tuple, opponent_shots))
+        )
+
+    async def encode(self, img: Image.Image, image_format: str = "png") -> bytes:
+        """
+            Кодирование изображения в пуле
+
+            :param img:          Изображение
+            :param image_format: Растровый формат: png или png8
+
+            :raises ImageRendererBusy: Если очередь отрисовки заполнена
+            :return:                   Изображение в виде байтов
+        """
+
+        # Копия: пока изображение кодируется, в него могут вноситься ходы
+        return await self._submit(encode_image, img.copy(), image_format)
+
+    async def _submit(self, func: Callable[..., T], *args) -> T:
+        """
+            Выполнение задачи отрисовки в пуле с ограничением очереди
+        """
+
+        if self._pending >= self.max_pending:
+            self._rejected += 1
+            raise ImageRendererBusy(self.retry_after)
+
+        if not self._executor:
+            self.start()
+
+        self._pending += 1
+        started = time.perf_counter()
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+        finally:
+            self._pending -= 1
+            self._rendered += 1
+            self._render_seconds += time.perf_counter() - started
+
+    @property
+    def metrics(self) -> Dict[str, float]:
+        """
+            Метрики отрисовки: занятость очереди, отклонённые запросы
+            и среднее время задачи (вместе с ожиданием в очереди)
+        """
+
+        return {
+            "executor":      self.executor_kind,
+            "workers":       self.workers,
+            "pending":       self._pending,
+            "max_pending":   self.max_pending,
+            "rendered":      self._rendered,
+            "rejected":      self._rejected,
+            "avg_render_ms": round(self._render_seconds / self._rendered * 1000, 2) if self._rendered else 0.0
+        }
+
+
+image_renderer = ImageRenderer()
+
+
+__all__ = [
+    'ImageRendererBusy',
+    'ImageRenderer',
+    'image_renderer'
+]
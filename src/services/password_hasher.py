@@ -0,0 +1,212 @@
+import asyncio
+import secrets
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple, TypeVar
+
+from src import config, logger
+from src.utils import SingletonMeta
+
+from .auth import get_password_hash, is_bcrypt_hash, password_needs_rehash, verify_password
+
+
+T = TypeVar('T')
+
+
+class PasswordHasherBusy(Exception):
+    """
+        Очередь хеширования паролей заполнена: запрос нужно повторить позже
+    """
+
+    def __init__(self, retry_after: int):
+        super().__init__("Очередь хеширования паролей заполнена")
+        self.retry_after = retry_after
+
+
+class PasswordHasher(metaclass=SingletonMeta):
+    """
+        Хеширование и проверка паролей вне цикла событий.
+
+        bcrypt занимает процессор на десятки-сотни миллисекунд (зависит от
+        PASSWORD_BCRYPT_ROUNDS), поэтому выполняется в отдельном пуле потоков
+        (bcrypt отпускает GIL). Одновременно в работе и в очереди не больше
+        max_pending паролей, сверх этого запросы сразу отклоняются
+        с PasswordHasherBusy. Прежние хеши salt:sha256 проверяются на месте,
+        а после успешного входа пересчитываются в bcrypt.
+    """
+
+    def __init__(
+        self,
+        workers:     int = config.PASSWORD_HASH_WORKERS,
+        max_pending: int = config.PASSWORD_HASH_MAX_PENDING,
+        retry_after: int = config.PASSWORD_HASH_RETRY_AFTER
+    ):
+        self.workers = workers
+        self.max_pending = max(max_pending, workers)
+        self.retry_after = retry_after
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+
+        # Хеш случайного пароля для проверки входа под несуществующим именем
+        self._dummy_hash: Optional[str] = None
+
+        # Метрики
+        self._hashed       = 0
+        self._verified     = 0
+        self._rehashed     = 0
+        self._rejected     = 0
+        self._tasks        = 0
+        self._hash_seconds = 0.0
+
+    def start(self):
+        """
+            Запуск пула хеширования
+        """
+
+        if self._executor:
+            return
+
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+
+        logger.info(
+            f"Пул хеширования паролей запущен: воркеров {self.workers}, очередь {self.max_pending}, "
+            f"стоимость bcrypt {config.PASSWORD_BCRYPT_ROUNDS}"
+        )
+
+    def stop(self):
+        """
+            Остановка пула хеширования
+        """
+
+        if self._executor:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def hash(self, password: str) -> str:
+        """
+            Хеширование пароля в пуле
+
+            :param password: Пароль
+
+            :raises PasswordHasherBusy: Если очередь хеширования заполнена
+            :return:                    Хеш пароля
+        """
+
+        hashed_password = await self._submit(get_password_hash, password)
+        self._hashed += 1
+
+        return hashed_password
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """
+            Проверка пароля: bcrypt - в пуле, прежние хеши - на месте
+
+            :param password:        Пароль
+            :param hashed_password: Сохранённый хеш
+
+            :raises PasswordHasherBusy: Если очередь хеширования заполнена
+            :return:                    Пароль верный
+        """
+
+        self._verified += 1
+
+        if not is_bcrypt_hash(hashed_password):
+            return verify_password(password, hashed_password)
+
+        return await self._submit(verify_password, password, hashed_password)
+
+    async def verify_unknown(self, password: str) -> bool:
+        """
+            Проверка пароля для несуществующего игрока по фиктивному bcrypt-хешу той же стоимости:
+            отказ занимает столько же времени, сколько проверка настоящего пароля,
+            и по времени ответа нельзя узнать, существует ли имя
+
+            :param password: Пароль
+
+            :raises PasswordHasherBusy: Если очередь хеширования заполнена
+            :return:                    Всегда False
+        """
+
+        if self._dummy_hash is None:
+            self._dummy_hash = await self._submit(get_password_hash, secrets.token_urlsafe(32))
+
+        await self.verify(password, self._dummy_hash)
+
+        return False
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+            Проверка пароля и новый хеш, если сохранённый устарел
+            (прежний salt:sha256 или bcrypt с другой стоимостью)
+
+            :param password:        Пароль
+            :param hashed_password: Сохранённый хеш
+
+            :raises PasswordHasherBusy: Если очередь хеширования заполнена
+            :return:                    Пароль верный и новый хеш (None, если пересчёт не нужен)
+        """
+
+        if not await self.verify(password, hashed_password):
+            return False, None
+
+        if not password_needs_rehash(hashed_password):
+            return True, None
+
+        new_hash = await self.hash(password)
+        self._rehashed += 1
+
+        return True, new_hash
+
+    async def _submit(self, func: Callable[..., T], *args) -> T:
+        """
+            Выполнение задачи в пуле с ограничением очереди
+        """
+
+        if self._pending >= self.max_pending:
+            self._rejected += 1
+            raise PasswordHasherBusy(self.retry_after)
+
+        if not self._executor:
+            self.start()
+
+        self._pending += 1
+        started = time.perf_counter()
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+        finally:
+            self._pending -= 1
+            self._tasks += 1
+            self._hash_seconds += time.perf_counter() - started
+
+    @property
+    def metrics(self) -> Dict[str, float]:
+        """
+            Метрики хеширования: занятость очереди, пересчитанные хеши,
+            отклонённые запросы и среднее время задачи (вместе с ожиданием в очереди)
+        """
+
+        return {
+            "bcrypt_rounds": config.PASSWORD_BCRYPT_ROUNDS,
+            "workers":       self.workers,
+            "pending":       self._pending,
+            "max_pending":   self.max_pending,
+            "hashed":        self._hashed,
+            "verified":      self._verified,
+            "rehashed":      self._rehashed,
+            "rejected":      self._rejected,
+            "avg_hash_ms":   round(self._hash_seconds / self._tasks * 1000, 2) if self._tasks else 0.0
+        }
+
+
+password_hasher = PasswordHasher()
+
+
+__all__ = [
+    'PasswordHasherBusy',
+    'PasswordHasher',
+    'password_hasher'
+]
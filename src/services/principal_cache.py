@@ -0,0 +1,187 @@
+import time
+import uuid
+
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+
+from src import config
+from src.core import database_client
+from src.db.models import Player
+from src.utils import SingletonMeta
+
+
+class PlayerPrincipal(NamedTuple):
+    """
+        Аутентифицированный игрок: лёгкая запись, не связанная с сессией базы данных
+    """
+
+    id:       uuid.UUID
+    username: str
+    is_bot:   bool
+
+
+class PrincipalCache(metaclass=SingletonMeta):
+    """
+        TTL+LRU кеш игроков по идентификатору из токена (sub).
+
+        Аутентификация запроса обращается к базе данных только при промахе.
+        Запись живёт не дольше ttl секунд, при переполнении вытесняются давно
+        не использованные. Изменение и удаление игрока через ORM сбрасывает
+        его запись (и ещё раз после фиксации транзакции), массовые UPDATE/DELETE
+        по таблице игроков сбрасывают весь кеш.
+    """
+
+    def __init__(self, max_size: int = config.PRINCIPAL_CACHE_SIZE, ttl: float = config.PRINCIPAL_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self._principals: OrderedDict[uuid.UUID, Tuple[float, PlayerPrincipal]] = OrderedDict()
+
+        # Метрики
+        self._hits          = 0
+        self._misses        = 0
+        self._expired       = 0
+        self._evictions     = 0
+        self._invalidations = 0
+
+    def get(self, player_id: uuid.UUID) -> Optional[PlayerPrincipal]:
+        """
+            Игрок из кеша
+
+            :param player_id: Идентификатор игрока
+            :return:          Запись игрока или None
+        """
+
+        entry = self._principals.get(player_id)
+
+        if entry is None:
+            self._misses += 1
+            return None
+
+        expires_at, principal = entry
+
+        if expires_at <= time.monotonic():
+            del self._principals[player_id]
+            self._expired += 1
+            self._misses += 1
+            return None
+
+        self._principals.move_to_end(player_id)
+        self._hits += 1
+
+        return principal
+
+    def put(self, principal: PlayerPrincipal):
+        """
+            Сохранение игрока в кеш
+
+            :param principal: Запись игрока
+        """
+
+        self._principals[principal.id] = (time.monotonic() + self.ttl, principal)
+        self._principals.move_to_end(principal.id)
+
+        while len(self._principals) > self.max_size:
+            self._principals.popitem(last=False)
+            self._evictions += 1
+
+    def invalidate(self, player_id: Optional[uuid.UUID] = None):
+        """
+            Сброс записи игрока или всего кеша
+
+            :param player_id: Идентификатор игрока (None - сбросить всё)
+        """
+
+        if player_id is None:
+            self._principals.clear()
+        else:
+            self._principals.pop(player_id, None)
+
+        self._invalidations += 1
+
+    async def load(self, player_id: uuid.UUID) -> Optional[PlayerPrincipal]:
+        """
+            Игрок из кеша, а при промахе - из базы данных
+
+            :param player_id: Идентификатор игрока
+            :return:          Запись игрока или None, если игрок не найден
+        """
+
+        principal = self.get(player_id)
+
+        if principal is not None:
+            return principal
+
+        async with database_client.get_session() as db:
+            row = (
+                await db.execute(select(Player.id, Player.username, Player.is_bot).where(Player.id == player_id))
+            ).one_or_none()
+
+        if row is None:
+            return None
+
+        principal = PlayerPrincipal(row.id, row.username, row.is_bot)
+        self.put(principal)
+
+        return principal
+
+    @property
+    def metrics(self) -> Dict[str, float]:
+        """
+            Метрики кеша: размер, доля попаданий, истёкшие, вытесненные и сброшенные записи
+        """
+
+        requests = self._hits + self._misses
+
+        return {
+            "size":          len(self._principals),
+            "max_size":      self.max_size,
+            "hits":          self._hits,
+            "misses":        self._misses,
+            "hit_rate":      round(self._hits / requests, 4) if requests else 0.0,
+            "expired":       self._expired,
+            "evictions":     self._evictions,
+            "invalidations": self._invalidations
+        }
+
+
+principal_cache = PrincipalCache()
+
+
+# Игроки, изменённые в транзакции сессии: сбрасываются ещё раз после фиксации,
+# чтобы запрос, успевший между flush и commit, не вернул в кеш старые данные
+_CHANGED_PLAYERS = "changed_players"
+
+
+@event.listens_for(Player, "after_update")
+@event.listens_for(Player, "after_delete")
+def _invalidate_changed_player(mapper, connection, target: Player):
+    principal_cache.invalidate(target.id)
+
+    session = object_session(target)
+
+    if session is not None:
+        session.info.setdefault(_CHANGED_PLAYERS, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_players(session: Session):
+    for player_id in session.info.pop(_CHANGED_PLAYERS, ()):
+        principal_cache.invalidate(player_id)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _invalidate_bulk_players(orm_execute_state):
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and orm_execute_state.bind_mapper is not None:
+        if orm_execute_state.bind_mapper.class_ is Player:
+            principal_cache.invalidate()
+
+
+__all__ = [
+    'PlayerPrincipal',
+    'PrincipalCache',
+    'principal_cache'
+]
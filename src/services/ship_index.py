@@ -0,0 +1,92 @@
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+from src import config
+from src.db.schemas import TGameBoardState, TShotsRecord
+
+from .board_generator import generate_board_from_seed
+
+
+class ShipIndex:
+    """
+        Индекс кораблей доски: номер корабля -> его клетки.
+
+        Строится один раз на расстановку (O(размер доски)) и дальше не меняется,
+        поэтому общий для всех читателей доски.
+    """
+
+    __slots__ = ('cells',)
+
+    def __init__(self, board: TGameBoardState):
+        cells: Dict[int, List[Tuple[int, int]]] = {}
+
+        for y, row in enumerate(board):
+            for x, ship_id in enumerate(row):
+                if ship_id > 0:
+                    cells.setdefault(ship_id, []).append((x, y))
+
+        self.cells: Dict[int, Tuple[Tuple[int, int], ...]] = {
+            ship_id: tuple(ship_cells) for ship_id, ship_cells in cells.items()
+        }
+
+    def ship_cells(self, ship_id: int) -> Tuple[Tuple[int, int], ...]:
+        """
+            Клетки корабля
+
+            :param ship_id: Номер корабля
+            :return:        Координаты (x, y) клеток корабля
+        """
+
+        return self.cells[ship_id]
+
+
+class ShipHits:
+    """
+        Счётчики оставшихся неподбитыми клеток каждого корабля.
+
+        Считаются по записи выстрелов только по клеткам кораблей (O(размер флота)),
+        после чего попадание и проверка потопления - O(1).
+    """
+
+    __slots__ = ('index', 'remaining')
+
+    def __init__(self, index: ShipIndex, shots: TShotsRecord):
+        self.index = index
+        self.remaining: Dict[int, int] = {
+            ship_id: sum(1 for x, y in ship_cells if not shots[y][x])
+            for ship_id, ship_cells in index.cells.items()
+        }
+
+    def register_hit(self, ship_id: int) -> bool:
+        """
+            Учёт попадания в ещё не подбитую клетку корабля
+
+            :param ship_id: Номер корабля
+            :return:        True, если корабль потоплен этим попаданием
+        """
+
+        self.remaining[ship_id] -= 1
+
+        return self.remaining[ship_id] == 0
+
+
+@lru_cache(maxsize=config.BOARD_CACHE_SIZE)
+def get_ship_index(seed: int, version: int, board_size: int, fleet: Tuple[int, ...]) -> ShipIndex:
+    """
+        Индекс кораблей доски, построенной из зерна (строится один раз на расстановку)
+
+        :param seed:       Зерно доски
+        :param version:    Версия алгоритма построения
+        :param board_size: Размер доски
+        :param fleet:      Размеры кораблей
+        :return:           Индекс кораблей
+    """
+
+    return ShipIndex(generate_board_from_seed(seed, version, board_size, fleet))
+
+
+__all__ = [
+    'ShipIndex',
+    'ShipHits',
+    'get_ship_index'
+]
@@ -0,0 +1,417 @@
+"""
+    Безголовая симуляция игр бот против бота (без FastAPI и базы данных).
+
+    Доски строятся generate_random_board, выстрелы применяются apply_shot из game_logic,
+    поэтому симуляция играет по тем же правилам, что и сервер: при промахе ход
+    переходит к противнику, победа - когда у противника не осталось кораблей.
+
+    Игры раздаются пачками в ProcessPoolExecutor на все ядра, результаты
+    (ходы, победитель, число выстрелов) пишутся построчно в NDJSON.
+
+    Запуск: python -m src.services.simulation --games 100000 [--workers N] [--output games.ndjson]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, TextIO, Type
+
+import numpy as np
+
+from src.db.enums import ShotResult
+from src.db.schemas import TGameBoardState, TShotsRecord
+
+from .bot import choose_target
+from .board_generator import BOARD_SIZE, SHIPS, check_fleet_fits, generate_random_board
+from .game_logic import apply_shot
+from .ship_index import ShipIndex, ShipHits
+
+
+TCell = Tuple[int, int]
+
+
+class Shooter(ABC):
+    """
+        Бот симуляции: выбирает клетки для выстрелов и учитывает их результаты.
+
+        Размеры кораблей противника известны обоим игрокам по правилам, поэтому
+        каждый бот получает флот при создании; учитывать его или нет, решает бот
+        (DensityShooter строит по нему карту плотности, случайным ботам он не нужен).
+    """
+
+    def __init__(self, board_size: int, rng: random.Random, fleet: Sequence[int] = SHIPS):
+        self.board_size = board_size
+        self.fleet: Tuple[int, ...] = tuple(fleet)
+
+    @abstractmethod
+    def next_shot(self) -> TCell:
+        """
+            Выбор клетки для следующего выстрела
+
+            :return: Координаты (x, y)
+        """
+
+    @abstractmethod
+    def record(self, x: int, y: int, hit: bool, sunk_cells: Sequence[TCell]):
+        """
+            Учёт результата выстрела
+
+            :param x:          Координата X выстрела
+            :param y:          Координата Y выстрела
+            :param hit:        Попадание
+            :param sunk_cells: Клетки потопленного этим выстрелом корабля (пусто, если не потоплен)
+        """
+
+
+class RandomShooter(Shooter):
+    """
+        Бот, стреляющий по необстрелянным клеткам в случайном порядке
+    """
+
+    def __init__(self, board_size: int, rng: random.Random, fleet: Sequence[int] = SHIPS):
+        super().__init__(board_size, rng, fleet)
+
+        self.order: List[TCell] = [(x, y) for y in range(board_size) for x in range(board_size)]
+        rng.shuffle(self.order)
+
+        self.shots: TShotsRecord = [[False] * board_size for _ in range(board_size)]
+
+    def next_shot(self) -> TCell:
+        while True:
+            x, y = self.order.pop()
+
+            if not self.shots[y][x]:
+                return x, y
+
+    def record(self, x: int, y: int, hit: bool, sunk_cells: Sequence[TCell]):
+        self.shots[y][x] = True
+
+
+class HuntTargetShooter(RandomShooter):
+    """
+        Бот «охота и добивание»: стреляет случайно, а после попадания - по соседним клеткам.
+        Клетки вокруг потопленного корабля пропускаются: по правилам там кораблей нет.
+    """
+
+    def __init__(self, board_size: int, rng: random.Random, fleet: Sequence[int] = SHIPS):
+        super().__init__(board_size, rng, fleet)
+
+        self.targets: List[TCell] = []
+
+    def next_shot(self) -> TCell:
+        while self.targets:
+            x, y = self.targets.pop()
+
+            if not self.shots[y][x]:
+                return x, y
+
+        return super().next_shot()
+
+    def record(self, x: int, y: int, hit: bool, sunk_cells: Sequence[TCell]):
+        self.shots[y][x] = True
+
+        size = self.board_size
+
+        if sunk_cells:
+            self.targets.clear()
+
+            for cx, cy in sunk_cells:
+                for ny in range(max(0, cy - 1), min(size, cy + 2)):
+                    for nx in range(max(0, cx - 1), min(size, cx + 2)):
+                        self.shots[ny][nx] = True
+
+        elif hit:
+            for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+                if 0 <= nx < size and 0 <= ny < size and not self.shots[ny][nx]:
+                    self.targets.append((nx, ny))
+
+
+class DensityShooter(Shooter):
+    """
+        Бот с картой плотности вероятности (тот же выбор клетки, что у серверного бота)
+    """
+
+    def __init__(self, board_size: int, rng: random.Random, fleet: Sequence[int] = SHIPS):
+        super().__init__(board_size, rng, fleet)
+
+        self.rng = np.random.default_rng(rng.getrandbits(64))
+
+        cells_count = board_size * board_size
+        self.shot = np.zeros(cells_count, dtype=bool)
+        self.hits = np.zeros(cells_count, dtype=bool)
+        self.blocked = np.zeros(cells_count, dtype=bool)
+        self.lengths: List[int] = list(self.fleet)
+
+    def next_shot(self) -> TCell:
+        cell = choose_target(self.board_size, self.shot, self.hits, self.blocked, self.lengths, self.rng)
+
+        return cell % self.board_size, cell // self.board_size
+
+    def record(self, x: int, y: int, hit: bool, sunk_cells: Sequence[TCell]):
+        size = self.board_size
+        cell = y * size + x
+
+        self.shot[cell] = True
+
+        if sunk_cells:
+            self.lengths.remove(len(sunk_cells))
+
+            for cx, cy in sunk_cells:
+                self.hits[cy * size + cx] = False
+
+                for ny in range(max(0, cy - 1), min(size, cy + 2)):
+                    for nx in range(max(0, cx - 1), min(size, cx + 2)):
+                        self.blocked[ny * size + nx] = True
+
+        elif hit:
+            self.hits[cell] = True
+
+        else:
+            self.blocked[cell] = True
+
+
+SHOOTERS: Dict[str, Type[Shooter]] = {
+    "random":  RandomShooter,
+    "hunt":    HuntTargetShooter,
+    "density": DensityShooter
+}
+
+
+def play_game(
+    seed:         int,
+    board_size:   int = BOARD_SIZE,
+    fleet:        Sequence[int] = SHIPS,
+    shooters:     Sequence[str] = ("hunt", "hunt"),
+    record_moves: bool = True
+) -> Dict:
+    """
+        Симуляция одной игры от расстановки до победы
+
+        :param seed:         Зерно игры (доски и решения ботов воспроизводимы)
+        :param board_size:   Размер доски
+        :param fleet:        Размеры кораблей
+        :param shooters:     Боты первого и второго игрока (ключи SHOOTERS)
+        :param record_moves: Записывать ли ходы в результат
+
+        :return: Результат игры: зерно, победитель (1 или 2), число выстрелов и ходы
+                 [<игрок>, x, y, <результат>]
+    """
+
+    rng = random.Random(seed)
+
+    boards: List[TGameBoardState] = [generate_random_board(rng, board_size, fleet) for _ in range(2)]
+    indexes = [ShipIndex(board) for board in boards]
+
+    # shots[i] - выстрелы по доске игрока i
+    shots: List[TShotsRecord] = [[[False] * board_size for _ in range(board_size)] for _ in range(2)]
+    ship_hits = [ShipHits(indexes[i], shots[i]) for i in range(2)]
+    ships_remaining = [len(fleet), len(fleet)]
+
+    players = [SHOOTERS[name](board_size, rng, fleet) for name in shooters]
+    player_shots = [0, 0]
+    moves = []
+
+    turn = 0
+
+    while True:
+        target = 1 - turn
+        x, y = players[turn].next_shot()
+
+        result = apply_shot(boards[target], shots[target], ship_hits[target], x, y)
+
+        if result is None:
+            raise RuntimeError(f"Бот {shooters[turn]} выбрал некорректную клетку ({x}, {y})")
+
+        hit, sunk = result
+        player_shots[turn] += 1
+
+        sunk_cells = indexes[target].ship_cells(boards[target][y][x]) if sunk else ()
+        players[turn].record(x, y, hit, sunk_cells)
+
+        if record_moves:
+            shot_result = ShotResult.SUNK if sunk else ShotResult.HIT if hit else ShotResult.MISS
+            moves.append([turn + 1, x, y, shot_result.value])
+
+        if sunk:
+            ships_remaining[target] -= 1
+
+            if ships_remaining[target] == 0:
+                break
+
+        # Ход переходит к противнику при промахе
+        if not hit:
+            turn = target
+
+    game = {
+        "seed":         seed,
+        "winner":       turn + 1,
+        "shots":        player_shots[0] + player_shots[1],
+        "player_shots": player_shots
+    }
+
+    if record_moves:
+        game["moves"] = moves
+
+    return game
+
+
+def _play_chunk(
+    seeds:        Sequence[int],
+    board_size:   int,
+    fleet:        Tuple[int, ...],
+    shooters:     Tuple[str, ...],
+    record_moves: bool
+) -> List[Tuple[int, int, str]]:
+    """
+        Симуляция пачки игр в процессе-воркере; результаты сериализуются в NDJSON здесь же,
+        чтобы не нагружать основной процесс
+    """
+
+    results = []
+
+    for seed in seeds:
+        game = play_game(seed, board_size, fleet, shooters, record_moves)
+        results.append((game["winner"], game["shots"], json.dumps(game, separators=(",", ":"))))
+
+    return results
+
+
+def simulate(
+    games:        int,
+    seed:         Optional[int] = None,
+    workers:      Optional[int] = None,
+    chunk_size:   int = 200,
+    board_size:   int = BOARD_SIZE,
+    fleet:        Sequence[int] = SHIPS,
+    shooters:     Sequence[str] = ("hunt", "hunt"),
+    record_moves: bool = True
+) -> Iterator[Tuple[int, int, str]]:
+    """
+        Симуляция игр на всех ядрах. Результаты отдаются по мере готовности пачек
+        в порядке номеров игр.
+
+        :param games:        Количество игр
+        :param seed:         Базовое зерно (зерно игры i - seed + i)
+        :param workers:      Количество процессов (по умолчанию - число ядер)
+        :param chunk_size:   Количество игр в одной задаче воркера
+        :param board_size:   Размер доски
+        :param fleet:        Размеры кораблей
+        :param shooters:     Боты первого и второго игрока
+        :param record_moves: Записывать ли ходы
+
+        :return: Итератор Tuple[<победитель>, <число выстрелов>, <строка NDJSON>] по игре
+    """
+
+    for name in shooters:
+        if name not in SHOOTERS:
+            raise ValueError(f"Неизвестный бот: {name}")
+
+    if seed is None:
+        seed = random.getrandbits(32)
+
+    chunks = [range(seed + start, seed + min(start + chunk_size, games)) for start in range(0, games, chunk_size)]
+
+    play_chunk = partial(
+        _play_chunk,
+        board_size=board_size,
+        fleet=tuple(fleet),
+        shooters=tuple(shooters),
+        record_moves=record_moves
+    )
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        for results in executor.map(play_chunk, chunks):
+            yield from results
+
+
+def run(args: argparse.Namespace, output: TextIO) -> Dict[str, float]:
+    """
+        Запуск симуляции с записью NDJSON и подсчётом статистики
+
+        :param args:   Аргументы командной строки
+        :param output: Поток для строк NDJSON
+        :return:       Статистика: игры, время, игр в секунду, победы и среднее число выстрелов
+    """
+
+    started = time.perf_counter()
+
+    wins = [0, 0]
+    shots = 0
+    games = 0
+
+    for winner, game_shots, line in simulate(
+        args.games, args.seed, args.workers, args.chunk_size,
+        args.size, args.fleet, args.shooters, not args.no_moves
+    ):
+        output.write(line)
+        output.write("\n")
+
+        wins[winner - 1] += 1
+        shots += game_shots
+        games += 1
+
+    seconds = time.perf_counter() - started
+
+    return {
+        "games":         games,
+        "seconds":       round(seconds, 2),
+        "games_per_sec": round(games / seconds, 1) if seconds else 0.0,
+        "player1_wins":  wins[0],
+        "player2_wins":  wins[1],
+        "avg_shots":     round(shots / games, 1) if games else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=10000, help="Количество игр")
+    parser.add_argument("--seed", type=int, default=None, help="Базовое зерно для воспроизводимости")
+    parser.add_argument("--workers", type=int, default=None, help="Количество процессов (по умолчанию - число ядер)")
+    parser.add_argument("--chunk-size", type=int, default=200, help="Игр в одной задаче воркера")
+    parser.add_argument("--size", type=int, default=BOARD_SIZE, help="Размер доски")
+    parser.add_argument("--fleet", type=int, nargs="*", default=None, help="Размеры кораблей")
+    parser.add_argument(
+        "--shooters", nargs=2, default=["hunt", "hunt"], choices=sorted(SHOOTERS), help="Боты первого и второго игрока"
+    )
+    parser.add_argument("--no-moves", action="store_true", help="Не записывать ходы (только итоги игр)")
+    parser.add_argument("--output", default="-", help="Файл NDJSON (по умолчанию - stdout)")
+
+    args = parser.parse_args()
+
+    # Правила игры: корабли размещаются от больших к меньшим
+    args.fleet = sorted(args.fleet or SHIPS, reverse=True)
+
+    fleet_error = check_fleet_fits(args.size, args.fleet)
+
+    if fleet_error:
+        parser.error(fleet_error)
+
+    if args.output == "-":
+        stats = run(args, sys.stdout)
+    else:
+        with open(args.output, "w", encoding="utf-8") as output:
+            stats = run(args, output)
+
+    print(json.dumps(stats), file=sys.stderr)
+
+
+__all__ = [
+    'Shooter',
+    'RandomShooter',
+    'HuntTargetShooter',
+    'DensityShooter',
+    'SHOOTERS',
+    'play_game',
+    'simulate'
+]
+
+
+if __name__ == "__main__":
+    main()
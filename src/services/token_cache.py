@@ -0,0 +1,116 @@
+import hashlib
+import time
+
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from src import config
+from src.utils import SingletonMeta
+
+
+class TokenCache(metaclass=SingletonMeta):
+    """
+        Кеш уже проверенных JWT-токенов.
+
+        Клиенты опрашивают сервер с одним и тем же токеном, поэтому разбор
+        и проверка подписи повторяются впустую. Проверенный токен хранится
+        по хешу (сам токен в памяти не держится) вместе с полезной нагрузкой
+        до момента exp, после чего запись считается недействительной.
+        При переполнении вытесняются давно не использованные токены.
+        Токены без exp не кешируются.
+    """
+
+    def __init__(self, max_size: int = config.TOKEN_CACHE_SIZE):
+        self.max_size = max_size
+
+        self._tokens: OrderedDict[bytes, Tuple[float, dict]] = OrderedDict()
+
+        # Метрики
+        self._hits      = 0
+        self._misses    = 0
+        self._expired   = 0
+        self._evictions = 0
+
+    def get(self, token: str) -> Optional[dict]:
+        """
+            Полезная нагрузка проверенного токена
+
+            :param token: JWT-токен
+            :return:      Копия полезной нагрузки или None, если токена нет в кеше или он истёк
+        """
+
+        key = self._key(token)
+        entry = self._tokens.get(key)
+
+        if entry is None:
+            self._misses += 1
+            return None
+
+        expires_at, payload = entry
+
+        if expires_at <= time.time():
+            del self._tokens[key]
+            self._expired += 1
+            self._misses += 1
+            return None
+
+        self._tokens.move_to_end(key)
+        self._hits += 1
+
+        return dict(payload)
+
+    def put(self, token: str, payload: dict):
+        """
+            Сохранение проверенного токена
+
+            :param token:   JWT-токен
+            :param payload: Полезная нагрузка после проверки подписи и срока действия
+        """
+
+        expires_at = payload.get("exp")
+
+        if self.max_size <= 0 or not isinstance(expires_at, (int, float)):
+            return
+
+        key = self._key(token)
+
+        self._tokens[key] = (float(expires_at), dict(payload))
+        self._tokens.move_to_end(key)
+
+        while len(self._tokens) > self.max_size:
+            self._tokens.popitem(last=False)
+            self._evictions += 1
+
+    def clear(self):
+        self._tokens.clear()
+
+    @property
+    def metrics(self) -> Dict[str, float]:
+        """
+            Метрики кеша: размер, доля попаданий, истёкшие и вытесненные токены
+        """
+
+        requests = self._hits + self._misses
+
+        return {
+            "size":      len(self._tokens),
+            "max_size":  self.max_size,
+            "hits":      self._hits,
+            "misses":    self._misses,
+            "hit_rate":  round(self._hits / requests, 4) if requests else 0.0,
+            "expired":   self._expired,
+            "evictions": self._evictions
+        }
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+token_cache = TokenCache()
+
+
+__all__ = [
+    'TokenCache',
+    'token_cache'
+]
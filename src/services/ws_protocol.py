@@ -0,0 +1,312 @@
+import json
+import struct
+import uuid
+
+from itertools import chain
+from types import MappingProxyType
+
+import numpy as np
+
+from typing import Dict, Iterable, Mapping, Optional, Tuple, Union
+
+from src.db.enums import ShotResult
+from src.schemas.websocket import WSMessageType
+
+
+TFrame = Union[str, bytes]
+
+
+class ProtocolError(ValueError):
+    """ Кадр не разбирается протоколом (сообщение передаётся игроку, соединение остаётся открытым) """
+
+
+class JsonProtocol:
+    """
+        Текстовый протокол по умолчанию: сообщения в JSON
+    """
+
+    name = "battleship.json"
+    binary = False
+
+    @staticmethod
+    def encode(message: dict) -> str:
+        # Так же, как WebSocket.send_json
+        return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+    @staticmethod
+    def decode(frame: TFrame) -> dict:
+        try:
+            message = json.loads(frame)
+        except ValueError:
+            raise ProtocolError("Некорректное сообщение: ожидался JSON")
+
+        if not isinstance(message, dict):
+            raise ProtocolError("Некорректное сообщение: ожидался объект JSON")
+
+        return message
+
+
+# Коды типов сообщений и результатов выстрела в бинарных кадрах - часть протокола:
+# не зависят от порядка членов перечислений, коды не меняются и не переиспользуются
+MESSAGE_CODES: Mapping[WSMessageType, int] = MappingProxyType({
+    WSMessageType.START_GAME: 1,
+    WSMessageType.MOVE:       2,
+    WSMessageType.GAME_STATE: 3,
+    WSMessageType.GAME_DELTA: 4,
+    WSMessageType.RESYNC:     5,
+    WSMessageType.GAME_OVER:  6,
+    WSMessageType.ERROR:      7,
+    WSMessageType.CONNECTED:  8
+})
+MESSAGE_TYPES: Mapping[int, WSMessageType] = MappingProxyType(
+    {code: message_type for message_type, code in MESSAGE_CODES.items()}
+)
+
+RESULT_CODES: Mapping[ShotResult, int] = MappingProxyType({ShotResult.MISS: 0, ShotResult.HIT: 1, ShotResult.SUNK: 2})
+RESULTS: Mapping[int, ShotResult] = MappingProxyType({code: result for result, code in RESULT_CODES.items()})
+
+# Флаги заголовка: за ним идут данные сообщения (data) и/или текст (message, UTF-8 до конца кадра)
+FLAG_DATA = 1
+FLAG_MESSAGE = 2
+
+HEADER = struct.Struct("<BB")                 # тип, флаги
+MOVE = struct.Struct("<BB")                   # x, y
+STATE = struct.Struct("<I16s16sBBHH")         # seq, игра, чей ход, размер доски, байт на клетку доски, корабли
+DELTA = struct.Struct("<IBBB16sB")            # seq, x, y, результат, чей ход, число клеток потопленного корабля
+GAME_OVER = struct.Struct("<16s")             # победитель
+
+NO_PLAYER = bytes(16)
+
+
+def _uuid_bytes(value: Optional[str]) -> bytes:
+    return uuid.UUID(value).bytes if value else NO_PLAYER
+
+
+def _uuid_str(value: bytes) -> Optional[str]:
+    return str(uuid.UUID(bytes=value)) if value != NO_PLAYER else None
+
+
+def _pack_bits(grid) -> bytes:
+    return np.packbits(np.fromiter(chain.from_iterable(grid), dtype=bool, count=len(grid) * len(grid))).tobytes()
+
+
+def _pack_board(board) -> Tuple[int, bytes]:
+    """ Доска по байту на клетку, если номера кораблей помещаются в байт, иначе по два """
+
+    try:
+        return 1, bytes(chain.from_iterable(board))
+    except ValueError:
+        return 2, np.asarray(board, dtype="<u2").tobytes()
+
+
+def _unpack_bits(data: bytes, board_size: int) -> list:
+    bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8), count=board_size * board_size)
+
+    return bits.astype(bool).reshape(board_size, board_size).tolist()
+
+
+class BinaryProtocol:
+    """
+        Компактный бинарный протокол (подпротокол battleship.bin).
+
+        Кадр: заголовок (тип, флаги), затем данные сообщения фиксированной
+        структуры и текст сообщения в UTF-8. Записи выстрелов упакованы
+        по биту на клетку, доска - байт (или два на больших досках) на клетку,
+        идентификаторы - 16 байт UUID. Результат декодирования совпадает
+        с сообщением JSON-протокола.
+    """
+
+    name = "battleship.bin"
+    binary = True
+
+    @classmethod
+    def encode(cls, message: dict) -> bytes:
+        message_type = WSMessageType(message["type"])
+        data = message.get("data")
+        text = message.get("message")
+
+        # Текст сообщения о победе передаётся вместе с данными
+        if message_type == WSMessageType.GAME_OVER and data is not None:
+            text = data.get("message")
+
+        flags = (FLAG_DATA if data is not None else 0) | (FLAG_MESSAGE if text is not None else 0)
+        parts = [HEADER.pack(MESSAGE_CODES[message_type], flags)]
+
+        if data is not None:
+            if message_type == WSMessageType.GAME_DELTA:
+                parts.append(cls._encode_delta(data))
+            elif message_type == WSMessageType.GAME_STATE:
+                parts.append(cls._encode_state(data))
+            elif message_type == WSMessageType.MOVE:
+                parts.append(MOVE.pack(data["x"], data["y"]))
+            elif message_type == WSMessageType.GAME_OVER:
+                parts.append(GAME_OVER.pack(_uuid_bytes(data["winner_id"])))
+            else:
+                raise ValueError(f"Сообщение {message_type.value} не передаёт данных")
+
+        if text is not None:
+            parts.append(text.encode())
+
+        return b"".join(parts)
+
+    @classmethod
+    def decode(cls, frame: TFrame) -> dict:
+        if isinstance(frame, str):
+            raise ProtocolError("Некорректное сообщение: ожидался бинарный кадр")
+
+        if len(frame) < HEADER.size:
+            raise ProtocolError("Некорректное сообщение: кадр короче заголовка")
+
+        code, flags = HEADER.unpack_from(frame)
+        message_type = MESSAGE_TYPES.get(code)
+
+        if message_type is None:
+            raise ProtocolError(f"Неизвестный тип сообщения: {code}")
+
+        offset = HEADER.size
+
+        message = {"type": message_type.value}
+        data = None
+
+        try:
+            if flags & FLAG_DATA:
+                if message_type == WSMessageType.GAME_DELTA:
+                    data, offset = cls._decode_delta(frame, offset)
+                elif message_type == WSMessageType.GAME_STATE:
+                    data, offset = cls._decode_state(frame, offset)
+                elif message_type == WSMessageType.MOVE:
+                    x, y = MOVE.unpack_from(frame, offset)
+                    data, offset = {"x": x, "y": y}, offset + MOVE.size
+                elif message_type == WSMessageType.GAME_OVER:
+                    winner, = GAME_OVER.unpack_from(frame, offset)
+                    data, offset = {"winner_id": _uuid_str(winner)}, offset + GAME_OVER.size
+                else:
+                    raise ProtocolError(f"Сообщение {message_type.value} не передаёт данных")
+
+            text = frame[offset:].decode() if flags & FLAG_MESSAGE else None
+
+        except ProtocolError:
+            raise
+
+        except (struct.error, KeyError, ValueError) as e:
+            # Обрезанные данные, неизвестный результат выстрела, текст не в UTF-8
+            raise ProtocolError(f"Некорректное сообщение {message_type.value}: {e}") from e
+
+        if message_type == WSMessageType.GAME_OVER and data is not None:
+            data["message"] = text
+        elif text is not None:
+            message["message"] = text
+
+        if data is not None:
+            message["data"] = data
+
+        return message
+
+    @staticmethod
+    def _encode_state(data: dict) -> bytes:
+        board = data["your_board"]
+        cell_bytes, board_bytes = _pack_board(board)
+
+        return b"".join((
+            STATE.pack(
+                data["seq"],
+                _uuid_bytes(data["game_id"]),
+                _uuid_bytes(data["turn_player_id"]),
+                len(board),
+                cell_bytes,
+                data["ships_remaining"],
+                data["opponent_ships_remaining"]
+            ),
+            board_bytes,
+            _pack_bits(data["opponent_shots"]),
+            _pack_bits(data["your_shots"])
+        ))
+
+    @staticmethod
+    def _decode_state(frame: bytes, offset: int) -> Tuple[dict, int]:
+        seq, game_id, turn, board_size, cell_bytes, ships_remaining, opponent_ships_remaining = STATE.unpack_from(
+            frame, offset
+        )
+        offset += STATE.size
+
+        cells = board_size * board_size
+        board = np.frombuffer(frame, dtype=np.dtype(f"<u{cell_bytes}"), count=cells, offset=offset)
+        offset += cells * cell_bytes
+
+        shots_bytes = (cells + 7) // 8
+        opponent_shots = _unpack_bits(frame[offset:offset + shots_bytes], board_size)
+        your_shots = _unpack_bits(frame[offset + shots_bytes:offset + 2 * shots_bytes], board_size)
+        offset += 2 * shots_bytes
+
+        return {
+            "game_id":                  _uuid_str(game_id),
+            "seq":                      seq,
+            "turn_player_id":           _uuid_str(turn),
+            "your_board":               board.reshape(board_size, board_size).tolist(),
+            "opponent_shots":           opponent_shots,
+            "your_shots":               your_shots,
+            "ships_remaining":          ships_remaining,
+            "opponent_ships_remaining": opponent_ships_remaining
+        }, offset
+
+    @staticmethod
+    def _encode_delta(data: dict) -> bytes:
+        x, y = data["cell"]
+        sunk_cells = data["sunk_ship_cells"]
+
+        return DELTA.pack(
+            data["seq"], x, y, RESULT_CODES[ShotResult(data["result"])], _uuid_bytes(data["turn"]), len(sunk_cells)
+        ) + bytes(coord for cell in sunk_cells for coord in cell)
+
+    @staticmethod
+    def _decode_delta(frame: bytes, offset: int) -> Tuple[dict, int]:
+        seq, x, y, result, turn, count = DELTA.unpack_from(frame, offset)
+        offset += DELTA.size
+
+        coords = frame[offset:offset + 2 * count]
+        offset += 2 * count
+
+        return {
+            "seq":             seq,
+            "cell":            [x, y],
+            "result":          RESULTS[result].value,
+            "sunk_ship_cells": [[coords[i], coords[i + 1]] for i in range(0, len(coords), 2)],
+            "turn":            _uuid_str(turn)
+        }, offset
+
+
+TProtocol = Union[type[JsonProtocol], type[BinaryProtocol]]
+
+# Подпротоколы Sec-WebSocket-Protocol
+WS_PROTOCOLS: Dict[str, TProtocol] = {
+    JsonProtocol.name:   JsonProtocol,
+    BinaryProtocol.name: BinaryProtocol
+}
+
+
+def negotiate_protocol(offered: Iterable[str]) -> Tuple[TProtocol, Optional[str]]:
+    """
+        Выбор протокола по заголовку Sec-WebSocket-Protocol (первый поддерживаемый из предложенных клиентом)
+
+        :param offered: Подпротоколы, предложенные клиентом, в порядке предпочтения
+        :return:        Протокол и подпротокол для ответа (None, если клиент ничего не предложил)
+    """
+
+    for name in offered:
+        protocol = WS_PROTOCOLS.get(name)
+
+        if protocol is not None:
+            return protocol, name
+
+    return JsonProtocol, None
+
+
+__all__ = [
+    'TFrame',
+    'TProtocol',
+    'ProtocolError',
+    'JsonProtocol',
+    'BinaryProtocol',
+    'WS_PROTOCOLS',
+    'negotiate_protocol'
+]
@@ -0,0 +1,86 @@
+import os
+import random
+import uuid
+
+from types import SimpleNamespace
+
+import pytest
+
+
+# Обязательные настройки приложения: тесты не требуют .env и базы данных
+for name, value in {
+    "DB_USER":                     "postgres",
+    "DB_PASS":                     "postgres",
+    "DB_HOST":                     "localhost",
+    "DB_PORT":                     "5432",
+    "DB_NAME":                     "postgres",
+    "SECRET_KEY":                  "test-secret-key-for-the-test-suite",
+    "ALGORITHM":                   "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "60",
+    "IMAGE_RENDER_EXECUTOR":       "thread"
+}.items():
+    os.environ.setdefault(name, value)
+
+
+@pytest.fixture
+def start_game():
+    """ Создание игр двух игроков, уже загруженных в движок (в базу данных не пишутся) """
+
+    # Модули приложения читают настройки при импорте
+    from src.db.enums import GameStatus
+    from src.services.board_generator import BOARD_SIZE, SHIPS, generate_random_board
+    from src.services.game_engine import GameState, game_engine
+    from src.services.principal_cache import PlayerPrincipal, principal_cache
+    from src.services.ship_index import ShipIndex
+
+    started = []
+
+    def start(board_size: int = BOARD_SIZE) -> GameState:
+        # Флот растёт с площадью доски
+        fleet = sorted(SHIPS * max(1, (board_size * board_size) // (BOARD_SIZE * BOARD_SIZE)), reverse=True)
+        players = [uuid.uuid4(), uuid.uuid4()]
+        boards = []
+
+        for player_id in players:
+            principal_cache.put(PlayerPrincipal(player_id, f"player_{player_id.hex[:8]}", False))
+
+            board = generate_random_board(random.Random(player_id.int), board_size, fleet)
+            ship_index = ShipIndex(board)
+            boards.append(SimpleNamespace(
+                id=uuid.uuid4(),
+                player_id=player_id,
+                board_state=board,
+                board_size=board_size,
+                ship_index=ship_index,
+                ships_remaining=len(ship_index.cells)
+            ))
+
+        state = GameState(SimpleNamespace(
+            id=uuid.uuid4(),
+            player1_id=players[0],
+            player2_id=players[1],
+            turn_player_id=players[0],
+            winner_id=None,
+            status=GameStatus.IN_PROGRESS,
+            started_at=None,
+            finished_at=None
+        ), boards, [])
+        game_engine._games[state.game_id] = state
+        started.append(state)
+
+        return state
+
+    yield start
+
+    for state in started:
+        game_engine._games.pop(state.game_id, None)
+
+        for player_id in (state.player1_id, state.player2_id):
+            principal_cache.invalidate(player_id)
+
+
+@pytest.fixture
+def game(start_game):
+    """ Игра двух игроков на доске по умолчанию """
+
+    return start_game()
@@ -0,0 +1,314 @@
+import asyncio
+import json
+import random
+import statistics
+import time
+import uuid
+
+import httpx
+import pytest
+import uvicorn
+
+from websockets.asyncio.client import connect
+
+from main import app
+from src.api.v1 import games
+from src.services.auth import create_access_token
+from src.services.board_generator import BOARD_SIZE, SHIPS, generate_random_board
+from src.services.board_visualizer import render_board, render_composite
+from src.services.game_logic import apply_shot
+from src.services.image_cache import VIEW_BOARD, VIEW_COMPOSITE, ImageCache, image_cache
+from src.services.image_renderer import ImageRenderer, ImageRendererBusy
+from src.services.ship_index import ShipHits, ShipIndex
+
+
+def _new(cls, **kwargs):
+    """ Отдельный экземпляр сервиса-одиночки для теста """
+
+    return type.__call__(cls, **kwargs)
+
+
+def _game(board_size: int, seed: int):
+    rng = random.Random(seed)
+    fleet = sorted(SHIPS * max(1, (board_size * board_size) // (BOARD_SIZE * BOARD_SIZE)), reverse=True)
+
+    players = [uuid.uuid4(), uuid.uuid4()]
+    boards = {player_id: generate_random_board(rng, board_size, fleet) for player_id in players}
+    shots = {player_id: [[False] * board_size for _ in range(board_size)] for player_id in players}
+    ship_hits = {player_id: ShipHits(ShipIndex(boards[player_id]), shots[player_id]) for player_id in players}
+
+    # Выстрелы обоих игроков по очереди во все клетки доски противника
+    cells = [(x, y) for y in range(board_size) for x in range(board_size)]
+    moves = []
+
+    for shooter_id, target_id in zip(players, reversed(players)):
+        rng.shuffle(cells)
+        moves.append([(shooter_id, target_id, x, y) for x, y in cells])
+
+    return players, boards, shots, ship_hits, [move for pair in zip(*moves) for move in pair]
+
+
+@pytest.mark.parametrize("board_size", [BOARD_SIZE, 17])
+def test_incremental_repaint_matches_full_render(board_size):
+    """ Изображения, обновлённые по клетке на ход, совпадают с нарисованными заново """
+
+    cache = _new(ImageCache)
+    game_id = uuid.uuid4()
+    players, boards, shots, ship_hits, moves = _game(board_size, seed=board_size)
+    first, second = players
+
+    def full_renders():
+        return {
+            (first, VIEW_BOARD):      render_board(boards[first], shots[first]),
+            (first, VIEW_COMPOSITE):  render_composite(boards[first], shots[first], boards[second], shots[second]),
+            (second, VIEW_BOARD):     render_board(boards[second], shots[second]),
+            (second, VIEW_COMPOSITE): render_composite(boards[second], shots[second], boards[first], shots[first])
+        }
+
+    for (player_id, view), image in full_renders().items():
+        cache.put(game_id, player_id, 0, board_size, image, view)
+
+    for seq, (shooter_id, target_id, x, y) in enumerate(moves, start=1):
+        hit, _ = apply_shot(boards[target_id], shots[target_id], ship_hits[target_id], x, y)
+        cache.apply_shot(game_id, shooter_id, target_id, seq, x, y, hit)
+
+        # Сравнение на нескольких ходах и в конце игры
+        if seq % 37 and seq != len(moves):
+            continue
+
+        for (player_id, view), expected in full_renders().items():
+            cached = cache.get(game_id, player_id, seq, view)
+
+            assert cached is not None
+            assert cached.image.tobytes() == expected.tobytes(), f"ход {seq}, {view} игрока {player_id}"
+
+
+
+def test_put_refreshes_idle_timestamp(monkeypatch):
+    """ Сохранение изображения - тоже запрос: игра, которую только что перерисовали, не выгружается как простаивающая """
+
+    cache = _new(ImageCache, idle_timeout=10)
+    now = [1000.0]
+    monkeypatch.setattr("src.services.image_cache.time.monotonic", lambda: now[0])
+
+    stale_id, fresh_id, player_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+    cache.put(stale_id, player_id, 0, BOARD_SIZE)
+    cache.put(fresh_id, player_id, 0, BOARD_SIZE)
+
+    # Вторая игра перерисована по тому же ходу незадолго до истечения idle_timeout первой
+    now[0] += 8
+    cache.put(fresh_id, player_id, 0, BOARD_SIZE, view=VIEW_COMPOSITE)
+
+    now[0] += 5
+
+    assert cache.get(stale_id, player_id, 0) is None
+    assert cache.get(fresh_id, player_id, 0) is not None
+
+def test_renderer_pool_matches_inline_render():
+    """ Отрисовка в пуле даёт то же изображение, что и в цикле событий """
+
+    renderer = _new(ImageRenderer, executor="thread", workers=2, max_pending=4)
+    players, boards, shots, ship_hits, moves = _game(BOARD_SIZE, seed=1)
+
+    for shooter_id, target_id, x, y in moves[:60]:
+        apply_shot(boards[target_id], shots[target_id], ship_hits[target_id], x, y)
+
+    first, second = players
+
+    async def render():
+        return await asyncio.gather(
+            renderer.render_image(boards[first], shots[first]),
+            renderer.render_composite(boards[first], shots[first], boards[second], shots[second])
+        )
+
+    try:
+        board_image, composite_image = asyncio.run(render())
+    finally:
+        renderer.stop()
+
+    assert board_image.tobytes() == render_board(boards[first], shots[first]).tobytes()
+    assert composite_image.tobytes() == render_composite(
+        boards[first], shots[first], boards[second], shots[second]
+    ).tobytes()
+
+
+def test_renderer_rejects_when_queue_is_full():
+    """ Сверх max_pending отрисовка сразу отклоняется, а не ждёт в очереди """
+
+    renderer = _new(ImageRenderer, executor="thread", workers=1, max_pending=2, retry_after=3)
+    _, boards, shots, _, _ = _game(BOARD_SIZE, seed=2)
+    board, board_shots = next(iter(boards.values())), next(iter(shots.values()))
+
+    async def render():
+        return await asyncio.gather(
+            *(renderer.render_image(board, board_shots) for _ in range(3)),
+            return_exceptions=True
+        )
+
+    try:
+        results = asyncio.run(render())
+    finally:
+        renderer.stop()
+
+    rejected = [result for result in results if isinstance(result, ImageRendererBusy)]
+
+    assert len(rejected) == 1
+    assert rejected[0].retry_after == 3
+    assert renderer.metrics["rejected"] == 1
+    assert renderer.metrics["pending"] == 0
+
+
+# Ходов на замер задержки, интервал между ними (замер идёт, пока рисуются изображения)
+# и размер досок, изображения которых рисуются параллельно
+LATENCY_MOVES = 60
+LATENCY_INTERVAL = 0.01
+IMAGE_BOARD_SIZE = 80
+
+
+async def _move_latencies(game, sockets, cells, moves: int) -> list:
+    """ Задержки ходов в мс: от отправки хода до получения его результата стрелявшим """
+
+    latencies = []
+    turn = game.player1_id
+
+    for _ in range(moves):
+        await asyncio.sleep(LATENCY_INTERVAL)
+
+        shooter, other = sockets[turn], sockets[game.opponent_id(turn)]
+        x, y = cells[turn].pop()
+
+        started = time.perf_counter()
+        await shooter.send(json.dumps({"type": "move", "data": {"x": x, "y": y}}))
+
+        delta = json.loads(await shooter.recv())
+        latencies.append((time.perf_counter() - started) * 1000)
+
+        assert delta["type"] == "game_delta"
+        assert json.loads(await other.recv())["type"] == "game_delta"
+
+        # Только промахи: ход переходит к противнику, игра не заканчивается
+        assert delta["data"]["result"] == "miss"
+        turn = uuid.UUID(delta["data"]["turn"])
+
+    return latencies
+
+
+async def _request_images(client: httpx.AsyncClient, image_games, stop: asyncio.Event, counters: dict):
+    """ Клиент изображений: составные изображения разных игр по кругу """
+
+    rng = random.Random(id(counters))
+
+    while not stop.is_set():
+        image_game = rng.choice(image_games)
+        token = create_access_token({"sub": image_game.player1_id})
+
+        response = await client.get(
+            "/api/v1/games/x/board/image",
+            params={"game_id": str(image_game.game_id), "view": VIEW_COMPOSITE, "format": "png"},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+
+        if response.status_code == 503:
+            counters["rejected"] += 1
+            await asyncio.sleep(0.01)
+            continue
+
+        assert response.status_code == 200
+        counters["rendered"] += 1
+
+
+async def _latency_with_images(game, image_games, clients: int):
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, lifespan="off", log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    port = server.servers[0].sockets[0].getsockname()[1]
+    url = f"ws://127.0.0.1:{port}/api/v1/games/{game.game_id}/play?game_id={game.game_id}"
+
+    # Клетки без кораблей на доске противника каждого игрока
+    cells = {
+        player_id: [
+            (x, y)
+            for y, row in enumerate(game.boards[game.opponent_id(player_id)].board)
+            for x, cell in enumerate(row) if cell == 0
+        ]
+        for player_id in (game.player1_id, game.player2_id)
+    }
+
+    stop = asyncio.Event()
+    counters = {"rendered": 0, "rejected": 0}
+    sockets = {}
+
+    try:
+        for player_id in (game.player1_id, game.player2_id):
+            sockets[player_id] = await connect(f"{url}&token={create_access_token({'sub': player_id})}")
+
+            # Подтверждение подключения и полное состояние игры
+            await sockets[player_id].recv()
+            await sockets[player_id].recv()
+
+        idle = await _move_latencies(game, sockets, cells, LATENCY_MOVES)
+
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=30) as client:
+            requests = [
+                asyncio.create_task(_request_images(client, image_games, stop, counters))
+                for _ in range(clients)
+            ]
+
+            # Замер начинается, когда изображения уже рисуются
+            while not counters["rendered"]:
+                await asyncio.sleep(0.01)
+
+            rendered = counters["rendered"]
+            loaded = await _move_latencies(game, sockets, cells, LATENCY_MOVES)
+            counters["during_moves"] = counters["rendered"] - rendered
+
+            stop.set()
+            await asyncio.gather(*requests)
+
+    finally:
+        for websocket in sockets.values():
+            await websocket.close()
+
+        server.should_exit = True
+        await serving
+
+    return idle, loaded, counters
+
+
+def test_move_latency_stays_flat_while_images_render(start_game, monkeypatch):
+    """
+        Ходы по WebSocket обрабатываются так же быстро, пока другие клиенты
+        запрашивают изображения больших досок: отрисовка идёт в пуле, а не в цикле событий
+    """
+
+    renderer = _new(ImageRenderer, executor="process", workers=2, max_pending=4)
+    monkeypatch.setattr(games, "image_renderer", renderer)
+
+    # Без кеша изображений: каждый запрос рисует изображение заново
+    monkeypatch.setattr(image_cache, "max_bytes", 0)
+
+    game = start_game()
+    image_games = [start_game(IMAGE_BOARD_SIZE) for _ in range(8)]
+
+    try:
+        # Процессы пула запускаются до сервера: иначе они унаследуют открытые соединения
+        board = image_games[0].boards[image_games[0].player1_id]
+        asyncio.run(renderer.render_image(board.board, board.shots))
+
+        # По клиенту изображений на процесс пула: оба процесса всё время рисуют
+        idle, loaded, counters = asyncio.run(_latency_with_images(game, image_games, clients=renderer.workers))
+    finally:
+        renderer.stop()
+
+    idle_ms, loaded_ms = statistics.median(idle), statistics.median(loaded)
+
+    # Изображения действительно рисовались в пуле во время замера
+    assert counters["during_moves"] >= 4
+    assert renderer.metrics["rendered"] >= counters["rendered"]
+
+    # При отрисовке в цикле событий медиана вырастает до ~6 мс при ~0.9 мс без изображений
+    assert loaded_ms <= idle_ms * 2 + 2, f"ход: {idle_ms:.2f} мс без изображений, {loaded_ms:.2f} мс с ними"
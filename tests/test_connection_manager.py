@@ -0,0 +1,36 @@
+import pytest
+
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from main import app
+from src.schemas.websocket import WSMessageType
+from src.services.auth import create_access_token
+from src.services.connection_manager import WS_CLOSE_REPLACED, manager
+
+
+def test_reconnect_closes_previous_connection(game):
+    """ Повторное подключение игрока закрывает прежнее соединение, новое продолжает работать """
+
+    game_id = str(game.game_id)
+    token = create_access_token({"sub": game.player1_id})
+    url = f"/api/v1/games/{game_id}/play?game_id={game_id}&token={token}"
+    client = TestClient(app)
+
+    with client.websocket_connect(url) as previous:
+        assert previous.receive_json()["type"] == WSMessageType.CONNECTED.value
+        assert previous.receive_json()["type"] == WSMessageType.GAME_STATE.value
+
+        with client.websocket_connect(url) as current:
+            assert current.receive_json()["type"] == WSMessageType.CONNECTED.value
+            assert current.receive_json()["type"] == WSMessageType.GAME_STATE.value
+
+            with pytest.raises(WebSocketDisconnect) as closed:
+                previous.receive_json()
+
+            assert closed.value.code == WS_CLOSE_REPLACED
+
+            current.send_json({"type": WSMessageType.RESYNC.value})
+
+            assert current.receive_json()["type"] == WSMessageType.GAME_STATE.value
+            assert len(manager.active_connections[game_id]) == 1
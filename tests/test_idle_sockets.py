@@ -0,0 +1,166 @@
+import asyncio
+import random
+import resource
+import uuid
+
+from types import SimpleNamespace
+
+import pytest
+import uvicorn
+
+from sqlalchemy import insert
+from websockets.asyncio.client import connect
+
+from main import app
+from src.core import database_client
+from src.db.enums import GameStatus
+from src.db.models import Player
+from src.services.auth import create_access_token
+from src.services.board_generator import BOARD_SIZE, generate_random_board
+from src.services.game_engine import GameState, game_engine
+from src.services.principal_cache import principal_cache
+from src.services.ship_index import ShipIndex
+
+
+IDLE_SOCKETS = 1000
+
+
+@pytest.fixture
+def database(tmp_path):
+    """
+        База данных SQLite вместо Postgres: счётчик подключений DatabaseClient
+        считает выдачу подключений так же, а из таблиц нужна только players
+    """
+
+    async def create():
+        await database_client.initialize(f"sqlite+aiosqlite:///{tmp_path / 'battleship.db'}")
+
+        async with database_client.engine.begin() as connection:
+            await connection.run_sync(Player.__table__.create)
+
+    asyncio.run(create())
+
+    yield database_client
+
+    asyncio.run(database_client.stop())
+
+    database_client._engine = None
+    database_client._async_session_factory = None
+    database_client._sqlalchemy_config = None
+
+
+@pytest.fixture
+def open_files_limit():
+    """ На каждое соединение нужно два дескриптора: клиента и сервера """
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    needed = IDLE_SOCKETS * 2 + 256
+
+    if hard != resource.RLIM_INFINITY and hard < needed:
+        pytest.skip(f"Лимит открытых файлов {hard} меньше {needed}")
+
+    resource.setrlimit(resource.RLIMIT_NOFILE, (max(soft, needed), hard))
+
+    yield
+
+    resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+
+
+def _game_board(player_id: uuid.UUID, board):
+    ship_index = ShipIndex(board)
+
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        player_id=player_id,
+        board_state=board,
+        board_size=BOARD_SIZE,
+        ship_index=ship_index,
+        ships_remaining=len(ship_index.cells)
+    )
+
+
+def _start_game(player_id: uuid.UUID, board) -> uuid.UUID:
+    """ Игра против второго игрока, уже загруженная в движок (ходов нет, в базу данных не пишется) """
+
+    opponent_id = uuid.uuid4()
+    game = SimpleNamespace(
+        id=uuid.uuid4(),
+        player1_id=player_id,
+        player2_id=opponent_id,
+        turn_player_id=player_id,
+        winner_id=None,
+        status=GameStatus.IN_PROGRESS,
+        started_at=None,
+        finished_at=None
+    )
+
+    state = GameState(game, [_game_board(player_id, board), _game_board(opponent_id, board)], [])
+    game_engine._games[state.game_id] = state
+
+    return state.game_id
+
+
+async def _idle_sockets():
+    board = generate_random_board(random.Random(0))
+    player_ids = [uuid.uuid4() for _ in range(IDLE_SOCKETS)]
+
+    async with database_client.get_session() as db:
+        await db.execute(
+            insert(Player),
+            [{"id": player_id, "username": f"idle_{i}", "hashed_password": "!:!"} for i, player_id in enumerate(player_ids)]
+        )
+
+    game_ids = [_start_game(player_id, board) for player_id in player_ids]
+    checkouts = database_client.metrics["checkouts"]
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, lifespan="off", log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    port = server.servers[0].sockets[0].getsockname()[1]
+    semaphore = asyncio.Semaphore(100)
+    websockets = []
+
+    async def open_socket(game_id: uuid.UUID, player_id: uuid.UUID):
+        async with semaphore:
+            token = create_access_token({"sub": player_id})
+            websocket = await connect(f"ws://127.0.0.1:{port}/api/v1/games/{game_id}/play?game_id={game_id}&token={token}")
+            websockets.append(websocket)
+
+            # Подтверждение подключения и полное состояние игры
+            await websocket.recv()
+            await websocket.recv()
+
+    try:
+        await asyncio.gather(*(open_socket(game_id, player_id) for game_id, player_id in zip(game_ids, player_ids)))
+
+        # Каждое подключение один раз загрузило игрока из базы данных и вернуло подключение
+        assert database_client.metrics["checkouts"] - checkouts == IDLE_SOCKETS
+        assert database_client.metrics["connections_in_use"] == 0
+
+        await asyncio.sleep(0.5)
+
+        assert all(websocket.state.name == "OPEN" for websocket in websockets)
+        assert database_client.metrics["connections_in_use"] == 0
+        assert database_client.metrics["max_connections_in_use"] <= 100
+        assert database_client.metrics["checkouts"] - checkouts == IDLE_SOCKETS
+
+    finally:
+        await asyncio.gather(*(websocket.close() for websocket in websockets), return_exceptions=True)
+
+        server.should_exit = True
+        await serving
+
+        for game_id in game_ids:
+            game_engine._games.pop(game_id, None)
+
+        for player_id in player_ids:
+            principal_cache.invalidate(player_id)
+
+
+def test_idle_sockets_hold_no_database_connections(database, open_files_limit):
+    """ 1000 простаивающих WebSocket-соединений не держат ни одного подключения к базе данных """
+
+    asyncio.run(_idle_sockets())
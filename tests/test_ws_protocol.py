@@ -0,0 +1,127 @@
+import pytest
+
+from fastapi.testclient import TestClient
+
+from main import app
+from src.schemas.websocket import WSMessageType
+from src.services.auth import create_access_token
+from src.services.game_engine import game_engine
+from src.services.ws_protocol import HEADER, BinaryProtocol, JsonProtocol, ProtocolError
+
+
+def test_message_codes_are_fixed():
+    """ Коды типов сообщений - часть протокола и не зависят от порядка членов WSMessageType """
+
+    assert {message_type.value: BinaryProtocol.decode(HEADER.pack(code, 0))["type"] for code, message_type in [
+        (1, WSMessageType.START_GAME),
+        (2, WSMessageType.MOVE),
+        (3, WSMessageType.GAME_STATE),
+        (4, WSMessageType.GAME_DELTA),
+        (5, WSMessageType.RESYNC),
+        (6, WSMessageType.GAME_OVER),
+        (7, WSMessageType.ERROR),
+        (8, WSMessageType.CONNECTED)
+    ]} == {message_type.value: message_type.value for message_type in WSMessageType}
+
+
+@pytest.mark.parametrize("frame", [
+    HEADER.pack(0, 0),
+    HEADER.pack(200, 0),
+    b"\x02",
+    HEADER.pack(2, 1) + b"\x01",
+    HEADER.pack(2, 2) + b"\xff"
+])
+def test_binary_decode_rejects_malformed_frames(frame):
+    with pytest.raises(ProtocolError):
+        BinaryProtocol.decode(frame)
+
+
+@pytest.mark.parametrize("frame", ["{", "[1, 2]"])
+def test_json_decode_rejects_malformed_frames(frame):
+    with pytest.raises(ProtocolError):
+        JsonProtocol.decode(frame)
+
+
+def test_unknown_binary_message_gets_error_and_keeps_connection(game):
+    """ На кадр с неизвестным кодом сервер отвечает ERROR и продолжает обслуживать соединение """
+
+    token = create_access_token({"sub": game.player1_id})
+    url = f"/api/v1/games/{game.game_id}/play?game_id={game.game_id}&token={token}"
+
+    with TestClient(app).websocket_connect(url, subprotocols=[BinaryProtocol.name]) as websocket:
+        assert BinaryProtocol.decode(websocket.receive_bytes())["type"] == WSMessageType.CONNECTED.value
+        assert BinaryProtocol.decode(websocket.receive_bytes())["type"] == WSMessageType.GAME_STATE.value
+
+        websocket.send_bytes(HEADER.pack(200, 0))
+        error = BinaryProtocol.decode(websocket.receive_bytes())
+
+        assert error["type"] == WSMessageType.ERROR.value
+        assert "200" in error["message"]
+
+        websocket.send_bytes(BinaryProtocol.encode({"type": WSMessageType.RESYNC.value}))
+        state = BinaryProtocol.decode(websocket.receive_bytes())
+
+        assert state["type"] == WSMessageType.GAME_STATE.value
+        assert state["data"]["game_id"] == str(game.game_id)
+
+
+@pytest.mark.parametrize("protocol, frame", [
+    (JsonProtocol, '{"type": "move", "data": {"x": "a", "y": 1}}'),
+    (JsonProtocol, '{"type": "move", "data": [1, 2]}'),
+    (JsonProtocol, '{"type": "move"}'),
+    (JsonProtocol, HEADER.pack(2, 0)),
+    (BinaryProtocol, HEADER.pack(2, 0)),
+    (BinaryProtocol, '{"type": "resync"}')
+])
+def test_malformed_move_gets_error_and_keeps_connection(game, protocol, frame):
+    """ Ход без координат или кадр не того типа получает ERROR, соединение продолжает работать """
+
+    token = create_access_token({"sub": game.player1_id})
+    url = f"/api/v1/games/{game.game_id}/play?game_id={game.game_id}&token={token}"
+
+    def send(websocket, data):
+        if isinstance(data, bytes):
+            websocket.send_bytes(data)
+        else:
+            websocket.send_text(data)
+
+    def receive(websocket):
+        return protocol.decode(websocket.receive_bytes() if protocol.binary else websocket.receive_text())
+
+    subprotocols = [protocol.name] if protocol.binary else []
+
+    with TestClient(app).websocket_connect(url, subprotocols=subprotocols) as websocket:
+        assert receive(websocket)["type"] == WSMessageType.CONNECTED.value
+        assert receive(websocket)["type"] == WSMessageType.GAME_STATE.value
+
+        send(websocket, frame)
+
+        assert receive(websocket)["type"] == WSMessageType.ERROR.value
+
+        send(websocket, protocol.encode({"type": WSMessageType.RESYNC.value}))
+
+        assert receive(websocket)["type"] == WSMessageType.GAME_STATE.value
+
+
+def test_resync_of_removed_game_gets_error(game, monkeypatch):
+    """ Запрос состояния игры, которой больше нет, получает ERROR, а не обрывает соединение """
+
+    async def load(game_id):
+        return None
+
+    # Игры нет и в базе данных
+    monkeypatch.setattr(game_engine, "_load", load)
+
+    token = create_access_token({"sub": game.player1_id})
+    url = f"/api/v1/games/{game.game_id}/play?game_id={game.game_id}&token={token}"
+
+    with TestClient(app).websocket_connect(url) as websocket:
+        assert websocket.receive_json()["type"] == WSMessageType.CONNECTED.value
+        assert websocket.receive_json()["type"] == WSMessageType.GAME_STATE.value
+
+        game_engine._games.pop(game.game_id)
+
+        websocket.send_json({"type": WSMessageType.RESYNC.value})
+        error = websocket.receive_json()
+
+        assert error == {"type": WSMessageType.ERROR.value, "message": "Игра не найдена"}